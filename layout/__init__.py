@@ -1,32 +1,65 @@
+from .column_plan import ColumnPlan, ColumnStep, LinePlacement, plan_solution_column
 from .components import AnalysisPanel, PinnedHeader, SolutionLine, Subtitle, make_full_problem
-from .layout_rules import LayoutDecision, LayoutMetrics, compute_metrics, decide_layout
+from .layout_rules import (
+    LayoutDecision,
+    LayoutMetrics,
+    OverflowReport,
+    compute_metrics,
+    decide_layout,
+    decide_layout_measured,
+    overflow_report,
+    record_overflow,
+)
+from .sized_cache import CacheStats, cache_scope
 from .text_fit import (
+    TextExtent,
+    TextLayout,
     clear_text_cache,
+    evict_text_scope,
     fit_text_to_box,
     fit_text_to_box_with_constraints,
+    layout_text,
     make_text_mobject,
     pin_to_corner,
+    predict_text_extents,
+    text_cache_stats,
     wrap_text_to_width,
 )
 from .theme import Constraints, Theme, apply_overrides
 
 __all__ = [
     "AnalysisPanel",
+    "CacheStats",
+    "ColumnPlan",
+    "ColumnStep",
     "Constraints",
     "LayoutDecision",
     "LayoutMetrics",
+    "LinePlacement",
+    "OverflowReport",
     "PinnedHeader",
     "SolutionLine",
     "Subtitle",
+    "TextExtent",
+    "TextLayout",
     "Theme",
     "apply_overrides",
+    "cache_scope",
     "compute_metrics",
     "decide_layout",
+    "decide_layout_measured",
+    "evict_text_scope",
     "fit_text_to_box",
     "fit_text_to_box_with_constraints",
     "clear_text_cache",
+    "layout_text",
     "make_full_problem",
     "make_text_mobject",
+    "overflow_report",
     "pin_to_corner",
+    "plan_solution_column",
+    "predict_text_extents",
+    "record_overflow",
+    "text_cache_stats",
     "wrap_text_to_width",
 ]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .layout_rules import LayoutDecision
+from .theme import Constraints, Theme
+
+# 解题步骤列的布局预计算：已知每行的最终宽高，一次算出每一步可见的行与各行的目标中心，
+# 与 write_steps 原先逐步 arrange(DOWN, aligned_edge=LEFT) → to_edge(RIGHT) → shift(DOWN) 的结果一致。
+# 场景只按计划平移，不再每步从点数组重算整组包围盒；时间轴与分镜预览读同一份计划。
+
+Point = Tuple[float, float]
+
+
+@dataclass(frozen=True)
+class LinePlacement:
+    line: int
+    center: Point
+
+
+@dataclass(frozen=True)
+class ColumnStep:
+    step: int
+    placements: Tuple[LinePlacement, ...]
+    # 本步移出列的行（超过 max_lines 时最早的一行），没有则为 None
+    dropped: Optional[int] = None
+
+    def center_of(self, line: int) -> Optional[Point]:
+        for placement in self.placements:
+            if placement.line == line:
+                return placement.center
+        return None
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    sizes: Tuple[Point, ...]
+    buff: float
+    max_lines: int
+    steps: Tuple[ColumnStep, ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_lines": self.max_lines,
+            "buff": round(self.buff, 6),
+            "sizes": [[round(w, 6), round(h, 6)] for w, h in self.sizes],
+            "steps": [
+                {
+                    "step": s.step,
+                    "dropped": s.dropped,
+                    "lines": [
+                        {"line": p.line, "center": [round(p.center[0], 6), round(p.center[1], 6)]}
+                        for p in s.placements
+                    ],
+                }
+                for s in self.steps
+            ],
+        }
+
+
+def plan_solution_column(
+    sizes: Sequence[Point],
+    frame_w: float,
+    theme: Theme,
+    constraints: Constraints,
+    decision: LayoutDecision,
+) -> ColumnPlan:
+    """
+    预计算解题步骤列
+    :param sizes: 每行（按步骤顺序）的最终宽高
+    :param frame_w: 画面宽度，列右缘贴齐 frame_w / 2 - min_margin
+    :param theme: 步骤区主题（行距）
+    :param constraints: 边距与安全区
+    :param decision: 布局决策（同屏最多行数）
+    :return: 每一步可见行及其中心坐标
+    """
+    buff = 0.25 * theme.line_spacing
+    max_lines = max(1, decision.max_lines)
+    right = frame_w / 2 - constraints.min_margin
+    # 整组先居中再下移，竖直中心固定在 y_offset
+    y_offset = -(0.2 + constraints.safe_top * 0.15)
+    steps = []
+    visible: list[int] = []
+    for index in range(len(sizes)):
+        visible.append(index)
+        dropped = visible.pop(0) if len(visible) > max_lines else None
+        col_w = max(sizes[i][0] for i in visible)
+        col_h = sum(sizes[i][1] for i in visible) + buff * (len(visible) - 1)
+        left = right - col_w
+        top = y_offset + col_h / 2
+        placements = []
+        for i in visible:
+            w, h = sizes[i]
+            placements.append(LinePlacement(line=i, center=(left + w / 2, top - h / 2)))
+            top -= h + buff
+        steps.append(ColumnStep(step=index, placements=tuple(placements), dropped=dropped))
+    return ColumnPlan(
+        sizes=tuple((float(w), float(h)) for w, h in sizes),
+        buff=buff,
+        max_lines=max_lines,
+        steps=tuple(steps),
+    )
@@ -6,7 +6,7 @@ from typing import Iterable, Optional
 from manim import DOWN, LEFT, RIGHT, UP, VGroup, Rectangle, Text, Mobject
 
 # 自定义文本工具：fit_text_to_box（文本适配指定尺寸）、make_text_mobject（创建文本对象）
-from .text_fit import fit_text_to_box, fit_text_to_box_with_constraints, make_text_mobject, wrap_text_to_width
+from .text_fit import fit_text_to_box, layout_text, make_text_mobject, wrap_text_to_width
 from .theme import Constraints, Theme
 
 
@@ -121,19 +121,12 @@ class SolutionLine(VGroup):
         constraints = constraints or Constraints()
         font = font or theme.font
         font_size = font_size * theme.font_size_scale
-        # 1. 创建单行文本对象
-        wrapped = wrap_text_to_width(line, max_width, font=font, font_size=font_size)
-        text_m = make_text_mobject(wrapped, font=font, font_size=font_size)
-        # 2. 适配文本到指定宽度（最大高度固定为2）
-        fit_text_to_box_with_constraints(
-            text_m,
-            max_width=max_width,
-            max_height=2,
-            min_font_size=constraints.min_font_size,
-            text=wrapped,
-            font=font,
-            font_size=font_size,
-        )
+        # 1. 一次确定断行与最终字号，只构建一次文本对象
+        laid = layout_text(line, max_width, font, font_size, min_font_size=constraints.min_font_size)
+        text_m = make_text_mobject(laid.text, font=font, font_size=laid.font_size)
+        # 2. 高度仍超出时整体缩放（最大高度固定为2），不再重新换行重建
+        self.overflow = laid.overflow or text_m.width > max_width or text_m.height > 2
+        fit_text_to_box(text_m, max_width=max_width, max_height=2)
         # 3. 添加文本到组件
         self.add(text_m)
         # 暴露文本对象供外部调整
@@ -159,19 +152,11 @@ class Subtitle(VGroup):
         constraints = constraints or Constraints()
         font = font or theme.font
         font_size = font_size * theme.font_size_scale
-        # 1. 创建副标题文本对象（支持 $...$ 行内公式混排）
-        wrapped = wrap_text_to_width(text, max_width, font=font, font_size=font_size)
-        text_m = make_text_mobject(wrapped, font=font, font_size=font_size)
-        # 2. 适配文本到指定宽度（最大高度固定为1）
-        fit_text_to_box_with_constraints(
-            text_m,
-            max_width=max_width,
-            max_height=1,
-            min_font_size=constraints.min_font_size,
-            text=wrapped,
-            font=font,
-            font_size=font_size,
-        )
+        # 1. 创建副标题文本对象（支持 $...$ 行内公式混排），断行与字号一次确定
+        laid = layout_text(text, max_width, font, font_size, min_font_size=constraints.min_font_size)
+        text_m = make_text_mobject(laid.text, font=font, font_size=laid.font_size)
+        # 2. 高度仍超出时整体缩放（最大高度固定为1）
+        fit_text_to_box(text_m, max_width=max_width, max_height=1)
         # 3. 添加可选背景
         if theme.subtitle_bg_opacity > 0:
             pad = theme.panel_padding
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 基于字体文件度量的文本宽度：直接读取 TrueType / OpenType（含 .ttc 字体集）的 cmap、hmtx 与 kern 表，
+# 文本宽度 = Σ 字形步进宽度 + 相邻字形的 kern 调整，再乘以按 Manim Text 标定的比例换算为场景单位。
+# 每个字体的字形宽度表（码位 → 步进，单位 em）与标定比例缓存在磁盘上，后续运行只读一个 JSON。
+# 只处理 legacy kern 表（GPOS 字距不读）；字体里没有的字符返回 None，由调用方退回构建 mobject 测量。
+# 行高取 hhea 的 ascender - descender + lineGap（em），与宽度共用同一个标定比例。
+
+_DEFAULT_DIR = Path(__file__).resolve().parents[1] / ".cache" / "font_metrics"
+_TABLE_VERSION = 2
+# 标定用的参考串与字号：足够长，首尾字形的左右留白可以忽略
+_CALIBRATION_TEXT = "0123456789" * 2
+_CALIBRATION_SIZE = 48.0
+_FONT_SUFFIXES = {".ttf", ".otf", ".ttc", ".otc"}
+_STYLE_WORDS = ("bold", "italic", "oblique", "light", "thin", "black", "medium")
+
+
+@dataclass
+class FontMetrics:
+    path: str
+    index: int
+    units_per_em: int
+    advances: Dict[int, float]
+    kerning: Dict[Tuple[int, int], float] = field(default_factory=dict)
+    # hhea 的行高（em）；0 表示字体未提供
+    line_height: float = 0.0
+    # 1 em 在 font_size=1 时对应的场景宽度；None 表示尚未标定
+    scale: Optional[float] = None
+
+    def advance(self, text: str) -> Optional[float]:
+        """
+        文本的步进总宽度（em）；有字体中不存在的字符时返回 None
+        """
+        total = 0.0
+        prev: Optional[int] = None
+        for ch in text:
+            cp = ord(ch)
+            width = self.advances.get(cp)
+            if width is None:
+                return None
+            total += width
+            if prev is not None and self.kerning:
+                total += self.kerning.get((prev, cp), 0.0)
+            prev = cp
+        return total
+
+    def to_dict(self) -> dict:
+        return {
+            "version": _TABLE_VERSION,
+            "path": self.path,
+            "index": self.index,
+            "units_per_em": self.units_per_em,
+            "advances": {str(cp): w for cp, w in self.advances.items()},
+            "kerning": [[a, b, v] for (a, b), v in self.kerning.items()],
+            "line_height": self.line_height,
+            "scale": self.scale,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FontMetrics":
+        if data.get("version") != _TABLE_VERSION:
+            raise ValueError("font metrics table version mismatch")
+        return cls(
+            path=str(data["path"]),
+            index=int(data["index"]),
+            units_per_em=int(data["units_per_em"]),
+            advances={int(cp): float(w) for cp, w in data["advances"].items()},
+            kerning={(int(a), int(b)): float(v) for a, b, v in data.get("kerning", [])},
+            line_height=float(data.get("line_height", 0.0)),
+            scale=data.get("scale"),
+        )
+
+
+def _table_directory(data: bytes, offset: int) -> Dict[str, Tuple[int, int]]:
+    num_tables = struct.unpack_from(">H", data, offset + 4)[0]
+    tables: Dict[str, Tuple[int, int]] = {}
+    for i in range(num_tables):
+        tag, _, table_offset, length = struct.unpack_from(">4sIII", data, offset + 12 + 16 * i)
+        tables[tag.decode("latin-1")] = (table_offset, length)
+    return tables
+
+
+def _face_offsets(data: bytes) -> List[int]:
+    if data[:4] == b"ttcf":
+        count = struct.unpack_from(">I", data, 8)[0]
+        return list(struct.unpack_from(f">{count}I", data, 12))
+    return [0]
+
+
+def _parse_cmap(data: bytes, base: int) -> Dict[int, int]:
+    count = struct.unpack_from(">H", data, base + 2)[0]
+    subtables: Dict[Tuple[int, int], int] = {}
+    for i in range(count):
+        platform, encoding, offset = struct.unpack_from(">HHI", data, base + 4 + 8 * i)
+        subtables[(platform, encoding)] = base + offset
+    # 优先完整 Unicode（format 12），其次 BMP（format 4）
+    for key in ((3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 1), (0, 0)):
+        offset = subtables.get(key)
+        if offset is None:
+            continue
+        fmt = struct.unpack_from(">H", data, offset)[0]
+        if fmt == 12:
+            groups = struct.unpack_from(">I", data, offset + 12)[0]
+            mapping: Dict[int, int] = {}
+            for g in range(groups):
+                start, end, glyph = struct.unpack_from(">III", data, offset + 16 + 12 * g)
+                for cp in range(start, end + 1):
+                    mapping[cp] = glyph + cp - start
+            return mapping
+        if fmt == 4:
+            seg_x2 = struct.unpack_from(">H", data, offset + 6)[0]
+            seg = seg_x2 // 2
+            ends = struct.unpack_from(f">{seg}H", data, offset + 14)
+            starts = struct.unpack_from(f">{seg}H", data, offset + 16 + seg_x2)
+            deltas = struct.unpack_from(f">{seg}h", data, offset + 16 + 2 * seg_x2)
+            range_base = offset + 16 + 3 * seg_x2
+            ranges = struct.unpack_from(f">{seg}H", data, range_base)
+            mapping = {}
+            for i in range(seg):
+                for cp in range(starts[i], ends[i] + 1):
+                    if cp == 0xFFFF:
+                        continue
+                    if ranges[i] == 0:
+                        glyph = (cp + deltas[i]) & 0xFFFF
+                    else:
+                        addr = range_base + 2 * i + ranges[i] + 2 * (cp - starts[i])
+                        glyph = struct.unpack_from(">H", data, addr)[0]
+                        if glyph:
+                            glyph = (glyph + deltas[i]) & 0xFFFF
+                    if glyph:
+                        mapping[cp] = glyph
+            return mapping
+    return {}
+
+
+def _parse_kern(data: bytes, base: int) -> Dict[Tuple[int, int], int]:
+    version, count = struct.unpack_from(">HH", data, base)
+    if version != 0:
+        return {}
+    pairs: Dict[Tuple[int, int], int] = {}
+    offset = base + 4
+    for _ in range(count):
+        _, length, coverage = struct.unpack_from(">HHH", data, offset)
+        # 只取水平方向、format 0 的字距对
+        if coverage & 0x1 and (coverage >> 8) == 0:
+            n_pairs = struct.unpack_from(">H", data, offset + 6)[0]
+            for i in range(n_pairs):
+                left, right, value = struct.unpack_from(">HHh", data, offset + 14 + 6 * i)
+                pairs[(left, right)] = value
+        offset += length
+    return pairs
+
+
+def parse_font(path: str, index: int = 0) -> FontMetrics:
+    """
+    读取字体文件（字体集取第 index 个字体）的步进宽度与字距，宽度单位为 em
+    """
+    data = Path(path).read_bytes()
+    faces = _face_offsets(data)
+    tables = _table_directory(data, faces[min(index, len(faces) - 1)])
+    head = tables["head"][0]
+    units_per_em = struct.unpack_from(">H", data, head + 18)[0] or 1000
+    hhea = tables["hhea"][0]
+    ascender, descender, line_gap = struct.unpack_from(">hhh", data, hhea + 4)
+    num_h_metrics = struct.unpack_from(">H", data, hhea + 34)[0]
+    hmtx = tables["hmtx"][0]
+    glyph_advances = struct.unpack_from(f">{num_h_metrics * 2}H", data, hmtx)[0::2]
+    cmap = _parse_cmap(data, tables["cmap"][0])
+    last = glyph_advances[-1] if glyph_advances else 0
+
+    def _glyph_advance(glyph: int) -> int:
+        return glyph_advances[glyph] if glyph < len(glyph_advances) else last
+
+    advances = {cp: _glyph_advance(glyph) / units_per_em for cp, glyph in cmap.items()}
+    kerning: Dict[Tuple[int, int], float] = {}
+    if "kern" in tables:
+        by_glyph = _parse_kern(data, tables["kern"][0])
+        if by_glyph:
+            reverse: Dict[int, List[int]] = {}
+            for cp, glyph in cmap.items():
+                reverse.setdefault(glyph, []).append(cp)
+            for (left, right), value in by_glyph.items():
+                for a in reverse.get(left, ()):
+                    for b in reverse.get(right, ()):
+                        kerning[(a, b)] = value / units_per_em
+    return FontMetrics(
+        path=str(path),
+        index=index,
+        units_per_em=units_per_em,
+        advances=advances,
+        kerning=kerning,
+        line_height=max(0, ascender - descender + line_gap) / units_per_em,
+    )
+
+
+def _family_names(data: bytes, offset: int) -> List[str]:
+    tables = _table_directory(data, offset)
+    if "name" not in tables:
+        return []
+    base = tables["name"][0]
+    _, count, storage = struct.unpack_from(">HHH", data, base)
+    names: List[str] = []
+    for i in range(count):
+        platform, encoding, _, name_id, length, str_offset = struct.unpack_from(">HHHHHH", data, base + 6 + 12 * i)
+        if name_id not in (1, 16):
+            continue
+        raw = data[base + storage + str_offset: base + storage + str_offset + length]
+        try:
+            names.append(raw.decode("utf-16-be") if platform in (0, 3) else raw.decode("mac_roman"))
+        except UnicodeDecodeError:
+            continue
+    return names
+
+
+def _font_dirs() -> List[Path]:
+    home = Path.home()
+    if sys.platform.startswith("win"):
+        windir = Path(os.environ.get("WINDIR", r"C:\Windows"))
+        local = Path(os.environ.get("LOCALAPPDATA", home)) / "Microsoft" / "Windows" / "Fonts"
+        return [windir / "Fonts", local]
+    if sys.platform == "darwin":
+        return [Path("/System/Library/Fonts"), Path("/Library/Fonts"), home / "Library" / "Fonts"]
+    return [Path("/usr/share/fonts"), Path("/usr/local/share/fonts"), home / ".fonts", home / ".local" / "share" / "fonts"]
+
+
+@lru_cache(maxsize=1)
+def _scan_fonts() -> Dict[str, Tuple[str, int]]:
+    # 扫描系统字体目录，建立 小写家族名 → (文件, 字体集下标)
+    found: Dict[str, Tuple[str, int]] = {}
+    for root in _font_dirs():
+        if not root.is_dir():
+            continue
+        paths = [p for p in root.rglob("*") if p.suffix.lower() in _FONT_SUFFIXES]
+        # 同一家族有多个字重时优先常规体
+        paths.sort(key=lambda p: (any(w in p.stem.lower() for w in _STYLE_WORDS), str(p)))
+        for path in paths:
+            try:
+                data = path.read_bytes()
+                for idx, offset in enumerate(_face_offsets(data)):
+                    for name in _family_names(data, offset):
+                        found.setdefault(name.strip().lower(), (str(path), idx))
+            except (OSError, struct.error):
+                continue
+    return found
+
+
+@lru_cache(maxsize=64)
+def find_font_file(family: str) -> Optional[Tuple[str, int]]:
+    """
+    按家族名定位字体文件；有 fontconfig 时与 Pango 使用同一套匹配（含回退字体），否则扫描系统字体目录
+    """
+    explicit = os.environ.get("TEXT_FONT_FILE", "").strip()
+    if explicit:
+        return explicit, 0
+    if shutil.which("fc-match"):
+        try:
+            out = subprocess.run(
+                ["fc-match", "-f", "%{file}|%{index}", family],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                check=False,
+            ).stdout.strip()
+            path, _, idx = out.partition("|")
+            if path and Path(path).exists():
+                return path, int(idx or 0)
+        except (OSError, subprocess.SubprocessError, ValueError):
+            pass
+    return _scan_fonts().get(family.strip().lower())
+
+
+def _cache_dir() -> Optional[Path]:
+    raw = os.environ.get("FONT_METRICS_CACHE", "").strip()
+    if raw.lower() in {"0", "off", "false", "no"}:
+        return None
+    return Path(raw) if raw else _DEFAULT_DIR
+
+
+def _cache_file(path: str, index: int) -> Optional[Path]:
+    root = _cache_dir()
+    if root is None:
+        return None
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    digest = hashlib.sha1(f"{Path(path).resolve()}\0{index}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8"))
+    return root / f"{digest.hexdigest()[:20]}.json"
+
+
+def _save(metrics: FontMetrics) -> None:
+    target = _cache_file(metrics.path, metrics.index)
+    if target is None:
+        return
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(metrics.to_dict(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, target)
+    except OSError:
+        return
+
+
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=32)
+def load_font_metrics(family: str) -> Optional[FontMetrics]:
+    """
+    读取字体家族的宽度表：先查磁盘缓存，未命中时解析字体文件并写回缓存；找不到字体时返回 None
+    """
+    located = find_font_file(family)
+    if located is None:
+        return None
+    path, index = located
+    cached = _cache_file(path, index)
+    if cached is not None:
+        try:
+            return FontMetrics.from_dict(json.loads(cached.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError):
+            pass
+    try:
+        metrics = parse_font(path, index)
+    except (OSError, KeyError, struct.error):
+        return None
+    _save(metrics)
+    return metrics
+
+
+def measure_text(
+    text: str,
+    family: str,
+    font_size: float,
+    reference: Callable[[str, float], float],
+) -> Optional[float]:
+    """
+    用字体度量估算 Manim Text 的宽度（场景单位）
+    :param reference: 标定用的真实测量函数 (text, font_size) -> width，每个字体只调用一次，结果写入磁盘缓存
+    :return: 宽度；找不到字体或含字体外字符时返回 None
+    """
+    metrics = load_font_metrics(family)
+    if metrics is None:
+        return None
+    em = metrics.advance(text)
+    if em is None:
+        return None
+    scale = calibrated_scale(metrics, reference)
+    return None if scale is None else em * font_size * scale
+
+
+def calibrated_scale(metrics: FontMetrics, reference: Callable[[str, float], float]) -> Optional[float]:
+    """
+    1 em 在 font_size=1 时的场景宽度；首次调用时用 reference 标定一次并写入磁盘缓存
+    """
+    if metrics.scale is None:
+        with _lock:
+            if metrics.scale is None:
+                calib_em = metrics.advance(_CALIBRATION_TEXT)
+                if not calib_em:
+                    return None
+                metrics.scale = reference(_CALIBRATION_TEXT, _CALIBRATION_SIZE) / (calib_em * _CALIBRATION_SIZE)
+                _save(metrics)
+    return metrics.scale
+
+
+def measure_line_height(family: str, font_size: float, reference: Callable[[str, float], float]) -> Optional[float]:
+    """
+    单行文本的行高（场景单位），按 hhea 行高估算，略大于实际墨迹高度；字体缺少 hhea 行高时返回 None
+    """
+    metrics = load_font_metrics(family)
+    if metrics is None or metrics.line_height <= 0:
+        return None
+    scale = calibrated_scale(metrics, reference)
+    return None if scale is None else metrics.line_height * font_size * scale
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Optional, Sequence, Tuple
 
+from .text_fit import predict_text_extents
 from .theme import Constraints
 
 
@@ -23,6 +25,8 @@ class LayoutDecision:
     strategy: str
     font_scale: float
     max_lines: int
+    # 按实测宽高预测的、构建后仍会被 fit_text_to_box 缩小的行（仅 decide_layout_measured 填写）
+    predicted_overflow: Tuple[bool, ...] = ()
 
 
 def compute_metrics(texts: Iterable[str], line_count: int) -> LayoutMetrics:
@@ -55,3 +59,103 @@ def decide_layout(metrics: LayoutMetrics, constraints: Constraints) -> LayoutDec
     if metrics.total_chars < 140 and metrics.line_count <= max(2, constraints.max_lines - 1):
         return LayoutDecision(strategy="relaxed", font_scale=1.05, max_lines=constraints.max_lines)
     return LayoutDecision(strategy="standard", font_scale=1.0, max_lines=constraints.max_lines)
+
+
+# 由大到小尝试的字号缩放，与 decide_layout 的三档一致
+_CANDIDATES = (("relaxed", 1.05), ("standard", 1.0), ("compact", 0.9))
+
+
+def _fitting_lines(heights: Sequence[float], buff: float, max_height: float, cap: int) -> int:
+    # 任意连续 k 行（含行距）都放得下 max_height 的最大 k，至少为 1
+    best = 1
+    for k in range(2, cap + 1):
+        window = min(k, len(heights))
+        total = sum(heights[:window])
+        fits = total + buff * (window - 1) <= max_height
+        for i in range(window, len(heights)):
+            if not fits:
+                break
+            total += heights[i] - heights[i - window]
+            fits = total + buff * (window - 1) <= max_height
+        if not fits:
+            break
+        best = k
+    return best
+
+
+def decide_layout_measured(
+    lines: Sequence[str],
+    max_width: float,
+    max_height: float,
+    font: Optional[str],
+    font_size: float,
+    constraints: Constraints,
+    *,
+    line_spacing: float = 1.0,
+    line_max_height: float = 2.0,
+) -> LayoutDecision:
+    """
+    按预测的宽高一次确定步骤区的字号缩放与同屏行数：从 relaxed 到 compact 依次尝试，
+    取第一个使每行不需再缩小、且同屏 max_lines 行放得下的档位；都不满足时用 compact。
+    每行只在 font_size 下测量一次，各档按缩放线性换算，预测过程不构建文本对象
+    :param lines: 解题步骤文本
+    :param max_width: 单行最大宽度
+    :param max_height: 步骤列可用高度
+    :param font_size: 未乘档位缩放的字号（已含主题缩放）
+    :param line_max_height: 单行最大高度（SolutionLine 为 2）
+    """
+    buff = 0.25 * line_spacing
+    scales = [scale for _, scale in _CANDIDATES]
+    predicted = [
+        predict_text_extents(line, max_width, font, font_size, scales, min_font_size=constraints.min_font_size)
+        for line in lines
+    ]
+    decision = None
+    for index, (strategy, scale) in enumerate(_CANDIDATES):
+        extents = [per_line[index] for per_line in predicted]
+        overflow = tuple(
+            e.layout.overflow or e.width > max_width + 1e-6 or e.height > line_max_height + 1e-6 for e in extents
+        )
+        heights = [min(e.height, line_max_height) for e in extents]
+        max_lines = _fitting_lines(heights, buff, max_height, constraints.max_lines) if heights else constraints.max_lines
+        shrunk = any(e.layout.scale < 1.0 for e in extents)
+        decision = LayoutDecision(strategy=strategy, font_scale=scale, max_lines=max_lines, predicted_overflow=overflow)
+        if not any(overflow) and not shrunk and max_lines >= min(constraints.max_lines, len(lines)):
+            return decision
+    assert decision is not None
+    return decision
+
+
+@dataclass(frozen=True)
+class OverflowReport:
+    lines: int
+    predicted: int
+    actual: int
+    # 预测不缩放、实际仍被缩放（即仍发生了二次适配）
+    missed: int
+    # 预测会缩放、实际没有
+    false_alarms: int
+
+
+_overflow_lock = threading.Lock()
+_overflow_counts = [0, 0, 0, 0, 0]
+
+
+def record_overflow(predicted: bool, actual: bool) -> None:
+    with _overflow_lock:
+        _overflow_counts[0] += 1
+        _overflow_counts[1] += int(predicted)
+        _overflow_counts[2] += int(actual)
+        _overflow_counts[3] += int(actual and not predicted)
+        _overflow_counts[4] += int(predicted and not actual)
+
+
+def overflow_report(reset: bool = False) -> OverflowReport:
+    """
+    预测溢出与实际溢出的累计对比；reset=True 时读取后清零
+    """
+    with _overflow_lock:
+        report = OverflowReport(*_overflow_counts)
+        if reset:
+            _overflow_counts[:] = [0] * len(_overflow_counts)
+    return report
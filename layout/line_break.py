@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+# 最优断行（Knuth–Plass 思路的简化版）：在 token 序列的所有可断点上做一次动态规划，
+# 使全段“不良度”之和最小，而不是逐行贪心塞满。
+# 代价：每行 demerits = (1 + badness)²，badness = 100 × (剩余宽度 / 行宽)³，末行不计剩余；
+# 中文排版禁则：行首不放闭合标点（。，、；：？！）」』》” 等），行尾不放开启标点（（「『《“ 等），
+# 违反禁则与单 token 超宽只加大罚分而不是判为不可行，保证总有解。
+
+NO_LINE_START = set("。，、；：？！）」』》〉】〕”’…—,.;:?!)]}%")
+NO_LINE_END = set("（「『《〈【〔“‘([{")
+
+_FORBIDDEN_PENALTY = 1e7
+_OVERFULL_PENALTY = 1e8
+
+
+def _line_demerits(width: float, max_width: float, last: bool) -> float:
+    if last:
+        return 1.0
+    slack = max(0.0, max_width - width) / max_width
+    badness = 100.0 * slack ** 3
+    return (1.0 + badness) ** 2
+
+
+def break_lines(
+    texts: Sequence[str],
+    widths: Sequence[float],
+    spaces: Sequence[bool],
+    max_width: float,
+) -> List[Tuple[int, int]]:
+    """
+    计算最优断行
+    :param texts: token 文本
+    :param widths: token 宽度（与 max_width 同一单位）
+    :param spaces: token 是否为空白；行首空白丢弃、行尾空白不计宽度
+    :return: 每行的 token 区间 [start, end)，已跳过行首空白；空输入返回 []
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+    if max_width <= 0:
+        return [(0, n)]
+    prefix = [0.0]
+    for w in widths:
+        prefix.append(prefix[-1] + w)
+    inf = float("inf")
+    best = [inf] * (n + 1)
+    back = [0] * (n + 1)
+    best[0] = 0.0
+    for i in range(n):
+        if best[i] == inf:
+            continue
+        start = i
+        while start < n and spaces[start]:
+            start += 1
+        if start == n:
+            # 只剩空白：直接并入上一行
+            if best[i] < best[n]:
+                best[n] = best[i]
+                back[n] = i
+            continue
+        for j in range(start + 1, n + 1):
+            end = j
+            while end > start and spaces[end - 1]:
+                end -= 1
+            width = prefix[end] - prefix[start]
+            single = end - start <= 1
+            if width > max_width and not single:
+                break
+            cost = _line_demerits(width, max_width, j == n)
+            if width > max_width:
+                cost += _OVERFULL_PENALTY
+            if j < n:
+                nxt = texts[j]
+                prev = texts[j - 1]
+                if (nxt and nxt[0] in NO_LINE_START) or (prev and prev[-1] in NO_LINE_END):
+                    cost += _FORBIDDEN_PENALTY
+            total = best[i] + cost
+            if total < best[j]:
+                best[j] = total
+                back[j] = i
+    ranges: List[Tuple[int, int]] = []
+    j = n
+    while j > 0:
+        i = back[j]
+        start = i
+        while start < j and spaces[start]:
+            start += 1
+        if start < j:
+            ranges.append((start, j))
+        j = i
+    ranges.reverse()
+    return ranges
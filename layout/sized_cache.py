@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Set
+
+# 按字节计量的 LRU 缓存：每个条目按 sizeof(value) 记账，总量超过 max_bytes 时从最久未用的一端淘汰。
+# 条目会记下访问过它的作用域（场景里按子题设置），可以只淘汰某道子题独占的条目，
+# 同时统计命中 / 未命中 / 淘汰次数与各作用域的工作集大小。
+
+_ENTRY_OVERHEAD = 128
+
+_scope = threading.local()
+
+
+def current_scope() -> Optional[Hashable]:
+    return getattr(_scope, "value", None)
+
+
+@contextmanager
+def cache_scope(tag: Hashable) -> Iterator[None]:
+    """
+    在 with 块内访问的缓存条目都记到 tag 名下（可嵌套，退出时恢复外层作用域）
+    """
+    previous = current_scope()
+    _scope.value = tag
+    try:
+        yield
+    finally:
+        _scope.value = previous
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    scope_evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+    # 作用域 → {"entries", "bytes", "hits", "misses"}
+    scopes: Dict[Hashable, Dict[str, int]] = field(default_factory=dict)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    scopes: Set[Hashable] = field(default_factory=set)
+
+
+class SizedCache:
+    """
+    线程安全的字节计量 LRU
+    :param name: 统计输出用的名字
+    :param max_bytes: 字节上限；单个条目超过上限时不缓存
+    :param sizeof: 计算条目大小的函数（不含固定开销）
+    """
+
+    def __init__(self, name: str, max_bytes: int, sizeof: Callable[[Any], int]) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._scope_evictions = 0
+        self._scope_hits: Dict[Hashable, list[int]] = {}
+        self._lock = threading.RLock()
+
+    def _note(self, scope: Optional[Hashable], hit: bool) -> None:
+        if scope is None:
+            return
+        counters = self._scope_hits.setdefault(scope, [0, 0])
+        counters[0 if hit else 1] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        scope = current_scope()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                self._note(scope, False)
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._note(scope, True)
+            if scope is not None:
+                entry.scopes.add(scope)
+            return entry.value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value) + _ENTRY_OVERHEAD
+        scope = current_scope()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if size > self.max_bytes:
+                return
+            entry = _Entry(value=value, size=size)
+            if old is not None:
+                entry.scopes |= old.scopes
+            if scope is not None:
+                entry.scopes.add(scope)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def evict_scope(self, tag: Hashable) -> int:
+        """
+        淘汰只被 tag 作用域访问过的条目；被其他作用域共用的条目只去掉 tag，返回淘汰条数
+        """
+        with self._lock:
+            dropped = 0
+            for key in list(self._entries):
+                entry = self._entries[key]
+                if tag not in entry.scopes:
+                    continue
+                entry.scopes.discard(tag)
+                if not entry.scopes:
+                    del self._entries[key]
+                    self._bytes -= entry.size
+                    dropped += 1
+            self._scope_evictions += dropped
+            self._scope_hits.pop(tag, None)
+            return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._scope_hits.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            scopes: Dict[Hashable, Dict[str, int]] = {}
+            for entry in self._entries.values():
+                for tag in entry.scopes:
+                    row = scopes.setdefault(tag, {"entries": 0, "bytes": 0, "hits": 0, "misses": 0})
+                    row["entries"] += 1
+                    row["bytes"] += entry.size
+            for tag, (hits, misses) in self._scope_hits.items():
+                row = scopes.setdefault(tag, {"entries": 0, "bytes": 0, "hits": 0, "misses": 0})
+                row["hits"], row["misses"] = hits, misses
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                scope_evictions=self._scope_evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                scopes=scopes,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_MISSING = object()
+
+
+def sized_cache(cache: SizedCache) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    以位置参数元组为 key 的函数缓存装饰器；与 lru_cache 一样提供 cache_clear()，另可通过 .cache 取统计
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args: Any) -> Any:
+            value = cache.get(args, _MISSING)
+            if value is _MISSING:
+                value = func(*args)
+                cache.put(args, value)
+            return value
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
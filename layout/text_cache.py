@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import weakref
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import manim
+from manim import Mobject, VGroup, VMobject, config
+
+# 文本几何的持久化缓存（SQLite 单文件 KV）：
+# key = hash(模板版本, 渲染器, 字体, 字号, 文本)，value = 编译后 Text / MathTex 整棵子对象树的点数组与样式。
+# 命中时直接用点数组重建 VMobject 树，不再调用 Pango / LaTeX；
+# 模板版本包含 text_fit 源码、Manim 版本与 LaTeX 模板，任一变化旧条目自然失效。
+
+_DEFAULT_PATH = Path(__file__).resolve().parents[1] / ".cache" / "text_geometry.sqlite3"
+_SOURCE_FILES = ("text_fit.py", "text_cache.py")
+_MAGIC = b"TXG1"
+_HEADER = struct.Struct("<4sI")
+# 按属性名原样保存 / 恢复的样式（Cairo 渲染器下 VMobject 的实际着色数据）
+_ARRAY_STYLES = ("fill_rgbas", "stroke_rgbas", "background_stroke_rgbas")
+_SCALAR_STYLES = ("stroke_width", "background_stroke_width", "sheen_factor")
+
+_template_version: Optional[str] = None
+
+
+def template_version() -> str:
+    """
+    文本模板版本指纹：text_fit / text_cache 源码、Manim 版本与 LaTeX 模板正文的哈希
+    """
+    global _template_version
+    if _template_version is None:
+        digest = hashlib.sha1()
+        base = Path(__file__).resolve().parent
+        for name in _SOURCE_FILES:
+            try:
+                digest.update((base / name).read_bytes())
+            except OSError:
+                digest.update(name.encode("utf-8"))
+        digest.update(str(getattr(manim, "__version__", "")).encode("utf-8"))
+        try:
+            digest.update(config.tex_template.body.encode("utf-8"))
+        except AttributeError:
+            pass
+        _template_version = digest.hexdigest()[:16]
+    return _template_version
+
+
+def renderer_name() -> str:
+    renderer = config.renderer
+    return str(getattr(renderer, "value", renderer)).lower()
+
+
+def geometry_key(text: str, font: Optional[str], font_size: float, renderer: str) -> str:
+    payload = "\0".join((template_version(), renderer, font or "", repr(float(font_size)), text))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def encode_geometry(mobject: Mobject) -> bytes:
+    """
+    将 mobject 整棵子对象树（先序）编码为 头部 + JSON 节点表 + zlib 压缩的 float64 点数组
+    """
+    nodes: List[Dict[str, Any]] = []
+    points: List[np.ndarray] = []
+
+    def _visit(mob: Mobject, parent: int) -> None:
+        index = len(nodes)
+        pts = np.asarray(mob.points, dtype=np.float64).reshape(-1, 3)
+        node: Dict[str, Any] = {"parent": parent, "n": int(pts.shape[0]), "vector": isinstance(mob, VMobject)}
+        for name in _ARRAY_STYLES:
+            value = getattr(mob, name, None)
+            if value is not None:
+                node[name] = np.asarray(value, dtype=np.float64).tolist()
+        for name in _SCALAR_STYLES:
+            value = getattr(mob, name, None)
+            if isinstance(value, (int, float)):
+                node[name] = float(value)
+        nodes.append(node)
+        points.append(pts)
+        for sub in mob.submobjects:
+            _visit(sub, index)
+
+    _visit(mobject, -1)
+    meta = json.dumps(nodes, separators=(",", ":")).encode("utf-8")
+    body = zlib.compress(np.concatenate(points).astype("<f8").tobytes(), 6) if points else b""
+    return _HEADER.pack(_MAGIC, len(meta)) + meta + body
+
+
+class SharedPoints(np.ndarray):
+    """
+    只读共享点数组，写时复制：
+    - `mob.points -= v` 这类原地运算符返回新数组，由属性赋值落到该节点自己的数组上；
+    - 切片赋值、ufunc 的 out=、np.copyto 等原地写，第一次发生时把所属节点的点数组换成私有副本再写入。
+    写入后应通过 mob.points 重新取数组；提前取出的旧引用仍指向共享数据。
+    不属于任何节点、也不是由节点点数组切片得到的只读视图，原地写照常报只读错误
+    """
+
+    _owner: Optional["weakref.ReferenceType[Mobject]"] = None
+    _parent: Optional[tuple["SharedPoints", Any]] = None
+    _private: Optional[np.ndarray] = None
+
+    def __array_finalize__(self, obj: Any) -> None:
+        # 视图与运算结果不继承所属节点，切片视图的来源在 __getitem__ 中记录
+        self._owner = None
+        self._parent = None
+        self._private = None
+
+    def _detach(self) -> Optional[np.ndarray]:
+        # 返回本数组对应的可写私有数据；根数组同时替换所属节点的 points
+        if self._private is not None:
+            return self._private
+        if self._parent is not None:
+            parent, key = self._parent
+            base = parent._detach()
+            if base is None:
+                return None
+            self._private = base[key]
+            return self._private
+        owner = self._owner() if self._owner is not None else None
+        if owner is None:
+            return None
+        private = np.array(self)
+        if owner.points is self:
+            owner.points = private
+        self._private = private
+        return private
+
+    def __getitem__(self, key: Any) -> Any:
+        item = super().__getitem__(key)
+        if isinstance(item, SharedPoints) and not self.flags.writeable:
+            item._parent = (self, key)
+        return item
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        target = None if self.flags.writeable else self._detach()
+        if target is None:
+            super().__setitem__(key, value)
+        else:
+            target[key] = np.asarray(value)
+
+    def __array_ufunc__(self, ufunc: Any, method: str, *inputs: Any, **kwargs: Any) -> Any:
+        # 普通运算的结果是独立的新数组，不再带共享标记；out 指向共享数据时先换成私有副本
+        inputs = tuple(np.asarray(x) if isinstance(x, SharedPoints) else x for x in inputs)
+        out = kwargs.get("out")
+        if out:
+            kwargs["out"] = tuple(_writable(x) for x in out)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func: Any, types: Any, args: Any, kwargs: Any) -> Any:
+        if func is np.copyto and args:
+            args = (_writable(args[0]), *args[1:])
+        elif kwargs.get("out") is not None:
+            out = kwargs["out"]
+            kwargs = {**kwargs, "out": tuple(_writable(x) for x in out) if isinstance(out, tuple) else _writable(out)}
+        return super().__array_function__(func, types, args, kwargs)
+
+    def __iadd__(self, other: Any) -> np.ndarray:
+        return np.add(np.asarray(self), other)
+
+    def __isub__(self, other: Any) -> np.ndarray:
+        return np.subtract(np.asarray(self), other)
+
+    def __imul__(self, other: Any) -> np.ndarray:
+        return np.multiply(np.asarray(self), other)
+
+    def __itruediv__(self, other: Any) -> np.ndarray:
+        return np.true_divide(np.asarray(self), other)
+
+
+def _writable(array: Any) -> Any:
+    if isinstance(array, SharedPoints) and not array.flags.writeable:
+        private = array._detach()
+        if private is not None:
+            return private
+    return array
+
+
+def _shared_points(points: np.ndarray, owner: Mobject) -> np.ndarray:
+    # 每个节点一个独立的视图对象（共享同一块数据），写时复制据此找到要替换的节点
+    view = np.asarray(points).view(SharedPoints)
+    view.flags.writeable = False
+    view._owner = weakref.ref(owner)
+    return view
+
+
+def share_geometry(mobject: Mobject) -> Mobject:
+    """
+    写时复制的浅拷贝：重建子对象树（有子对象的节点为 VGroup），点数组以只读视图与原对象共享，
+    第一次平移 / 缩放 / 变形时才为被改动的节点分配新数组；着色数组很小，直接复制
+    """
+
+    def _clone(mob: Mobject) -> Mobject:
+        node: Mobject = VGroup() if mob.submobjects else VMobject()
+        if len(mob.points):
+            node.points = _shared_points(mob.points, node)
+        for name in _ARRAY_STYLES:
+            value = getattr(mob, name, None)
+            if value is not None:
+                setattr(node, name, np.array(value, dtype=np.float64))
+        for name in _SCALAR_STYLES:
+            value = getattr(mob, name, None)
+            if isinstance(value, (int, float)):
+                setattr(node, name, value)
+        node.z_index = getattr(mob, "z_index", 0)
+        node.submobjects = [_clone(sub) for sub in mob.submobjects]
+        return node
+
+    return _clone(mobject)
+
+
+def shared_copy(mobject: Mobject) -> Mobject:
+    """
+    缓存对象的对外副本：Cairo 渲染器下用 share_geometry 写时复制；
+    OpenGL 渲染器的着色数据与原地点变换与此不兼容，退回 Manim 深拷贝（TEXT_COW=0 时同样深拷贝）
+    """
+    disabled = os.environ.get("TEXT_COW", "1").strip().lower() in {"0", "off", "false", "no"}
+    if disabled or renderer_name() != "cairo":
+        return mobject.copy()
+    return share_geometry(mobject)
+
+
+def decode_geometry(blob: bytes) -> Mobject:
+    """
+    由 encode_geometry 的结果重建 VMobject 树（有子对象的节点为 VGroup），几何与样式与原对象一致
+    """
+    magic, meta_len = _HEADER.unpack_from(blob)
+    if magic != _MAGIC:
+        raise ValueError("not a text geometry blob")
+    offset = _HEADER.size
+    nodes = json.loads(blob[offset:offset + meta_len].decode("utf-8"))
+    raw = blob[offset + meta_len:]
+    flat = np.frombuffer(zlib.decompress(raw), dtype="<f8").reshape(-1, 3) if raw else np.zeros((0, 3))
+    has_children = {node["parent"] for node in nodes}
+    built: List[Mobject] = []
+    cursor = 0
+    for index, node in enumerate(nodes):
+        mob: Mobject = VGroup() if index in has_children else VMobject()
+        count = node["n"]
+        if count:
+            mob.points = flat[cursor:cursor + count].copy()
+        cursor += count
+        for name in _ARRAY_STYLES:
+            if name in node:
+                setattr(mob, name, np.array(node[name], dtype=np.float64).reshape(-1, 4))
+        for name in _SCALAR_STYLES:
+            if name in node:
+                setattr(mob, name, node[name])
+        if node["parent"] >= 0:
+            built[node["parent"]].submobjects.append(mob)
+        built.append(mob)
+    if not built:
+        raise ValueError("empty text geometry blob")
+    return built[0]
+
+
+class TextGeometryCache:
+    """
+    磁盘 SQLite 缓存；进程内的复用仍交给 text_fit 的内存缓存，多进程共享同一文件时依赖 SQLite 自身的锁
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geometry ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, blob BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error):
+            return None
+        self._conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT blob FROM geometry WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+        return None if row is None else bytes(row[0])
+
+    def put(self, key: str, blob: bytes) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geometry (key, version, blob, used) VALUES (?, ?, ?, ?)",
+                    (key, template_version(), sqlite3.Binary(blob), time.time()),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                return
+
+    def load(self, text: str, font: Optional[str], font_size: float) -> Optional[Mobject]:
+        blob = self.get(geometry_key(text, font, font_size, renderer_name()))
+        if blob is None:
+            return None
+        try:
+            return decode_geometry(blob)
+        except (ValueError, zlib.error, struct.error, KeyError, IndexError):
+            return None
+
+    def store(self, text: str, font: Optional[str], font_size: float, mobject: Mobject) -> None:
+        self.put(geometry_key(text, font, font_size, renderer_name()), encode_geometry(mobject))
+
+    def prune(self) -> int:
+        """
+        删除不属于当前模板版本的条目，返回删除条数
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            cur = conn.execute("DELETE FROM geometry WHERE version != ?", (template_version(),))
+            conn.commit()
+            return cur.rowcount
+
+
+_cache: Optional[TextGeometryCache] = None
+_cache_path: Optional[str] = None
+
+
+def get_text_geometry_cache() -> Optional[TextGeometryCache]:
+    """
+    按环境变量 TEXT_CACHE 返回共享缓存：未设置用默认路径，0/off/false 关闭；
+    点数组重建只针对 Cairo 渲染器，OpenGL 渲染器下不启用
+    """
+    global _cache, _cache_path
+    raw = os.environ.get("TEXT_CACHE", "").strip()
+    if raw.lower() in {"0", "off", "false", "no"}:
+        return None
+    if renderer_name() != "cairo":
+        return None
+    path = raw or str(_DEFAULT_PATH)
+    if _cache is None or _cache_path != path:
+        _cache = TextGeometryCache(Path(path))
+        _cache_path = path
+    return _cache
@@ -1,13 +1,18 @@
 ﻿from __future__ import annotations
 
 from dataclasses import dataclass
-from functools import lru_cache
+import os
 import re
-from typing import Optional
+from typing import Callable, Iterable, Optional, Sequence
 
 # 导入Manim核心组件：方向常量、基础图形对象、文本/LaTeX渲染组件
 from manim import LEFT, RIGHT, UP, DOWN, VGroup, Mobject, Text, MathTex
 
+from .font_metrics import calibrated_scale, load_font_metrics, measure_line_height, measure_text
+from .line_break import break_lines
+from .sized_cache import CacheStats, SizedCache, sized_cache
+from .text_cache import get_text_geometry_cache, shared_copy
+
 
 def _contains_cjk(text: str) -> bool:
     # 简单判断是否包含中日韩字符，避免整段中文被误判为 LaTeX
@@ -140,19 +145,88 @@ def _build_text_mobject(text: str, font: Optional[str], font_size: float) -> Mob
     return Text(text, font=font, font_size=font_size)
 
 
-@lru_cache(maxsize=512)
+# 预热阶段（template.prewarm）在进程池里算好的对象与宽度，首次访问时转入下面的缓存
+_seeded_mobjects: dict[tuple[str, Optional[str], float], Mobject] = {}
+_seeded_widths: dict[tuple[str, Optional[str], float], float] = {}
+
+
+def seed_text_cache(
+    mobjects: Iterable[tuple[str, Optional[str], float, Mobject]] = (),
+    widths: Iterable[tuple[str, Optional[str], float, float]] = (),
+) -> None:
+    """
+    注入预先构建好的文本对象与测量宽度
+    :param mobjects: (text, font, font_size, mobject) 列表
+    :param widths: (text, font, font_size, width) 列表，对应 _measure_text_width 的参数
+    """
+    for text, font, font_size, mobj in mobjects:
+        _seeded_mobjects[(text, font, font_size)] = mobj
+    for text, font, font_size, width in widths:
+        _seeded_widths[(text, font, font_size)] = width
+
+
+def _env_megabytes(name: str, default: float) -> int:
+    try:
+        return int(float(os.environ.get(name, str(default))) * 1024 * 1024)
+    except ValueError:
+        return int(default * 1024 * 1024)
+
+
+def _mobject_nbytes(mobj: Mobject) -> int:
+    # 按整棵子对象树的点数组与颜色数组计量
+    total = 0
+    for sub in mobj.get_family():
+        total += getattr(getattr(sub, "points", None), "nbytes", 0)
+        for name in ("fill_rgbas", "stroke_rgbas", "background_stroke_rgbas"):
+            total += getattr(getattr(sub, name, None), "nbytes", 0)
+    return total
+
+
+# 文本对象按点数组字节计量（TEXT_MOBJECT_CACHE_MB），宽度条目为定长小对象
+_mobject_cache = SizedCache("text_mobject", _env_megabytes("TEXT_MOBJECT_CACHE_MB", 256), _mobject_nbytes)
+_width_cache = SizedCache("text_width", _env_megabytes("TEXT_WIDTH_CACHE_MB", 8), lambda _: 0)
+_math_width_cache = SizedCache("math_width", _env_megabytes("TEXT_WIDTH_CACHE_MB", 8), lambda _: 0)
+
+
+@sized_cache(_mobject_cache)
 def _cached_text_mobject(text: str, font: Optional[str], font_size: float) -> Mobject:
-    return _build_text_mobject(text, font, font_size)
+    seeded = _seeded_mobjects.pop((text, font, font_size), None)
+    if seeded is not None:
+        return seeded
+    # 进程内未命中时先查磁盘几何缓存，命中则直接由点数组重建，跳过 Pango / LaTeX
+    disk = get_text_geometry_cache()
+    if disk is not None:
+        cached = disk.load(text, font, font_size)
+        if cached is not None:
+            return cached
+    mobj = _build_text_mobject(text, font, font_size)
+    if disk is not None:
+        disk.store(text, font, font_size, mobj)
+    return mobj
 
 
-@lru_cache(maxsize=4096)
+@sized_cache(_width_cache)
 def _measure_text_width(text: str, font: Optional[str], font_size: float) -> float:
     if not text:
         return 0.0
+    seeded = _seeded_widths.get((text, font, font_size))
+    if seeded is not None:
+        return seeded
+    # 普通文本优先用字体度量，避免为每个 token（中文为每个字）构建一次 Pango 对象；行内公式仍测真实 MathTex
+    if _metrics_enabled() and "$" not in text and not is_latex(text):
+        family = font or "Sans"
+        width = measure_text(text, family, font_size, _reference_width(family))
+        if width is not None:
+            return width
     return _cached_text_mobject(text, font, font_size).width
 
 
-@lru_cache(maxsize=4096)
+def _metrics_enabled() -> bool:
+    # TEXT_MEASURE=mobject 退回逐 token 构建 mobject 测量
+    return os.environ.get("TEXT_MEASURE", "metrics").strip().lower() != "mobject"
+
+
+@sized_cache(_math_width_cache)
 def _measure_math_width(text: str, font: Optional[str], font_size: float) -> float:
     if not text:
         return 0.0
@@ -185,31 +259,294 @@ def _token_width(token: _Token, font: Optional[str], font_size: float) -> float:
     return _measure_text_width(token.text, font, font_size)
 
 
+def _break_token_lines(
+    tokens: list[_Token], max_width: float, font: Optional[str], font_size: float
+) -> list[list[_Token]]:
+    widths = [_token_width(token, font, font_size) for token in tokens]
+    ranges = break_lines([t.text for t in tokens], widths, [t.is_space() for t in tokens], max_width)
+    return [tokens[start:end] for start, end in ranges]
+
+
 def _wrap_tokens_to_width(tokens: list[_Token], max_width: float, font: Optional[str], font_size: float) -> str:
     if not tokens:
         return ""
     if max_width <= 0:
         return _render_tokens(tokens)
-    lines: list[str] = []
-    buf: list[_Token] = []
-    buf_width = 0.0
-    for token in tokens:
-        if not buf and token.is_space():
-            continue
-        token_width = _token_width(token, font, font_size)
-        if buf and buf_width + token_width > max_width:
-            line = _render_tokens(buf)
-            if line or lines:
-                lines.append(line)
-            buf = []
-            buf_width = 0.0
-            if token.is_space():
+    return "\n".join(_render_tokens(line) for line in _break_token_lines(tokens, max_width, font, font_size))
+
+
+def _line_tokens(raw_line: str) -> Optional[list[_Token]]:
+    # 与 wrap_text_to_width 的分支一致：含 $ 的混排行、普通文本行可断；纯 LaTeX 行返回 None（整行不可断）
+    if "$" in raw_line:
+        return _tokenize_mixed_line(raw_line)
+    if is_latex(raw_line):
+        return None
+    return _tokenize_plain_segment(raw_line)
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    text: str                 # 已插入换行的文本
+    font_size: float          # 最终字号
+    scale: float              # 相对请求字号的缩放
+    breaks: tuple[tuple[int, ...], ...]  # 每个原始行内各输出行起点的 token 下标
+    line_count: int
+    overflow: bool            # 最小字号下仍超宽 / 超行数
+
+
+_Paragraph = tuple[Optional[list[_Token]], list[float], str]
+
+
+def layout_text(
+    text: str,
+    max_width: float,
+    font: Optional[str],
+    font_size: float,
+    *,
+    max_lines: Optional[int] = None,
+    min_font_size: Optional[float] = None,
+    step: float = 0.95,
+) -> TextLayout:
+    """
+    一次性确定断行与最终字号：token 宽度只在请求字号下测量一次（宽度与字号成正比），
+    按 step 逐级缩小字号，取第一个使所有行不超宽且行数不超过 max_lines 的缩放
+    :param max_lines: 行数上限，None 表示不限
+    :param min_font_size: 最小字号，缩到该字号仍放不下时按最小字号返回并标记 overflow
+    :return: TextLayout；组件按 text / font_size 只构建一次文本对象
+    """
+    paragraphs: list[_Paragraph] = []
+    for raw_line in text.split("\n") if text else []:
+        tokens = _line_tokens(raw_line) if raw_line else []
+        if tokens is None:
+            paragraphs.append((None, [_measure_text_width(raw_line, font, font_size)], raw_line))
+        else:
+            paragraphs.append((tokens, [_token_width(t, font, font_size) for t in tokens], raw_line))
+    laid, _ = _fit_paragraphs(paragraphs, max_width, font_size, max_lines=max_lines, min_font_size=min_font_size, step=step)
+    return laid
+
+
+def _fit_paragraphs(
+    paragraphs: list[_Paragraph],
+    max_width: float,
+    font_size: float,
+    *,
+    max_lines: Optional[int],
+    min_font_size: Optional[float],
+    step: float,
+) -> tuple[TextLayout, list[tuple[int, int, int]]]:
+    # 返回排版结果与每个输出行的 (段落下标, 起始 token, 去掉行尾空白后的结束 token)
+    floor = min(1.0, (min_font_size / font_size)) if min_font_size and font_size else 0.0
+    scale = 1.0
+    while True:
+        width = max_width / scale if max_width > 0 else 0.0
+        lines: list[str] = []
+        rows: list[tuple[int, int, int]] = []
+        breaks: list[tuple[int, ...]] = []
+        too_wide = False
+        for index, (tokens, widths, raw_line) in enumerate(paragraphs):
+            if not tokens:
+                lines.append(raw_line)
+                rows.append((index, 0, len(widths)))
+                breaks.append((0,))
+                too_wide = too_wide or (width > 0 and bool(widths) and widths[0] > width)
+                continue
+            ranges = break_lines([t.text for t in tokens], widths, [t.is_space() for t in tokens], width)
+            for start, end in ranges:
+                lines.append(_render_tokens(tokens[start:end]))
+                stop = end
+                while stop > start and tokens[stop - 1].is_space():
+                    stop -= 1
+                rows.append((index, start, stop))
+                too_wide = too_wide or (width > 0 and sum(widths[start:stop]) > width + 1e-9)
+            breaks.append(tuple(start for start, _ in ranges))
+        fits = not too_wide and (max_lines is None or len(lines) <= max_lines)
+        next_scale = scale * step
+        if fits or next_scale < floor or next_scale <= 0:
+            laid = TextLayout(
+                text="\n".join(lines),
+                font_size=font_size * scale,
+                scale=scale,
+                breaks=tuple(breaks),
+                line_count=len(lines),
+                overflow=not fits,
+            )
+            return laid, rows
+        scale = next_scale
+
+
+@dataclass(frozen=True)
+class TextExtent:
+    layout: TextLayout
+    width: float
+    height: float
+
+
+# 公式宽度估算（em）：\frac 取分子分母较宽者，上下标按 0.7 缩小，其余命令按一个符号宽度计
+_MATH_COMMAND = re.compile(r"\\([A-Za-z]+|.)")
+_MATH_FRACTIONS = {"frac", "dfrac", "tfrac"}
+_MATH_SPACES = {",": 0.17, ":": 0.22, ";": 0.28, "!": -0.17, " ": 0.25, "quad": 1.0, "qquad": 2.0}
+_MATH_FUNCTIONS = {"sin", "cos", "tan", "cot", "sec", "csc", "ln", "log", "exp", "lim", "max", "min", "arcsin", "arccos", "arctan"}
+# 只修饰后续参数、本身不占宽度的命令
+_MATH_MODIFIERS = {
+    "left", "right", "big", "Big", "bigg", "Bigg", "displaystyle", "textstyle",
+    "mathrm", "mathbf", "mathit", "text", "operatorname", "vec", "bar", "hat", "overline", "dot", "ddot",
+}
+_MATH_SYMBOL_EM = 0.6
+
+
+def _math_extent(expr: str, advance: Callable[[str], float]) -> tuple[float, int]:
+    """
+    估算 LaTeX 片段的宽度（em）与分式嵌套深度，不调用 LaTeX
+    :param advance: 单个字符的步进宽度（em）
+    """
+    pos = 0
+    n = len(expr)
+
+    def atom() -> tuple[float, int]:
+        nonlocal pos
+        if pos >= n:
+            return 0.0, 0
+        ch = expr[pos]
+        if ch == "{":
+            pos += 1
+            return run(True)
+        if ch == "\\":
+            match = _MATH_COMMAND.match(expr, pos)
+            if match is None:
+                pos += 1
+                return 0.0, 0
+            pos = match.end()
+            name = match.group(1)
+            if name in _MATH_FRACTIONS:
+                top, top_depth = atom()
+                bottom, bottom_depth = atom()
+                return max(top, bottom) + 0.2, max(top_depth, bottom_depth) + 1
+            if name == "sqrt":
+                inner, depth = atom()
+                return inner + 0.8, depth
+            if name in _MATH_SPACES:
+                return _MATH_SPACES[name], 0
+            if name in _MATH_FUNCTIONS:
+                return sum(advance(c) for c in name), 0
+            if name in _MATH_MODIFIERS:
+                return 0.0, 0
+            return _MATH_SYMBOL_EM, 0
+        pos += 1
+        if ch.isspace():
+            return 0.0, 0
+        return advance(ch), 0
+
+    def run(braced: bool) -> tuple[float, int]:
+        nonlocal pos
+        width = 0.0
+        depth = 0
+        while pos < n:
+            ch = expr[pos]
+            if ch == "}":
+                pos += 1
+                if braced:
+                    break
+                continue
+            if ch in "^_":
+                pos += 1
+                sub, sub_depth = atom()
+                width += 0.7 * sub
+                depth = max(depth, sub_depth)
                 continue
-        buf.append(token)
-        buf_width += token_width
-    if buf:
-        lines.append(_render_tokens(buf))
-    return "\n".join(lines)
+            part, part_depth = atom()
+            width += part
+            depth = max(depth, part_depth)
+        return width, depth
+
+    return run(False)
+
+
+def _reference_width(family: str) -> Callable[[str, float], float]:
+    # 字体度量的一次性标定：构建参考串的真实 Text 取宽度（结果写入磁盘缓存）
+    return lambda ref, size: _build_text_mobject(ref, family, size).width
+
+
+def _predicted_math(expr: str, font: Optional[str], font_size: float) -> tuple[float, float]:
+    # 返回 (宽度, 行高倍数)；字体度量不可用时宽度退回真实测量
+    family = font or "Sans"
+    metrics = load_font_metrics(family) if _metrics_enabled() else None
+
+    def advance(ch: str) -> float:
+        em = metrics.advance(ch) if metrics is not None else None
+        return _MATH_SYMBOL_EM if em is None else em
+
+    em, depth = _math_extent(expr, advance)
+    factor = (1.0 + 0.9 * depth) * (1 + expr.count("\\\\"))
+    scale = calibrated_scale(metrics, _reference_width(family)) if metrics is not None else None
+    if scale is None:
+        return _measure_math_width(expr, font, font_size), factor
+    return em * font_size * scale, factor
+
+
+def _predicted_line_height(font: Optional[str], font_size: float) -> float:
+    family = font or "Sans"
+    height = measure_line_height(family, font_size, _reference_width(family)) if _metrics_enabled() else None
+    if height is not None:
+        return height
+    # 字体度量不可用时每个字体构建一次参考行
+    ref = _line_heights.get(font)
+    if ref is None:
+        ref = _build_text_mobject(_LINE_REFERENCE, font, _LINE_REFERENCE_SIZE).height
+        _line_heights[font] = ref
+    return ref * font_size / _LINE_REFERENCE_SIZE
+
+
+# 字体 → 参考字号下的单行高度（仅在字体度量不可用时使用）
+_line_heights: dict[Optional[str], float] = {}
+_LINE_REFERENCE = "字Ag"
+_LINE_REFERENCE_SIZE = 48.0
+
+
+def predict_text_extents(
+    text: str,
+    max_width: float,
+    font: Optional[str],
+    font_size: float,
+    scales: Sequence[float],
+    *,
+    min_font_size: Optional[float] = None,
+) -> list[TextExtent]:
+    """
+    预测文本在若干字号缩放下排版后的宽高，不构建任何文本对象：
+    token 只在 font_size 下测量一次（普通文本取字体度量，公式按 LaTeX 结构估算），各档宽度按缩放线性换算，
+    断行与字号规则同 layout_text；行高取字体 hhea 行高，分式按嵌套层数加高（偏保守）
+    :param scales: 相对 font_size 的候选缩放
+    :return: 与 scales 一一对应的 TextExtent
+    """
+    paragraphs: list[_Paragraph] = []
+    factors: list[list[float]] = []
+    for raw_line in text.split("\n") if text else []:
+        tokens = _line_tokens(raw_line) if raw_line else []
+        if tokens is None:
+            width, factor = _predicted_math(_normalize_latex(raw_line), font, font_size)
+            paragraphs.append((None, [width], raw_line))
+            factors.append([factor])
+            continue
+        measured = [
+            _predicted_math(t.text, font, font_size) if t.is_math else (_measure_text_width(t.text, font, font_size), 1.0)
+            for t in tokens
+        ]
+        paragraphs.append((tokens, [w for w, _ in measured], raw_line))
+        factors.append([f for _, f in measured])
+    extents: list[TextExtent] = []
+    for scale in scales:
+        scaled = [(tokens, [w * scale for w in widths], raw_line) for tokens, widths, raw_line in paragraphs]
+        laid, rows = _fit_paragraphs(
+            scaled, max_width, font_size * scale, max_lines=None, min_font_size=min_font_size, step=0.95
+        )
+        line_height = _predicted_line_height(font, laid.font_size)
+        width = 0.0
+        height = 0.0
+        for index, start, stop in rows:
+            width = max(width, sum(scaled[index][1][start:stop]) * laid.scale)
+            height += line_height * max(factors[index][start:stop], default=1.0)
+        extents.append(TextExtent(layout=laid, width=width, height=height))
+    return extents
 
 
 def make_text_mobject(text: str, font: Optional[str] = None, font_size: float = 36) -> Mobject:
@@ -218,13 +555,30 @@ def make_text_mobject(text: str, font: Optional[str] = None, font_size: float =
     :param text: 待渲染的文本（普通文本或LaTeX公式）
     :param font: 字体名称（仅普通文本生效，None使用Manim默认字体）
     :param font_size: 文本字号（默认36）
-    :return: MathTex（LaTeX公式）或Text（普通文本）对象
+    :return: 与 MathTex（LaTeX公式）/ Text（普通文本）几何一致的对象，Cairo 渲染器下点数组写时复制
+    """
+    # 复用缓存对象；返回写时复制的浅拷贝（共享点数组，变换时才分配），避免多处 add 造成联动；OpenGL 下为深拷贝
+    return shared_copy(_cached_text_mobject(text, font, font_size))
+
+
+def text_cache_stats() -> dict[str, CacheStats]:
+    """
+    三个文本缓存（对象 / 文本宽度 / 公式宽度）的命中、淘汰与各作用域工作集统计
+    """
+    return {cache.name: cache.stats() for cache in (_mobject_cache, _width_cache, _math_width_cache)}
+
+
+def evict_text_scope(tag) -> int:
+    """
+    淘汰只在 tag 作用域（例如某道子题）中用过的文本缓存条目，其他子题共用的条目保留；返回淘汰条数
     """
-    # 复用缓存对象，再拷贝一份避免被多处 add 造成联动
-    return _cached_text_mobject(text, font, font_size).copy()
+    return sum(cache.evict_scope(tag) for cache in (_mobject_cache, _width_cache, _math_width_cache))
 
 
 def clear_text_cache() -> None:
+    _seeded_mobjects.clear()
+    _line_heights.clear()
+    _seeded_widths.clear()
     _cached_text_mobject.cache_clear()
     _measure_text_width.cache_clear()
     _measure_math_width.cache_clear()
@@ -7,13 +7,15 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from plan.exporter import dump_plan, load_plan
+from plan.exporter import PlanStreamWriter, dump_plan, load_plan
 from plan.narration import attach_narration
 from plan.schema import ProblemPlan, problem_from_dict
-from plan.validator import validate_plan
+from plan.validator import validate_plan, validate_question
 from plan.llm_solver import ZhipuLLMSolver
 from visuals.compiler import compile_plan_visuals
 from tts import config_from_env, synthesize_plan
+from tts.duration import load_duration_model, prediction_error, write_predicted_manifest
+from tts.mix import mix_and_mux
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,6 +34,16 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--tts", action="store_true", help="Generate TTS audio and align during render")
     parser.add_argument("--audio-dir", default="media/audio", help="Directory to store TTS audio")
     parser.add_argument("--audio-manifest", default=None, help="Use an existing audio manifest for rendering")
+    parser.add_argument(
+        "--tts-predict",
+        action="store_true",
+        help="With --tts: render with predicted narration durations while TTS runs, align audio when muxing",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the plan as NDJSON (one record per question) and start rendering before planning finishes",
+    )
     return parser.parse_args()
 
 
@@ -107,6 +119,8 @@ def main() -> int:
         solution_path.write_text(solution_text, encoding="utf-8")
 
     plan_dict = solver.format_json(problem_text, solution_text)
+    if args.stream:
+        return _run_streaming(solver, plan_dict, solution_text=solution_text, plan_path=plan_path, args=args)
     if _should_generate_visual(args):
         plan_dict = _attach_visuals(solver, plan_dict, solution_text=solution_text)
     plan = problem_from_dict(plan_dict)
@@ -114,24 +128,136 @@ def main() -> int:
     dump_plan(plan, plan_path)
     _validate_or_exit(plan, label=f"Plan ({plan_path.resolve()})")
 
-    audio_manifest = None
     if args.tts:
-        audio_manifest = synthesize_plan(plan, Path(args.audio_dir) / plan_path.stem, config_from_env())
-    return _render(plan_path, args.quality, args.renderer, args.out, str(audio_manifest) if audio_manifest else None)
+        return _render_with_tts(plan, plan_path, args)
+    return _render(plan_path, args.quality, args.renderer, args.out, None)
 
 
-def _render(plan_path: Path, quality: str, renderer: str, out: str | None, audio_manifest: str | None) -> int:
+def _run_streaming(
+    solver: ZhipuLLMSolver,
+    plan_dict: dict,
+    *,
+    solution_text: str,
+    plan_path: Path,
+    args: argparse.Namespace,
+) -> int:
+    # visual 规划整题一次完成后，逐题完成旁白 + 校验并立即写入 NDJSON；不开 TTS 时渲染进程同步启动，边规划边渲染
+    stream_path = plan_path.with_suffix(".ndjson")
+    question_texts = [q.get("question_text", "") for q in plan_dict.get("questions", []) if isinstance(q, dict)]
+    header = problem_from_dict({**plan_dict, "questions": [{"question_text": t} for t in question_texts]})
+    render_proc = None
+    questions = []
+    try:
+        with PlanStreamWriter(stream_path, header) as writer:
+            if not args.tts:
+                cmd, env = _render_command(stream_path, args.quality, args.renderer, args.out, None)
+                render_proc = subprocess.Popen(cmd, env=env)
+            if _should_generate_visual(args):
+                # visual 规划整题一次完成：LLM 需要跨子题的上下文，逐题调用也会成倍增加请求数
+                plan_dict = _attach_visuals(solver, plan_dict, solution_text=solution_text)
+            for q_dict in plan_dict.get("questions", []):
+                if not isinstance(q_dict, dict):
+                    continue
+                # 题号按实际写入流的顺序计，与 header 及最终 plan 中的子题一一对应
+                qi = len(questions) + 1
+                q_plan = problem_from_dict({**plan_dict, "questions": [q_dict]})
+                attach_narration(q_plan)
+                q = q_plan.questions[0]
+                errors = validate_question(q, qi)
+                if errors:
+                    details = "\n".join(f"- {err}" for err in errors)
+                    raise SystemExit(f"Plan ({stream_path.resolve()}) validation failed:\n{details}")
+                writer.write_question(q)
+                questions.append(q)
+                print(f"Q{qi} streamed to: {stream_path.resolve()}")
+
+        plan = ProblemPlan(problem_full_text=header.problem_full_text, stem=header.stem, questions=questions)
+        dump_plan(plan, plan_path)
+        _validate_or_exit(plan, label=f"Plan ({plan_path.resolve()})")
+    except BaseException:
+        # 规划 / 校验任一环节失败都结束渲染子进程：中途失败的流没有结束记录，子进程会一直等到 PLAN_STREAM_TIMEOUT
+        if render_proc is not None:
+            render_proc.terminate()
+        raise
+    if render_proc is not None:
+        return render_proc.wait()
+    return _render_with_tts(plan, plan_path, args)
+
+
+def _render_with_tts(plan: ProblemPlan, plan_path: Path, args: argparse.Namespace) -> int:
+    audio_dir = Path(args.audio_dir) / plan_path.stem
+    config = config_from_env()
+    if not (args.tts_predict and _premix_enabled()):
+        audio_manifest = synthesize_plan(plan, audio_dir, config, materialize=not _premix_enabled())
+        return _render(plan_path, args.quality, args.renderer, args.out, str(audio_manifest))
+
+    # 先用历史 manifest 标定的时长模型排时间轴并启动渲染，TTS 同时进行；混音时再按真实时长对齐
+    model = load_duration_model(Path(args.audio_dir))
+    predicted = write_predicted_manifest(
+        plan,
+        audio_dir / "manifest.predicted.json",
+        model,
+        sentence_pause=config.sentence_pause_s,
+        clause_pause=config.clause_pause_s,
+        chunking=config.chunking,
+    )
+    cmd, env = _render_command(plan_path, args.quality, args.renderer, args.out, str(predicted))
+    timeline = Path(env["AUDIO_TIMELINE"])
+    timeline.unlink(missing_ok=True)
+    render_proc = subprocess.Popen(cmd, env=env)
+    try:
+        audio_manifest = synthesize_plan(plan, audio_dir, config, materialize=False)
+    except BaseException:
+        render_proc.terminate()
+        raise
+    print(f"Duration prediction MAE: {prediction_error(predicted, audio_manifest):.3f}s per step")
+    return _mix_after_render(render_proc.wait(), audio_manifest, timeline, fit_slots=True)
+
+
+def _render_command(
+    plan_path: Path, quality: str, renderer: str, out: str | None, audio_manifest: str | None
+) -> tuple[list[str], dict[str, str]]:
     env = os.environ.copy()
     env["PLAN_PATH"] = str(plan_path.resolve())
     if audio_manifest:
         env["AUDIO_MANIFEST"] = str(Path(audio_manifest).resolve())
+        if _premix_enabled():
+            env["AUDIO_TIMELINE"] = str(_timeline_path(audio_manifest).resolve())
 
     cmd = ["manim", "--renderer", renderer, quality, "render/scene.py", "ProblemScene"]
     if not out:
         out = datetime.now().strftime("%Y%m%d_%H%M%S")
     cmd.extend(["-o", out])
+    return cmd, env
+
+
+def _premix_enabled() -> bool:
+    # AUDIO_PREMIX=0 退回 Manim 逐步 add_sound
+    return os.environ.get("AUDIO_PREMIX", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _timeline_path(audio_manifest: str | Path) -> Path:
+    return Path(audio_manifest).with_name("timeline.json")
+
+
+def _render(plan_path: Path, quality: str, renderer: str, out: str | None, audio_manifest: str | None) -> int:
+    cmd, env = _render_command(plan_path, quality, renderer, out, audio_manifest)
+    timeline = Path(env["AUDIO_TIMELINE"]) if "AUDIO_TIMELINE" in env else None
+    if timeline is not None:
+        timeline.unlink(missing_ok=True)
+    code = subprocess.call(cmd, env=env)
+    if timeline is None:
+        return code
+    return _mix_after_render(code, Path(audio_manifest), timeline)
+
 
-    return subprocess.call(cmd, env=env)
+def _mix_after_render(code: int, audio_manifest: Path, timeline: Path, *, fit_slots: bool = False) -> int:
+    # fit_slots 只在按预测时长渲染（--tts-predict）时打开；真实时长排出的时间轴不需要变速
+    if code == 0 and timeline.exists():
+        video = mix_and_mux(audio_manifest, timeline, fit_slots=fit_slots)
+        if video is not None:
+            print(f"Narration muxed into: {video.resolve()}")
+    return code
 
 
 def _should_generate_visual(args: argparse.Namespace) -> bool:
@@ -1,15 +1,16 @@
-﻿from .exporter import dump_plan, load_plan
+﻿from .exporter import PlanStreamWriter, dump_plan, iter_plan_stream, load_plan, load_plan_stream
 from .llm_solver import ZhipuConfig, ZhipuLLMSolver
 from .narration import attach_narration, build_narration
 from .parser import ParsedProblem, parse_stem_and_questions
 from .schema import AnalysisPoints, ProblemPlan, QuestionPlan, Step
 from .solver import NotImplementedSolver, PlanSolver
-from .validator import assert_valid, validate_plan
+from .validator import assert_valid, validate_plan, validate_question
 
 __all__ = [
     "AnalysisPoints",
     "NotImplementedSolver",
     "ParsedProblem",
+    "PlanStreamWriter",
     "PlanSolver",
     "ProblemPlan",
     "QuestionPlan",
@@ -20,7 +21,10 @@ __all__ = [
     "ZhipuLLMSolver",
     "assert_valid",
     "dump_plan",
+    "iter_plan_stream",
     "load_plan",
+    "load_plan_stream",
     "parse_stem_and_questions",
     "validate_plan",
+    "validate_question",
 ]
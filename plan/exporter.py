@@ -1,12 +1,20 @@
 ﻿import json
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional
 
 # 导入问题规划相关的模型和转换函数：
 # ProblemPlan：题目规划数据模型（核心业务对象）
 # problem_from_dict：字典转ProblemPlan对象（反序列化）
 # problem_to_dict：ProblemPlan对象转字典（序列化）
-from .schema import ProblemPlan, problem_from_dict, problem_to_dict
+from .schema import (
+    ProblemPlan,
+    QuestionPlan,
+    problem_from_dict,
+    problem_to_dict,
+    question_from_dict,
+    question_to_dict,
+)
 
 
 def load_plan(path: str | Path) -> ProblemPlan:
@@ -15,6 +23,9 @@ def load_plan(path: str | Path) -> ProblemPlan:
     :param path: JSON文件路径（支持字符串或Path对象）
     :return: 解析后的ProblemPlan业务对象（包含题目规划的所有信息）
     """
+    # 流式规划文件（.ndjson）按记录逐行组装
+    if is_plan_stream(path):
+        return load_plan_stream(path)
     # 1. 读取文件文本（UTF-8编码，兼容中文）并解析为JSON字典
     # 兼容带 BOM 的 UTF-8 文件（Windows 环境常见）
     data = json.loads(Path(path).read_text(encoding="utf-8-sig"))
@@ -37,3 +48,143 @@ def dump_plan(plan: ProblemPlan, path: str | Path) -> None:
         json.dumps(payload, ensure_ascii=False, indent=2),
         encoding="utf-8"
     )
+
+
+# ---------------------------------------------------------------------------
+# 流式规划（NDJSON）：一行一个记录，先写 header，再逐题写 question，最后写 end。
+# 渲染端可以在文件仍在增长时边读边播，从而让 LLM 延迟与渲染时间重叠。
+# ---------------------------------------------------------------------------
+
+PLAN_STREAM_FORMAT = "plan_stream_v1"
+PLAN_STREAM_SUFFIXES = {".ndjson", ".jsonl"}
+
+
+def is_plan_stream(path: str | Path) -> bool:
+    """
+    根据扩展名判断是否为流式规划文件（.ndjson / .jsonl）
+    """
+    return Path(path).suffix.lower() in PLAN_STREAM_SUFFIXES
+
+
+def _stream_header(plan: ProblemPlan) -> Dict[str, Any]:
+    # header 中带上全部子题文本，渲染端开场“完整题目”画面不必等待各题规划完成
+    return {
+        "type": "header",
+        "format": PLAN_STREAM_FORMAT,
+        "problem_full_text": plan.problem_full_text,
+        "stem": plan.stem,
+        "question_texts": [q.question_text for q in plan.questions],
+    }
+
+
+class PlanStreamWriter:
+    """
+    流式规划写入器：每完成一道子题就追加一行并立即 flush
+    用法：
+        with PlanStreamWriter(path, plan) as writer:
+            writer.write_question(q)
+    """
+
+    def __init__(self, path: str | Path, plan: ProblemPlan) -> None:
+        self.path = Path(path)
+        self._count = 0
+        self._fh = self.path.open("w", encoding="utf-8", newline="\n")
+        self._write_record(_stream_header(plan))
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        # 一条记录必须整行写出，读端只消费以换行结尾的完整行
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def write_question(self, q: QuestionPlan) -> None:
+        self._count += 1
+        self._write_record({"type": "question", "index": self._count, "question": question_to_dict(q)})
+
+    def close(self) -> None:
+        if self._fh.closed:
+            return
+        self._write_record({"type": "end", "question_count": self._count})
+        self._fh.close()
+
+    def __enter__(self) -> "PlanStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            # 出错时不写 end 记录，读端会按超时报错而不是把残缺规划当成完整规划
+            self._fh.close()
+            return
+        self.close()
+
+
+def iter_plan_stream(
+    path: str | Path,
+    *,
+    follow: bool = False,
+    poll_s: float = 0.2,
+    timeout_s: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取流式规划记录
+    :param path: NDJSON 文件路径
+    :param follow: True 时文件未写完（没有 end 记录）会继续等待新行，类似 tail -f
+    :param poll_s: follow 模式下的轮询间隔（秒）
+    :param timeout_s: follow 模式下连续多久没有新记录即报错（None 表示一直等待）
+    :return: 记录字典迭代器（header / question / end）
+    """
+    path = Path(path)
+    if follow:
+        waited = 0.0
+        while not path.exists():
+            if timeout_s is not None and waited >= timeout_s:
+                raise TimeoutError(f"Plan stream not found: {path}")
+            time.sleep(poll_s)
+            waited += poll_s
+    with path.open("r", encoding="utf-8-sig") as fh:
+        pending = ""
+        idle = 0.0
+        while True:
+            chunk = fh.readline()
+            if not chunk:
+                if not follow:
+                    break
+                if timeout_s is not None and idle >= timeout_s:
+                    raise TimeoutError(f"Plan stream stalled: {path}")
+                time.sleep(poll_s)
+                idle += poll_s
+                continue
+            pending += chunk
+            if not pending.endswith("\n"):
+                # 写端尚未写完这一行，等下一次读取补齐
+                continue
+            line, pending = pending.strip(), ""
+            idle = 0.0
+            if not line:
+                continue
+            record = json.loads(line)
+            yield record
+            if record.get("type") == "end":
+                return
+
+
+def plan_header_from_record(record: Dict[str, Any]) -> ProblemPlan:
+    """
+    将 header 记录转换为仅含子题文本的 ProblemPlan（供开场完整题目画面使用）
+    """
+    if record.get("type") != "header":
+        raise ValueError("Plan stream must start with a header record")
+    return ProblemPlan(
+        problem_full_text=str(record.get("problem_full_text", "")),
+        stem=str(record.get("stem", "")),
+        questions=[QuestionPlan(question_text=str(t)) for t in record.get("question_texts", [])],
+    )
+
+
+def load_plan_stream(path: str | Path) -> ProblemPlan:
+    """
+    读取完整的流式规划文件并组装为 ProblemPlan
+    """
+    records = iter_plan_stream(path)
+    header = plan_header_from_record(next(records, {}))
+    questions = [question_from_dict(r.get("question", {})) for r in records if r.get("type") == "question"]
+    return ProblemPlan(problem_full_text=header.problem_full_text, stem=header.stem, questions=questions)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import re
+from typing import Mapping, Optional, Union
+
+# LaTeX 片段 → 朗读文本：先分词，再按花括号建树，最后一次遍历输出。
+# 每个 token / 节点只处理一次，耗时与输入长度成线性关系（不再反复 sub 到不动点）。
+
+_PLAIN_RE = re.compile(r"[^\\{}^_]*")
+_TOKEN_RE = re.compile(r"\\[A-Za-z]+|\\.|\\|[{}^_]|[^\\{}^_]+", re.DOTALL)
+_BARE_ARG_RE = re.compile(r"\s*([+-]?[A-Za-z0-9.]+)")
+_DERIV_DEN_RE = re.compile(r"d\s*([a-zA-Z])")
+_PDERIV_DEN_RE = re.compile(r"\\partial\s*([a-zA-Z])")
+
+_SPACE_COMMANDS = {",", ";", ":", " ", "quad", "qquad", "\\", "enspace", "thinspace"}
+_SILENT_COMMANDS = {"left", "right", "!", "{", "}", "displaystyle", "limits", "nolimits", "big", "Big", "bigg", "Bigg"}
+_TRANSPARENT_COMMANDS = {
+    "mathrm",
+    "mathbf",
+    "mathit",
+    "mathcal",
+    "boldsymbol",
+    "text",
+    "textbf",
+    "operatorname",
+    "hat",
+    "bar",
+    "tilde",
+    "dot",
+    "ddot",
+    "underline",
+}
+_FRAC_COMMANDS = {"frac", "dfrac", "tfrac"}
+_VECTOR_COMMANDS = {"vec", "overrightarrow"}
+_LIMIT_COMMANDS = {"sum": "求和", "prod": "连乘"}
+
+
+class _Cmd:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class _Group:
+    __slots__ = ("children", "start", "end")
+
+    def __init__(self, start: int) -> None:
+        self.children: list[_Node] = []
+        self.start = start
+        self.end = start
+
+
+class _Script:
+    __slots__ = ("kind",)
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+
+
+_SUP = _Script("^")
+_SUB = _Script("_")
+_Node = Union[str, _Cmd, _Group, _Script]
+
+
+def parse_latex(fragment: str) -> _Group:
+    """
+    将 LaTeX 片段解析为花括号分组树（纯文本为 str，命令为 _Cmd，上下标为 _Script）
+    不匹配的右括号直接忽略，未闭合的左括号在末尾自动闭合。
+    """
+    root = _Group(0)
+    stack = [root]
+    for match in _TOKEN_RE.finditer(fragment):
+        tok = match.group(0)
+        if tok == "{":
+            group = _Group(match.end())
+            stack[-1].children.append(group)
+            stack.append(group)
+        elif tok == "}":
+            if len(stack) > 1:
+                stack.pop().end = match.start()
+        elif tok == "^":
+            stack[-1].children.append(_SUP)
+        elif tok == "_":
+            stack[-1].children.append(_SUB)
+        elif tok[0] == "\\":
+            stack[-1].children.append(_Cmd(tok[1:]))
+        else:
+            stack[-1].children.append(tok)
+    for group in stack[1:]:
+        group.end = len(fragment)
+    root.end = len(fragment)
+    return root
+
+
+def render_sum_prod(lower: str, upper: str, action: str) -> str:
+    lower = lower.strip()
+    upper = upper.strip()
+    if "=" in lower:
+        var, start = lower.split("=", 1)
+        var = var.strip()
+        start = start.strip()
+        if var and start and upper:
+            return f"对 {var} 从 {start} 到 {upper} {action}"
+    if lower and upper:
+        return f"对 {lower} 到 {upper} {action}"
+    if lower:
+        return f"对 {lower} {action}"
+    return action
+
+
+class _Renderer:
+    """
+    显式栈遍历分组树；命令通过向后查看兄弟节点取参数，深层嵌套也不会触发递归上限。
+    """
+
+    def __init__(self, source: str, words: Mapping[str, str]) -> None:
+        self.source = source
+        self.words = words
+
+    def render(self, node: _Node) -> str:
+        out: list[str] = []
+        work: list[_Node] = [node]
+        while work:
+            item = work.pop()
+            if isinstance(item, str):
+                out.append(item)
+            elif isinstance(item, _Group):
+                work.extend(reversed(self._expand(item.children)))
+            else:
+                work.extend(reversed(self._expand([item])))
+        return "".join(out)
+
+    def _take_arg(self, seq: list[_Node], i: int) -> tuple[Optional[_Node], int]:
+        # 取命令 / 上下标的一个参数：分组、命令，或文本的第一个非空字符
+        while i < len(seq):
+            item = seq[i]
+            if isinstance(item, str):
+                stripped = item.lstrip()
+                if not stripped:
+                    i += 1
+                    continue
+                if len(stripped) > 1:
+                    seq[i] = stripped[1:]
+                    return stripped[0], i
+                return stripped, i + 1
+            if isinstance(item, _Script):
+                return None, i
+            return item, i + 1
+        return None, i
+
+    def _take_script_arg(self, seq: list[_Node], i: int) -> tuple[Optional[_Node], int]:
+        # 上下标裸参数按“连续字母数字”整体读出（x^10、v_max），与旧实现的朗读习惯一致
+        if i < len(seq) and isinstance(seq[i], str):
+            match = _BARE_ARG_RE.match(seq[i])
+            if match:
+                rest = seq[i][match.end():]
+                if rest:
+                    seq[i] = rest
+                    return match.group(1), i
+                return match.group(1), i + 1
+        return self._take_arg(seq, i)
+
+    def _take_optional(self, seq: list[_Node], i: int) -> tuple[list[_Node], int]:
+        # \sqrt[n]{x} 的方括号可选参数可能跨多个兄弟节点
+        if i >= len(seq) or not isinstance(seq[i], str) or not seq[i].lstrip().startswith("["):
+            return [], i
+        first = seq[i].lstrip()[1:]
+        nodes: list[_Node] = []
+        pending: _Node = first
+        while True:
+            if isinstance(pending, str) and "]" in pending:
+                head, tail = pending.split("]", 1)
+                if head:
+                    nodes.append(head)
+                if tail:
+                    seq[i] = tail
+                    return nodes, i
+                return nodes, i + 1
+            if isinstance(pending, str):
+                if pending:
+                    nodes.append(pending)
+            else:
+                nodes.append(pending)
+            i += 1
+            if i >= len(seq):
+                return nodes, i
+            pending = seq[i]
+
+    def _source(self, node: Optional[_Node]) -> str:
+        if isinstance(node, _Group):
+            return self.source[node.start:node.end].strip()
+        if isinstance(node, str):
+            return node.strip()
+        if isinstance(node, _Cmd):
+            return "\\" + node.name
+        return ""
+
+    def _expand(self, seq: list[_Node]) -> list[_Node]:
+        out: list[_Node] = []
+        seq = list(seq)
+        i = 0
+        while i < len(seq):
+            item = seq[i]
+            i += 1
+            if isinstance(item, (str, _Group)):
+                out.append(item)
+                continue
+            if isinstance(item, _Script):
+                arg, i = self._take_script_arg(seq, i)
+                if arg is None:
+                    continue
+                if item is _SUP and isinstance(arg, _Cmd) and arg.name == "circ":
+                    out.append(" 度")
+                elif item is _SUP:
+                    out.extend((" 的 ", arg, " 次方"))
+                else:
+                    out.extend((" 下标 ", arg))
+                continue
+            name = item.name
+            if name in _SPACE_COMMANDS:
+                out.append(" ")
+            elif name in _SILENT_COMMANDS:
+                continue
+            elif name in _FRAC_COMMANDS:
+                num, i = self._take_arg(seq, i)
+                den, i = self._take_arg(seq, i)
+                num_src = self._source(num)
+                den_src = self._source(den)
+                deriv = _DERIV_DEN_RE.fullmatch(den_src) if num_src == "d" else None
+                pderiv = _PDERIV_DEN_RE.fullmatch(den_src) if num_src == "\\partial" else None
+                if deriv:
+                    out.append(f"对 {deriv.group(1)} 求导")
+                elif pderiv:
+                    out.append(f"对 {pderiv.group(1)} 偏导")
+                else:
+                    out.extend(n for n in (num, " 分之 ", den) if n is not None)
+            elif name == "sqrt":
+                index, i = self._take_optional(seq, i)
+                body, i = self._take_arg(seq, i)
+                if index:
+                    out.extend(index)
+                    out.append(" 次根号 ")
+                else:
+                    out.append("根号 ")
+                if body is not None:
+                    out.append(body)
+            elif name in _VECTOR_COMMANDS:
+                body, i = self._take_arg(seq, i)
+                out.append("向量 ")
+                if body is not None:
+                    out.append(body)
+            elif name in _TRANSPARENT_COMMANDS:
+                body, i = self._take_arg(seq, i)
+                if body is not None:
+                    out.append(body)
+            elif name in _LIMIT_COMMANDS:
+                lower: Optional[_Node] = None
+                upper: Optional[_Node] = None
+                while i < len(seq) and isinstance(seq[i], _Script):
+                    script = seq[i]
+                    arg, i = self._take_script_arg(seq, i + 1)
+                    if script is _SUB:
+                        lower = arg
+                    else:
+                        upper = arg
+                if lower is None and upper is None:
+                    out.append(self.words.get(name, name))
+                else:
+                    lower_text = self.render(lower) if lower is not None else ""
+                    upper_text = self.render(upper) if upper is not None else ""
+                    out.append(render_sum_prod(lower_text, upper_text, _LIMIT_COMMANDS[name]))
+            else:
+                out.append(self.words.get(name, name))
+        return out
+
+
+def latex_to_speech(fragment: str, words: Mapping[str, str]) -> str:
+    """
+    LaTeX 片段转朗读文本（不含运算符与负号的口语化，由调用方统一处理）
+    :param fragment: 不含 $ 的 LaTeX 片段
+    :param words: 命令名 → 读法（如 cdot → 乘、alpha → 阿尔法）
+    :return: 朗读文本
+    """
+    if not fragment or _PLAIN_RE.fullmatch(fragment):
+        return fragment
+    return _Renderer(fragment, words).render(parse_latex(fragment))
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import re
+from typing import Mapping, Optional
+
+
+class LiteralMatcher:
+    """
+    字面量词典匹配器（Aho-Corasick 自动机，leftmost-longest 语义）
+    一次线性扫描完成全部替换：从左到右取最先开始的匹配，同起点取最长的键，
+    匹配之间互不重叠。构建一次后可反复使用，适合上千条的发音词典。
+    """
+
+    __slots__ = ("_goto", "_fail", "_link", "_depth", "_value", "_first_re")
+
+    def __init__(self, table: Mapping[str, str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        depth = [0]
+        value: list[Optional[str]] = [None]
+        for key, replace in table.items():
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    value.append(None)
+                state = nxt
+            value[state] = str(replace)
+
+        # BFS 构建失败指针与输出链（link 指向最近的、本身是完整键的后缀状态）
+        fail = [0] * len(goto)
+        link = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                link[nxt] = fail[nxt] if value[fail[nxt]] is not None else link[fail[nxt]]
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._link = link
+        self._depth = depth
+        self._value = value
+        # 根状态下跳过不可能起始匹配的字符，交给 re 在 C 层完成
+        first = "".join(re.escape(ch) for ch in goto[0])
+        self._first_re = re.compile(f"[{first}]") if first else None
+
+    def __bool__(self) -> bool:
+        return self._first_re is not None
+
+    def replace(self, text: str, hits: Optional[set[str]] = None) -> str:
+        """
+        :param hits: 传入时收集本次实际替换的键
+        """
+        if not text or self._first_re is None:
+            return text
+        goto, fail, link, depth, value = self._goto, self._fail, self._link, self._depth, self._value
+        n = len(text)
+        parts: list[str] = []
+        emitted = 0
+        i = 0
+        state = 0
+        best_start = -1
+        best_end = -1
+        best_state = 0
+        while True:
+            if i >= n:
+                if best_state == 0:
+                    break
+                # 文本结束：提交挂起的匹配，并从匹配末尾继续扫描
+                parts.append(text[emitted:best_start])
+                parts.append(value[best_state])
+                if hits is not None:
+                    hits.add(text[best_start:best_end])
+                emitted = i = best_end
+                state = best_state = 0
+                continue
+            if state == 0:
+                found = self._first_re.search(text, i)
+                if found is None:
+                    i = n
+                    continue
+                i = found.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if value[state] is not None else link[state]
+            if hit:
+                start = i - depth[hit] + 1
+                if best_state == 0 or start <= best_start:
+                    best_start, best_end, best_state = start, i + 1, hit
+            if best_state and i - depth[state] + 1 > best_start:
+                # 之后不可能再出现起点 <= best_start 的匹配，提交并从匹配末尾重新开始
+                parts.append(text[emitted:best_start])
+                parts.append(value[best_state])
+                if hits is not None:
+                    hits.add(text[best_start:best_end])
+                emitted = i = best_end
+                state = best_state = 0
+                continue
+            i += 1
+        if not parts:
+            return text
+        parts.append(text[emitted:])
+        return "".join(parts)
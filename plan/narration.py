@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import hashlib
 import re
 import json
 import os
-from dataclasses import dataclass
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Optional
 
+from .latex_speech import latex_to_speech, render_sum_prod
+from .literal_matcher import LiteralMatcher
+from .narration_cache import get_narration_cache, make_key
 from .schema import ProblemPlan, Step
 
 
@@ -24,26 +30,58 @@ _LATEX_VEC_RE = re.compile(r"\\vec\{([^{}]+)\}")
 _LATEX_ARROW_RE = re.compile(r"\\overrightarrow\{([^{}]+)\}")
 _LATEX_DERIV_RE = re.compile(r"\\frac\{d\}\{d([a-zA-Z])\}")
 _LATEX_PDERIV_RE = re.compile(r"\\frac\{\\partial\}\{\\partial\s*([a-zA-Z])\}")
-_SUP_BRACE_RE = re.compile(r"\^\{([^{}]+)\}")
-_SUP_RE = re.compile(r"\^([A-Za-z0-9.+-]+)")
-_SUB_BRACE_RE = re.compile(r"_\{([^{}]+)\}")
-_SUB_RE = re.compile(r"_([A-Za-z0-9.+-]+)")
 _NEG_NUMBER_RE = re.compile(r"(?:(?<=^)|(?<=[=,(+\-*/\s]))-\s*([0-9]+(?:\.[0-9]+)?)")
 _PRIME_RE = re.compile(r"([A-Za-z])('+)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_LATEX_SPACING_RE = re.compile(r"\\(?:qquad|quad|left|right|[,;:])")
+_LATEX_MATHRM_RE = re.compile(r"\\mathrm\{([^{}]+)\}")
+_LATEX_MATHBF_RE = re.compile(r"\\mathbf\{([^{}]+)\}")
+_LATEX_TEXT_RE = re.compile(r"\\text\{([^{}]+)\}")
+_SCRIPT_RE = re.compile(
+    r"\^\{(?P<sup_brace>[^{}]+)\}"
+    r"|\^(?P<sup>[A-Za-z0-9.+-]+)"
+    r"|_\{(?P<sub_brace>[^{}]+)\}"
+    r"|_(?P<sub>[A-Za-z0-9.+-]+)"
+)
+_BARE_SCRIPT_RE = re.compile(r"\^(?P<sup>[A-Za-z0-9.+-]+)|_(?P<sub>[A-Za-z0-9.+-]+)")
 
 
 @dataclass(frozen=True)
 class _DictRule:
     pattern: re.Pattern
     replace: str
+    # 阶段 + 来源文件 + 序号 + 匹配条件，旁白缓存按它记录每条结果依赖的规则
+    rule_id: str = ""
 
 
 @dataclass(frozen=True)
 class _TtsDict:
-    raw_literal: dict[str, str]
+    raw_literal: LiteralMatcher
     raw_regex: list[_DictRule]
-    speech_literal: dict[str, str]
+    speech_literal: LiteralMatcher
     speech_regex: list[_DictRule]
+    source: str = ""
+
+
+@dataclass
+class _RuleTrace:
+    """
+    一次转换中实际生效的词典规则，以及各词典阶段先后见到的文本（用于判断新增规则是否会影响该条目）
+    """
+
+    rules: set[str] = field(default_factory=set)
+    texts: list[str] = field(default_factory=list)
+
+    def see(self, text: str) -> None:
+        if not self.texts or self.texts[-1] != text:
+            self.texts.append(text)
+
+    def probe(self) -> str:
+        return "\0".join(dict.fromkeys(self.texts))
+
+
+# 只在旁白缓存未命中、需要记录依赖时设置
+_rule_trace: ContextVar[Optional[_RuleTrace]] = ContextVar("narration_rule_trace", default=None)
 
 _LATEX_COMMANDS = {
     "cdot": "乘",
@@ -101,6 +139,29 @@ _LATEX_GREEK = {
 }
 
 
+# 命令与希腊字母合并为一个交替正则 + 查表替换，模块加载时编译一次
+_LATEX_WORDS = {**_LATEX_COMMANDS, **_LATEX_GREEK}
+_LATEX_WORD_RE = re.compile(
+    r"\\(" + "|".join(re.escape(cmd) for cmd in sorted(_LATEX_WORDS, key=len, reverse=True)) + r")\b"
+)
+
+# 单字符运算符一次 translate 完成（替换结果不含这些字符，与逐个 replace 等价）
+_OPERATOR_TABLE = str.maketrans(
+    {
+        "≥": " 大于等于 ",
+        "≤": " 小于等于 ",
+        "≠": " 不等于 ",
+        "≈": " 约等于 ",
+        "=": " 等于 ",
+        "+": " 加 ",
+        "-": " 减 ",
+        "*": " 乘 ",
+        "/": " 除以 ",
+    }
+)
+_RESIDUE_TABLE = str.maketrans({"{": None, "}": None, "\\": None})
+
+
 def _strip_step_prefix(text: str) -> str:
     return _STEP_PREFIX_RE.sub("", text).strip()
 
@@ -130,42 +191,64 @@ def _normalize_math_for_speech(text: str) -> str:
 
 
 def _normalize_spacing(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 
-def _apply_literal(text: str, literal: dict[str, str]) -> str:
+def _literal_rule_id(stage: str, source: str, key: str) -> str:
+    return f"{stage}:{source}:lit:{key}"
+
+
+def _apply_literal(text: str, literal: LiteralMatcher, prefix: str = "", trace: Optional[_RuleTrace] = None) -> str:
     if not literal:
         return text
-    for key in sorted(literal.keys(), key=len, reverse=True):
-        text = text.replace(key, literal[key])
+    if trace is None:
+        return literal.replace(text)
+    hits: set[str] = set()
+    text = literal.replace(text, hits)
+    trace.rules.update(f"{prefix}{key}" for key in hits)
+    trace.see(text)
     return text
 
 
-def _apply_rules(text: str, rules: list[_DictRule]) -> str:
+def _apply_rules(text: str, rules: list[_DictRule], trace: Optional[_RuleTrace] = None) -> str:
     if not rules:
         return text
     for rule in rules:
-        text = rule.pattern.sub(rule.replace, text)
+        if trace is None:
+            text = rule.pattern.sub(rule.replace, text)
+            continue
+        text, count = rule.pattern.subn(rule.replace, text)
+        if count:
+            trace.rules.add(rule.rule_id)
+            trace.see(text)
     return text
 
 
-def _apply_dicts_raw(text: str) -> str:
+def _apply_dicts(text: str, stage: str) -> str:
+    trace = _rule_trace.get()
+    if trace is not None:
+        trace.see(text)
     for d in _load_tts_dicts():
-        text = _apply_literal(text, d.raw_literal)
-        text = _apply_rules(text, d.raw_regex)
+        if stage == "raw":
+            text = _apply_literal(text, d.raw_literal, _literal_rule_id(stage, d.source, ""), trace)
+            text = _apply_rules(text, d.raw_regex, trace)
+        else:
+            text = _apply_literal(text, d.speech_literal, _literal_rule_id(stage, d.source, ""), trace)
+            text = _apply_rules(text, d.speech_regex, trace)
     return text
 
 
+def _apply_dicts_raw(text: str) -> str:
+    return _apply_dicts(text, "raw")
+
+
 def _apply_dicts_speech(text: str) -> str:
-    for d in _load_tts_dicts():
-        text = _apply_literal(text, d.speech_literal)
-        text = _apply_rules(text, d.speech_regex)
-    return text
+    return _apply_dicts(text, "speech")
 
 
-def _compile_rules(items: list[dict]) -> list[_DictRule]:
+def _compile_rules(items: list[dict], prefix: str = "") -> list[_DictRule]:
     rules: list[_DictRule] = []
-    for item in items or []:
+    for index, item in enumerate(items or []):
         pattern = item.get("pattern")
         if not pattern:
             continue
@@ -182,12 +265,30 @@ def _compile_rules(items: list[dict]) -> list[_DictRule]:
             compiled = re.compile(pattern, flags)
         except re.error:
             continue
-        rules.append(_DictRule(pattern=compiled, replace=replace))
+        rule_id = f"{prefix}re{index}:{flags}:{pattern}"
+        rules.append(_DictRule(pattern=compiled, replace=replace, rule_id=rule_id))
     return rules
 
 
-@lru_cache(maxsize=1)
-def _load_tts_dicts() -> list[_TtsDict]:
+@dataclass(frozen=True)
+class _TtsDictSet:
+    dicts: tuple[_TtsDict, ...]
+    fingerprint: str
+    # 规则 id → 替换文本，以及规则 id → 匹配判断；旁白缓存据此只失效受词典改动影响的条目
+    rules: dict[str, str] = field(default_factory=dict)
+    matchers: dict[str, Callable[[str], bool]] = field(default_factory=dict)
+
+    def touches(self, rule_id: str, probe: str) -> bool:
+        match = self.matchers.get(rule_id)
+        return match is not None and any(match(text) for text in probe.split("\0"))
+
+
+# 词典文件签名（路径 + mtime + 大小）最多每秒检查一次；环境变量变化则立即重新检查
+_DICT_CHECK_INTERVAL = 1.0
+_dict_signature_state: dict[str, object] = {"env": None, "checked": 0.0, "signature": None}
+
+
+def _dict_candidates() -> list[Path]:
     names = os.environ.get("TTS_DICTS", "math").strip()
     extra = os.environ.get("TTS_DICT_PATHS", "").strip()
     candidates: list[Path] = []
@@ -206,104 +307,186 @@ def _load_tts_dicts() -> list[_TtsDict]:
             raw = raw.strip()
             if raw:
                 candidates.append(Path(raw))
+    return candidates
 
+
+def _dict_signature() -> tuple:
+    env = (os.environ.get("TTS_DICTS"), os.environ.get("TTS_DICT_PATHS"))
+    now = time.monotonic()
+    state = _dict_signature_state
+    if state["env"] == env and state["signature"] is not None and now - float(state["checked"]) < _DICT_CHECK_INTERVAL:
+        return state["signature"]  # type: ignore[return-value]
+    signature = []
+    for path in _dict_candidates():
+        try:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((str(path), None, None))
+    state.update(env=env, checked=now, signature=tuple(signature))
+    return state["signature"]  # type: ignore[return-value]
+
+
+@lru_cache(maxsize=8)
+def _load_tts_dict_set(signature: tuple) -> _TtsDictSet:
     dicts: list[_TtsDict] = []
-    for path in candidates:
+    rules: dict[str, str] = {}
+    matchers: dict[str, Callable[[str], bool]] = {}
+    digest = hashlib.sha1()
+    for path_str, _, _ in signature:
         try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
+            data = Path(path_str).read_bytes()
+            payload = json.loads(data.decode("utf-8"))
         except Exception:
             continue
+        # 指纹只取内容哈希，touch 文件不会让缓存失效
+        digest.update(hashlib.sha1(data).digest())
+        source = Path(path_str).name
         raw = payload.get("raw", {}) if isinstance(payload, dict) else {}
         speech = payload.get("speech", {}) if isinstance(payload, dict) else {}
-        dicts.append(
-            _TtsDict(
-                raw_literal=dict(raw.get("literal", {}) or {}),
-                raw_regex=_compile_rules(list(raw.get("regex", []) or [])),
-                speech_literal=dict(speech.get("literal", {}) or {}),
-                speech_regex=_compile_rules(list(speech.get("regex", []) or [])),
-            )
+        d = _TtsDict(
+            raw_literal=LiteralMatcher(dict(raw.get("literal", {}) or {})),
+            raw_regex=_compile_rules(list(raw.get("regex", []) or []), f"raw:{source}:"),
+            speech_literal=LiteralMatcher(dict(speech.get("literal", {}) or {})),
+            speech_regex=_compile_rules(list(speech.get("regex", []) or []), f"speech:{source}:"),
+            source=source,
         )
-    return dicts
+        dicts.append(d)
+        for stage, table, compiled in (
+            ("raw", raw.get("literal", {}) or {}, d.raw_regex),
+            ("speech", speech.get("literal", {}) or {}, d.speech_regex),
+        ):
+            for key, replace in dict(table).items():
+                if key:
+                    rule_id = _literal_rule_id(stage, source, key)
+                    rules[rule_id] = str(replace)
+                    matchers[rule_id] = lambda text, key=key: key in text
+            for rule in compiled:
+                rules[rule.rule_id] = rule.replace
+                matchers[rule.rule_id] = lambda text, pattern=rule.pattern: pattern.search(text) is not None
+    return _TtsDictSet(dicts=tuple(dicts), fingerprint=digest.hexdigest()[:16], rules=rules, matchers=matchers)
+
+
+def _load_tts_dicts() -> tuple[_TtsDict, ...]:
+    return _load_tts_dict_set(_dict_signature()).dicts
 
 
 def _replace_math_operators(text: str) -> str:
     if not text:
         return text
     text = _NEG_NUMBER_RE.sub(r"负\1", text)
-    text = text.replace("≥", " 大于等于 ").replace("≤", " 小于等于 ")
-    text = text.replace("≠", " 不等于 ").replace("≈", " 约等于 ")
-    text = text.replace("=", " 等于 ")
-    text = text.replace("+", " 加 ")
-    text = text.replace("-", " 减 ")
-    text = text.replace("*", " 乘 ")
-    text = text.replace("/", " 除以 ")
+    return text.translate(_OPERATOR_TABLE)
+
+
+def _replace_spacing(match: re.Match) -> str:
+    return "" if match.group(0) in ("\\left", "\\right") else " "
+
+
+def _replace_word(match: re.Match) -> str:
+    return _LATEX_WORDS[match.group(1)]
+
+
+def _replace_script(match: re.Match) -> str:
+    # 花括号内的内容再做一次无花括号的上下标替换，等价于原先逐条 sub 的顺序效果
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind == "sup_brace":
+        return f" 的 {_BARE_SCRIPT_RE.sub(_replace_script, value)} 次方"
+    if kind == "sup":
+        return f" 的 {value} 次方"
+    if kind == "sub_brace":
+        return f" 下标 {_BARE_SCRIPT_RE.sub(_replace_script, value)}"
+    return f" 下标 {value}"
+
+
+def _replace_nested_roots(text: str) -> str:
+    # 每轮替换最内层的 frac/sqrt；无嵌套时只需一轮，不再额外跑一轮确认不动点
+    while "\\frac" in text or "\\sqrt" in text:
+        text, n_frac = _LATEX_FRAC_RE.subn(r"\1 分之 \2", text)
+        text, n_nroot = _LATEX_NROOT_RE.subn(r"\1 次根号 \2", text)
+        text, n_sqrt = _LATEX_SQRT_RE.subn(r"根号 \1", text)
+        if not (n_frac or n_nroot or n_sqrt):
+            break
     return text
 
 
-def _render_sum_prod(lower: str, upper: str, action: str) -> str:
-    lower = lower.strip()
-    upper = upper.strip()
-    if "=" in lower:
-        var, start = lower.split("=", 1)
-        var = var.strip()
-        start = start.strip()
-        if var and start and upper:
-            return f"对 {var} 从 {start} 到 {upper} {action}"
-    if lower and upper:
-        return f"对 {lower} 到 {upper} {action}"
-    if lower:
-        return f"对 {lower} {action}"
-    return action
+def _narration_engine() -> str:
+    return os.environ.get("NARRATION_ENGINE", "ast").strip().lower()
 
 
 def _latex_fragment_to_speech(fragment: str) -> str:
+    if not fragment:
+        return fragment
+    if _narration_engine() == "regex":
+        return _latex_fragment_to_speech_regex(fragment)
+    # 词典 raw 规则仍在解析前作用于原始 LaTeX，之后由语法树一次遍历输出
+    text = latex_to_speech(_apply_dicts_raw(fragment), _LATEX_WORDS)
+    text = _PRIME_RE.sub(lambda m: f"{m.group(1)} 的 {len(m.group(2))} 阶导", text)
+    text = _replace_math_operators(text)
+    return text.translate(_RESIDUE_TABLE)
+
+
+def _latex_fragment_to_speech_regex(fragment: str) -> str:
+    # 旧的逐条正则改写实现，保留用于对照基准（NARRATION_ENGINE=regex）
     if not fragment:
         return fragment
     text = _apply_dicts_raw(fragment)
-    text = text.replace("\\,", " ").replace("\\;", " ").replace("\\:", " ")
-    text = text.replace("\\quad", " ").replace("\\qquad", " ")
-    text = text.replace("\\left", "").replace("\\right", "")
-    text = re.sub(r"\\mathrm\{([^{}]+)\}", r"\1", text)
-    text = re.sub(r"\\mathbf\{([^{}]+)\}", r"\1", text)
-    text = re.sub(r"\\text\{([^{}]+)\}", r"\1", text)
-
-    text = _LATEX_DERIV_RE.sub(r"对 \1 求导", text)
-    text = _LATEX_PDERIV_RE.sub(r"对 \1 偏导", text)
-    text = _LATEX_SUM_RE.sub(lambda m: _render_sum_prod(m.group(1), m.group(2), "求和"), text)
-    text = _LATEX_SUM_RE_ALT.sub(lambda m: _render_sum_prod(m.group(2), m.group(1), "求和"), text)
-    text = _LATEX_PROD_RE.sub(lambda m: _render_sum_prod(m.group(1), m.group(2), "连乘"), text)
-    text = _LATEX_PROD_RE_ALT.sub(lambda m: _render_sum_prod(m.group(2), m.group(1), "连乘"), text)
-    text = _LATEX_VEC_RE.sub(r"向量 \1", text)
-    text = _LATEX_ARROW_RE.sub(r"向量 \1", text)
-
-    prev = None
-    while prev != text:
-        prev = text
-        text = _LATEX_FRAC_RE.sub(r"\1 分之 \2", text)
-        text = _LATEX_NROOT_RE.sub(r"\1 次根号 \2", text)
-        text = _LATEX_SQRT_RE.sub(r"根号 \1", text)
-
-    for cmd, speech in _LATEX_COMMANDS.items():
-        text = re.sub(rf"\\{cmd}\b", speech, text)
-    for cmd, speech in _LATEX_GREEK.items():
-        text = re.sub(rf"\\{cmd}\b", speech, text)
+    if "\\" in text:
+        text = _LATEX_SPACING_RE.sub(_replace_spacing, text)
+        text = _LATEX_MATHRM_RE.sub(r"\1", text)
+        text = _LATEX_MATHBF_RE.sub(r"\1", text)
+        text = _LATEX_TEXT_RE.sub(r"\1", text)
+
+        text = _LATEX_DERIV_RE.sub(r"对 \1 求导", text)
+        text = _LATEX_PDERIV_RE.sub(r"对 \1 偏导", text)
+        text = _LATEX_SUM_RE.sub(lambda m: render_sum_prod(m.group(1), m.group(2), "求和"), text)
+        text = _LATEX_SUM_RE_ALT.sub(lambda m: render_sum_prod(m.group(2), m.group(1), "求和"), text)
+        text = _LATEX_PROD_RE.sub(lambda m: render_sum_prod(m.group(1), m.group(2), "连乘"), text)
+        text = _LATEX_PROD_RE_ALT.sub(lambda m: render_sum_prod(m.group(2), m.group(1), "连乘"), text)
+        text = _LATEX_VEC_RE.sub(r"向量 \1", text)
+        text = _LATEX_ARROW_RE.sub(r"向量 \1", text)
+
+        text = _replace_nested_roots(text)
+        text = _LATEX_WORD_RE.sub(_replace_word, text)
 
     text = _PRIME_RE.sub(lambda m: f"{m.group(1)} 的 {len(m.group(2))} 阶导", text)
-    text = _SUP_BRACE_RE.sub(r" 的 \1 次方", text)
-    text = _SUP_RE.sub(r" 的 \1 次方", text)
-    text = _SUB_BRACE_RE.sub(r" 下标 \1", text)
-    text = _SUB_RE.sub(r" 下标 \1", text)
+    text = _SCRIPT_RE.sub(_replace_script, text)
 
     text = _replace_math_operators(text)
-    text = text.replace("{", "").replace("}", "")
-    text = text.replace("\\", "")
-    return text
+    return text.translate(_RESIDUE_TABLE)
+
+
+def narrate_text(text: str) -> str:
+    """
+    文本 → 朗读文本，结果按（原文, 转换引擎, 代码版本）写入持久化缓存；
+    key 直接取原文不做规范化，命中与否都和不走缓存的转换结果一致。
+    每条结果记下实际生效的词典规则，词典改动时只有依赖被改 / 删规则、或能被新增规则命中的条目失效
+    """
+    if not text:
+        return text
+    cache = get_narration_cache()
+    if cache is None:
+        return _normalize_math_for_speech(text)
+    dict_set = _load_tts_dict_set(_dict_signature())
+    cache.sync_rules(dict_set.fingerprint, dict_set.rules, dict_set.touches)
+    key = make_key(text, _narration_engine())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    trace = _RuleTrace()
+    token = _rule_trace.set(trace)
+    try:
+        speech = _normalize_math_for_speech(text)
+    finally:
+        _rule_trace.reset(token)
+    cache.put(key, speech, trace.rules, trace.probe())
+    return speech
 
 
 def build_narration(step: Step) -> str:
     base = step.subtitle.strip() if step.subtitle else step.line.strip()
     base = _strip_step_prefix(base)
-    return _normalize_math_for_speech(base)
+    return narrate_text(base)
 
 
 def attach_narration(plan: ProblemPlan) -> ProblemPlan:
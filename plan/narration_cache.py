@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Optional
+
+# 旁白文本的持久化缓存（SQLite 单文件 KV）：
+# key = hash(代码版本, 转换引擎, 输入原文)，value = 朗读文本 + 实际生效的词典规则 + 各词典阶段见到的文本。
+# 转换代码变化时 key 随之变化，旧条目自然失效；词典变化时按规则逐条比对（见 sync_rules），
+# 只删除依赖了被修改 / 删除规则的条目，以及新增规则能在其文本上命中的条目。
+
+_DEFAULT_PATH = Path(__file__).resolve().parents[1] / ".cache" / "narration.sqlite3"
+_MEMORY_LIMIT = 8192
+_DEFAULT_MAX_ENTRIES = 50000
+# 命中时的最近使用时间先记在内存里，攒够一批或关闭时再一次性写回，避免每次查询都提交事务
+_TOUCH_BATCH = 256
+_SOURCE_FILES = ("narration.py", "latex_speech.py", "literal_matcher.py")
+
+_code_version: Optional[str] = None
+
+
+def code_version() -> str:
+    """
+    旁白转换代码的版本指纹（相关源码内容的哈希），改动规则实现后旧缓存自动失效
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha1()
+        base = Path(__file__).resolve().parent
+        for name in _SOURCE_FILES:
+            try:
+                digest.update((base / name).read_bytes())
+            except OSError:
+                digest.update(name.encode("utf-8"))
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def make_key(text: str, engine: str) -> str:
+    payload = "\0".join((code_version(), engine, text))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class NarrationCache:
+    """
+    进程内字典 + 磁盘 SQLite 两级缓存；多进程共享同一文件时依赖 SQLite 自身的锁
+    """
+
+    def __init__(self, path: Path, max_entries: int = _DEFAULT_MAX_ENTRIES) -> None:
+        self.path = Path(path)
+        self.max_entries = max(0, int(max_entries))
+        self._memory: dict[str, str] = {}
+        self._touched: dict[str, float] = {}
+        self._fingerprint: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # 旧版按整套词典指纹分 key 的表
+            conn.execute("DROP TABLE IF EXISTS narration")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, speech TEXT NOT NULL, rules TEXT NOT NULL, probe TEXT NOT NULL, "
+                "used REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS rules (id TEXT PRIMARY KEY, replace TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.commit()
+        except sqlite3.Error:
+            return None
+        self._conn = conn
+        # 打开时按容量上限裁掉最久未用的条目
+        self._trim(conn)
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        hit = self._memory.get(key)
+        if hit is not None:
+            self._touch(key)
+            return hit
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT speech FROM entries WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        self._touch(key)
+        return row[0]
+
+    def put(self, key: str, speech: str, rules: Iterable[str] = (), probe: str = "") -> None:
+        """
+        :param rules: 本条结果实际生效的词典规则 id
+        :param probe: 各词典阶段见到的文本（\0 分隔），用于判断之后新增的规则是否会命中本条
+        """
+        self._remember(key, speech)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, speech, rules, probe, used) VALUES (?, ?, ?, ?, ?)",
+                    (key, speech, json.dumps(sorted(rules), ensure_ascii=False), probe, time.time()),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                return
+
+    def sync_rules(
+        self,
+        fingerprint: str,
+        rules: Mapping[str, str],
+        touches: Callable[[str, str], bool],
+    ) -> int:
+        """
+        词典变化后按规则失效条目；同时用不同词典组合的多个进程应各用一个缓存文件
+        :param fingerprint: 当前词典组合的内容指纹，与上次同步时相同则直接返回
+        :param rules: 当前全部规则 id → 替换文本
+        :param touches: touches(规则 id, 条目 probe) 判断该规则能否命中条目见过的文本
+        :return: 删除条数
+        """
+        if fingerprint == self._fingerprint:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+                if row is not None and row[0] == fingerprint:
+                    self._fingerprint = fingerprint
+                    return 0
+                old = dict(conn.execute("SELECT id, replace FROM rules").fetchall())
+                changed = {rule_id for rule_id, replace in old.items() if rules.get(rule_id) != replace}
+                added = [rule_id for rule_id in rules if rule_id not in old]
+                stale: list[tuple[str]] = []
+                if changed or added:
+                    for key, deps, probe in conn.execute("SELECT key, rules, probe FROM entries"):
+                        used = set(json.loads(deps))
+                        if used & changed or not used.issubset(rules) or any(touches(r, probe) for r in added):
+                            stale.append((key,))
+                conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+                conn.execute("DELETE FROM rules")
+                conn.executemany("INSERT INTO rules (id, replace) VALUES (?, ?)", list(rules.items()))
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('fingerprint', ?)", (fingerprint,))
+                conn.commit()
+            except (sqlite3.Error, ValueError):
+                return 0
+            if stale:
+                self._memory.clear()
+            self._fingerprint = fingerprint
+            return len(stale)
+
+    def prune(self) -> int:
+        """
+        按容量上限淘汰最久未用的条目，返回删除条数
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            self._flush_touches(conn)
+            return self._trim(conn)
+
+    def flush(self) -> None:
+        """
+        把内存中累积的最近使用时间写回磁盘
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches(self._conn)
+
+    def close(self) -> None:
+        with self._lock:
+            conn, self._conn = self._conn, None
+            if conn is None:
+                return
+            self._flush_touches(conn)
+            self._trim(conn)
+            conn.close()
+
+    def _touch(self, key: str) -> None:
+        self._touched[key] = time.time()
+        if len(self._touched) >= _TOUCH_BATCH:
+            self.flush()
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            conn.executemany("UPDATE entries SET used = ? WHERE key = ?", [(t, k) for k, t in touched.items()])
+            conn.commit()
+        except sqlite3.Error:
+            return
+
+    def _trim(self, conn: sqlite3.Connection) -> int:
+        if self.max_entries <= 0:
+            return 0
+        try:
+            cur = conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        except sqlite3.Error:
+            return 0
+        if cur.rowcount:
+            self._memory.clear()
+        return cur.rowcount
+
+    def _remember(self, key: str, speech: str) -> None:
+        if len(self._memory) >= _MEMORY_LIMIT:
+            self._memory.clear()
+        self._memory[key] = speech
+
+
+_cache: Optional[NarrationCache] = None
+_cache_path: Optional[str] = None
+
+
+def _max_entries() -> int:
+    raw = os.environ.get("NARRATION_CACHE_MAX_ENTRIES", "").strip()
+    try:
+        return int(raw) if raw else _DEFAULT_MAX_ENTRIES
+    except ValueError:
+        return _DEFAULT_MAX_ENTRIES
+
+
+def get_narration_cache() -> Optional[NarrationCache]:
+    """
+    按环境变量 NARRATION_CACHE 返回共享缓存：未设置用默认路径，0/off/false 关闭；
+    NARRATION_CACHE_MAX_ENTRIES 控制条目上限（默认 50000，0 表示不限），超出时淘汰最久未用的条目
+    """
+    global _cache, _cache_path
+    raw = os.environ.get("NARRATION_CACHE", "").strip()
+    if raw.lower() in {"0", "off", "false", "no"}:
+        return None
+    path = raw or str(_DEFAULT_PATH)
+    if _cache is None or _cache_path != path:
+        if _cache is not None:
+            _cache.close()
+        _cache = NarrationCache(Path(path), _max_entries())
+        _cache_path = path
+    return _cache
+
+
+def _close_cache() -> None:
+    if _cache is not None:
+        _cache.close()
+
+
+atexit.register(_close_cache)
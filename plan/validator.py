@@ -1,6 +1,6 @@
 ﻿from typing import List
 
-from .schema import ProblemPlan
+from .schema import ProblemPlan, QuestionPlan
 
 
 class PlanValidationError(Exception):
@@ -17,16 +17,22 @@ def validate_plan(plan: ProblemPlan) -> List[str]:
         errors.append("questions is empty")
 
     for qi, q in enumerate(plan.questions, start=1):
-        if not q.question_text.strip():
-            errors.append(f"Q{qi}: question_text is empty")
-        if not q.steps:
-            errors.append(f"Q{qi}: steps is empty")
-        for si, step in enumerate(q.steps, start=1):
-            if not step.line.strip():
-                errors.append(f"Q{qi} step {si}: line is empty")
-            if not step.subtitle.strip():
-                errors.append(f"Q{qi} step {si}: subtitle is empty")
+        errors.extend(validate_question(q, qi))
+
+    return errors
+
 
+def validate_question(q: QuestionPlan, qi: int) -> List[str]:
+    errors: List[str] = []
+    if not q.question_text.strip():
+        errors.append(f"Q{qi}: question_text is empty")
+    if not q.steps:
+        errors.append(f"Q{qi}: steps is empty")
+    for si, step in enumerate(q.steps, start=1):
+        if not step.line.strip():
+            errors.append(f"Q{qi} step {si}: line is empty")
+        if not step.subtitle.strip():
+            errors.append(f"Q{qi} step {si}: subtitle is empty")
     return errors
 
 
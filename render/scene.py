@@ -7,16 +7,45 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from plan.exporter import load_plan
-from plan.validator import validate_plan
+from plan.exporter import is_plan_stream, iter_plan_stream, load_plan, plan_header_from_record
+from plan.schema import question_from_dict
+from plan.validator import validate_plan, validate_question
 from template.flow import ProblemSceneBase
 
 
+def _stream_timeout() -> float | None:
+    raw = os.environ.get("PLAN_STREAM_TIMEOUT", "600").strip()
+    try:
+        value = float(raw)
+    except ValueError:
+        return 600.0
+    return value if value > 0 else None
+
+
+def _iter_stream_questions(records):
+    for record in records:
+        if record.get("type") != "question":
+            continue
+        qi = int(record.get("index", 0))
+        q = question_from_dict(record.get("question", {}))
+        errors = validate_question(q, qi)
+        if errors:
+            details = "\n".join(f"- {err}" for err in errors)
+            raise RuntimeError(f"Plan validation failed:\n{details}")
+        yield q
+
+
 class ProblemScene(ProblemSceneBase):
     def construct(self) -> None:
         plan_path = os.environ.get("PLAN_PATH")
         if not plan_path:
             raise RuntimeError("PLAN_PATH is not set")
+        if is_plan_stream(plan_path):
+            # 流式规划：边读边渲染，文件仍在增长时等待后续子题
+            records = iter_plan_stream(plan_path, follow=True, timeout_s=_stream_timeout())
+            header = plan_header_from_record(next(records, {}))
+            self.play_problem_stream(header, _iter_stream_questions(records))
+            return
         plan = load_plan(plan_path)
         errors = validate_plan(plan)
         if errors:
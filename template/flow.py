@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 import json
 import os
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable
 
 import numpy as np
 import math
@@ -31,21 +31,31 @@ from manim import (
 from layout import (
     AnalysisPanel,
     Constraints,
+    LayoutDecision,
     PinnedHeader,
     SolutionLine,
     Subtitle,
     Theme,
+    ColumnPlan,
     clear_text_cache,
     apply_overrides,
+    cache_scope,
     compute_metrics,
+    evict_text_scope,
     decide_layout,
+    decide_layout_measured,
     fit_text_to_box,
     make_full_problem,
     make_text_mobject,
+    overflow_report,
+    plan_solution_column,
+    record_overflow,
+    text_cache_stats,
 )
-from plan import ProblemPlan
+from plan import ProblemPlan, QuestionPlan
 from plan.schema import StepVisual
 from layout.text_fit import wrap_text_to_char_limit, wrap_text_to_width
+from .latex_batch import precompile_math, precompile_plan_math, question_math_fragments
 from .visuals import build_visual_with_dict, apply_visual_transform
 
 
@@ -83,15 +93,24 @@ def _load_audio_manifest() -> dict[tuple[int, int], dict[str, object]]:
             duration = float(entry.get("duration", 0.0))
         except Exception:
             continue
-        if not rel:
+        full_path: Optional[Path] = None
+        if rel:
+            full_path = Path(rel)
+            if not full_path.is_absolute():
+                full_path = (base_dir / full_path).resolve()
+        elif not entry.get("predicted"):
             continue
-        full_path = Path(rel)
-        if not full_path.is_absolute():
-            full_path = (base_dir / full_path).resolve()
+        # 预测 manifest（tts.duration）只有时长没有音频，混音阶段再按真实 manifest 对齐
         audio_map[(qi, si)] = {"path": full_path, "duration": duration}
     return audio_map
 
 
+def _audio_timeline_path() -> Optional[Path]:
+    # 设置后不再逐步 add_sound，只记录每步旁白在时间轴上的起点，由 tts.mix 在渲染后统一混音并封装
+    raw = os.environ.get("AUDIO_TIMELINE", "").strip()
+    return Path(raw) if raw else None
+
+
 def _analysis_weight(items: list[str]) -> float:
     if not items:
         return 1.0
@@ -158,6 +177,66 @@ def _build_full_problem_columns(
     return group
 
 
+def _report_text_cache() -> None:
+    # TEXT_CACHE_STATS=1 时在渲染结束打印文本缓存的命中率、淘汰次数与各子题工作集
+    if os.environ.get("TEXT_CACHE_STATS", "").strip().lower() not in {"1", "true", "yes", "on"}:
+        return
+    for name, stats in text_cache_stats().items():
+        print(
+            f"[text-cache] {name}: hits={stats.hits} misses={stats.misses} hit_rate={stats.hit_rate():.1%} "
+            f"evictions={stats.evictions} scope_evictions={stats.scope_evictions} "
+            f"entries={stats.entries} bytes={stats.bytes}"
+        )
+        for tag, row in sorted(stats.scopes.items(), key=lambda item: str(item[0])):
+            print(f"[text-cache]   Q{tag}: entries={row['entries']} bytes={row['bytes']} hits={row['hits']} misses={row['misses']}")
+
+
+def _report_layout_overflow() -> None:
+    # LAYOUT_STATS=1 时打印步骤行的预测溢出与实际溢出（实际溢出即构建后仍需缩放）
+    if os.environ.get("LAYOUT_STATS", "").strip().lower() not in {"1", "true", "yes", "on"}:
+        return
+    report = overflow_report(reset=True)
+    print(
+        f"[layout] lines={report.lines} predicted_overflow={report.predicted} actual_overflow={report.actual} "
+        f"missed={report.missed} false_alarms={report.false_alarms}"
+    )
+
+
+def _step_theme(
+    q: QuestionPlan, theme: Theme, constraints: Constraints, max_width: float, max_height: float
+) -> tuple[Theme, LayoutDecision]:
+    # 解题步骤区的主题：按实测的行宽行高决定字号缩放与同屏行数，write_steps 与预热阶段共用；
+    # LAYOUT_DECISION=heuristic 退回按字符数估算
+    if os.environ.get("LAYOUT_DECISION", "").strip().lower() == "heuristic":
+        texts = [q.question_text]
+        texts.extend(q.analysis.formulas)
+        texts.extend(q.analysis.conditions)
+        texts.extend(q.analysis.strategy)
+        texts.extend([s.line for s in q.steps])
+        texts.extend([s.subtitle for s in q.steps])
+        metrics = compute_metrics(texts, line_count=len(q.steps))
+        decision = decide_layout(metrics, constraints)
+    else:
+        decision = decide_layout_measured(
+            [s.line for s in q.steps],
+            max_width,
+            max_height,
+            theme.font,
+            34 * theme.font_size_scale,
+            constraints,
+            line_spacing=theme.line_spacing,
+        )
+    step_theme = Theme(
+        font=theme.font,
+        font_size_scale=theme.font_size_scale * decision.font_scale,
+        line_spacing=theme.line_spacing,
+        panel_padding=theme.panel_padding,
+        subtitle_bg_opacity=theme.subtitle_bg_opacity,
+        accent_color=theme.accent_color,
+    )
+    return step_theme, decision
+
+
 @dataclass
 class LayoutConfig:
     header_width_ratio: float = 0.55
@@ -191,6 +270,62 @@ class LayoutConfig:
     full_problem_max_height_ratio: float = 0.33
 
 
+
+@dataclass(frozen=True)
+class StepTiming:
+    line: float
+    subtitle: float
+    lead: float
+    wait: float
+
+
+def step_timing(layout: LayoutConfig, audio: Optional[dict[str, object]]) -> StepTiming:
+    """
+    单步时间轴：有旁白时按音频时长在 [anim_min_scale, anim_max_scale] 内伸缩写行 / 字幕动画，余量用 wait 补齐
+    """
+    base_line = layout.line_anim_time
+    base_sub = layout.subtitle_anim_time
+    line_time = base_line
+    sub_time = base_sub
+    audio_lead = max(0.0, layout.audio_lead)
+    if not audio:
+        return StepTiming(line=line_time, subtitle=sub_time, lead=audio_lead, wait=layout.audio_min_wait)
+    target = max(layout.audio_min_wait, float(audio["duration"]) + layout.audio_tail)
+    non_wait = base_line + base_sub + audio_lead
+    if non_wait > 0:
+        if target < non_wait:
+            scale = max(layout.anim_min_scale, target / non_wait)
+            line_time = base_line * scale
+            sub_time = base_sub * scale
+            non_wait = line_time + sub_time + audio_lead
+        elif target > non_wait:
+            scale = min(layout.anim_max_scale, target / non_wait)
+            if scale > 1:
+                line_time = base_line * scale
+                sub_time = base_sub * scale
+                non_wait = line_time + sub_time + audio_lead
+    return StepTiming(line=line_time, subtitle=sub_time, lead=audio_lead, wait=max(layout.audio_min_wait, target - non_wait))
+
+
+def _write_storyboard(q_index: int, column: ColumnPlan, timings: list[StepTiming]) -> None:
+    # STORYBOARD_DIR 设置时导出每道子题的步骤列布局与时间轴，供分镜预览直接读取而不必渲染
+    raw = os.environ.get("STORYBOARD_DIR", "").strip()
+    if not raw:
+        return
+    out_dir = Path(raw)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "format": "storyboard_steps_v1",
+        "q": q_index,
+        "column": column.to_dict(),
+        "timing": [
+            {"line": round(t.line, 6), "subtitle": round(t.subtitle, 6), "lead": round(t.lead, 6), "wait": round(t.wait, 6)}
+            for t in timings
+        ],
+    }
+    (out_dir / f"q{q_index}_steps.json").write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
 class ProblemSceneBase(Scene):
     def __init__(self, renderer=None, layout: Optional[LayoutConfig] = None, **kwargs) -> None:
         # Manim instantiates SceneClass(renderer) positionally; accept it here.
@@ -205,6 +340,8 @@ class ProblemSceneBase(Scene):
         self._visual_mobject_dict: Dict[str, Mobject] = {}  # 存储 visual 中各个 id 对应的 mobject
         self._debug_group: Optional[VGroup] = None
         self._audio_map = _load_audio_manifest()
+        self._audio_timeline = _audio_timeline_path()
+        self._audio_events: list[dict[str, object]] = []
         self.layout.line_anim_time = _read_float_env("LINE_ANIM_TIME", self.layout.line_anim_time)
         self.layout.subtitle_anim_time = _read_float_env("SUBTITLE_ANIM_TIME", self.layout.subtitle_anim_time)
         self.layout.audio_lead = _read_float_env("AUDIO_LEAD", self.layout.audio_lead)
@@ -221,17 +358,45 @@ class ProblemSceneBase(Scene):
             return config.frame_width, config.frame_height
 
     def play_problem(self, plan: ProblemPlan) -> None:
-        self.show_full_problem(plan)
-        for qi, q in enumerate(plan.questions, start=1):
-            self.pin_header(plan.stem, q.question_text, q.layout_overrides)
-            self._hide_visual()
-            self.show_analysis(q)
-            self.clear_analysis()
-            self.show_visual(q)
-            self.write_steps(q, qi)
-            self.transition_to_next_question()
+        self.play_problem_stream(plan, plan.questions)
+
+    def play_problem_stream(self, header: ProblemPlan, questions: Iterable[QuestionPlan]) -> None:
+        # header 只需题干与子题文本；questions 可以是仍在增长的流式规划迭代器
+        # 动画开始前并行编译 header 中已知的全部公式（完整 plan 即全部子题）
+        precompile_plan_math(header)
+        self._prewarm_text(header)
+        self.show_full_problem(header)
+        for qi, q in enumerate(questions, start=1):
+            with cache_scope(qi):
+                self.play_question(header.stem, q, qi)
+            # 保留上一题与本题共用的条目（题干、套话等），只淘汰上一题独占的文本
+            evict_text_scope(qi - 1)
+        _report_text_cache()
+        _report_layout_overflow()
         clear_text_cache()
 
+    def play_question(self, stem: str, q: QuestionPlan, q_index: int) -> None:
+        # 流式渲染时逐题预编译；整份 plan 已编译过的片段直接跳过
+        precompile_math(question_math_fragments(q))
+        self._prewarm_text(None, stem, q)
+        self.pin_header(stem, q.question_text, q.layout_overrides)
+        self._hide_visual()
+        self.show_analysis(q)
+        self.clear_analysis()
+        self.show_visual(q)
+        self.write_steps(q, q_index)
+        self.transition_to_next_question()
+
+    def _prewarm_text(self, plan: Optional[ProblemPlan], stem: str = "", q: Optional[QuestionPlan] = None) -> None:
+        # 预热模块依赖本模块的布局规则，这里延迟导入避免循环引用
+        from .prewarm import predict_question_requests, predict_text_requests, prewarm_text
+
+        frame_w, _ = self._frame_size()
+        if plan is not None:
+            prewarm_text(predict_text_requests(plan, self.layout, frame_w))
+        elif q is not None:
+            prewarm_text(predict_question_requests(q, stem, self.layout, frame_w))
+
     def show_full_problem(self, plan: ProblemPlan) -> None:
         frame_w, frame_h = self._frame_size()
         if self.layout.full_problem_layout == "columns" and plan.stem and plan.questions:
@@ -424,23 +589,7 @@ class ProblemSceneBase(Scene):
         theme, constraints = self._effective_layout(q)
         max_width_ratio = min(self.layout.steps_width_ratio, constraints.max_width_ratio)
         max_width = frame_w * max_width_ratio
-        texts = [q.question_text]
-        texts.extend(q.analysis.formulas)
-        texts.extend(q.analysis.conditions)
-        texts.extend(q.analysis.strategy)
-        texts.extend([s.line for s in q.steps])
-        texts.extend([s.subtitle for s in q.steps])
-        metrics = compute_metrics(texts, line_count=len(q.steps))
-        decision = decide_layout(metrics, constraints)
-        theme = Theme(
-            font=theme.font,
-            font_size_scale=theme.font_size_scale * decision.font_scale,
-            line_spacing=theme.line_spacing,
-            panel_padding=theme.panel_padding,
-            subtitle_bg_opacity=theme.subtitle_bg_opacity,
-            accent_color=theme.accent_color,
-        )
-        max_lines = decision.max_lines
+        theme, decision = _step_theme(q, theme, constraints, max_width, frame_h * self.layout.solution_height_ratio)
 
         if self._solution_group:
             self.play(FadeOut(self._solution_group))
@@ -448,40 +597,30 @@ class ProblemSceneBase(Scene):
 
         self.add(self._solution_group)
 
-        for si, step in enumerate(q.steps, start=1):
-            line = SolutionLine(step.line, max_width=max_width, font=theme.font, theme=theme, constraints=constraints)
+        # 先构建全部行并一次性算好每一步的列布局，逐步只做平移
+        lines = [
+            SolutionLine(step.line, max_width=max_width, font=theme.font, theme=theme, constraints=constraints)
+            for step in q.steps
+        ]
+        centers = [line.get_center() for line in lines]
+        for i, line in enumerate(lines):
+            predicted = decision.predicted_overflow[i] if i < len(decision.predicted_overflow) else False
+            record_overflow(predicted, line.overflow)
+        column = plan_solution_column([(line.width, line.height) for line in lines], frame_w, theme, constraints, decision)
+        timings = [step_timing(self.layout, self._audio_map.get((q_index, si))) for si in range(1, len(lines) + 1)]
+        _write_storyboard(q_index, column, timings)
+
+        for si, (step, line, planned, timing) in enumerate(zip(q.steps, lines, column.steps, timings), start=1):
+            if planned.dropped is not None:
+                self._solution_group.remove(lines[planned.dropped])
             self._solution_group.add(line)
-            if len(self._solution_group) > max_lines:
-                self._solution_group.remove(self._solution_group[0])
-            self._solution_group.arrange(DOWN, aligned_edge=LEFT, buff=0.25 * theme.line_spacing)
-            self._solution_group.to_edge(RIGHT, buff=constraints.min_margin)
-            self._solution_group.shift(DOWN * 0.2 + DOWN * constraints.safe_top * 0.15)
+            for placement in planned.placements:
+                target = np.array([placement.center[0], placement.center[1], 0.0])
+                lines[placement.line].shift(target - centers[placement.line])
+                centers[placement.line] = target
 
             audio = self._audio_map.get((q_index, si))
-            base_line = self.layout.line_anim_time
-            base_sub = self.layout.subtitle_anim_time
-            line_time = base_line
-            sub_time = base_sub
-            audio_lead = max(0.0, self.layout.audio_lead)
-
-            if audio:
-                target = max(self.layout.audio_min_wait, audio["duration"] + self.layout.audio_tail)
-                non_wait = base_line + base_sub + audio_lead
-                if non_wait > 0:
-                    if target < non_wait:
-                        scale = max(self.layout.anim_min_scale, target / non_wait)
-                        line_time = base_line * scale
-                        sub_time = base_sub * scale
-                        non_wait = line_time + sub_time + audio_lead
-                    elif target > non_wait:
-                        scale = min(self.layout.anim_max_scale, target / non_wait)
-                        if scale > 1:
-                            line_time = base_line * scale
-                            sub_time = base_sub * scale
-                            non_wait = line_time + sub_time + audio_lead
-                wait_time = max(self.layout.audio_min_wait, target - non_wait)
-            else:
-                wait_time = self.layout.audio_min_wait
+            line_time, sub_time, audio_lead, wait_time = timing.line, timing.subtitle, timing.lead, timing.wait
 
             # 新增：应用步骤级visual变换
             if hasattr(step, 'visual_transform') and step.visual_transform:
@@ -490,12 +629,44 @@ class ProblemSceneBase(Scene):
 
             self.play(FadeIn(line), run_time=line_time)
             self.update_subtitle(step.subtitle, theme=theme, constraints=constraints, run_time=sub_time)
-            if audio and audio["path"].exists():
+            # 混音模式下 manifest 可能只引用音频库中的哈希，本地不一定有逐步 WAV
+            if audio and (self._audio_timeline is not None or (audio["path"] and audio["path"].exists())):
                 if audio_lead > 0:
                     self.wait(audio_lead)
-                self.add_sound(str(audio["path"]))
+                self._place_audio(q_index, si, audio["path"])
             self.wait(wait_time)
 
+    def _place_audio(self, q_index: int, s_index: int, path: Optional[Path]) -> None:
+        if self._audio_timeline is None:
+            self.add_sound(str(path))
+            return
+        self._audio_events.append(
+            {"q": q_index, "s": s_index, "start": round(float(self.renderer.time), 6), "path": str(path or "")}
+        )
+        self._write_audio_timeline()
+
+    def _write_audio_timeline(self, duration: Optional[float] = None) -> None:
+        if self._audio_timeline is None:
+            return
+        writer = getattr(self.renderer, "file_writer", None)
+        video = getattr(writer, "movie_file_path", None)
+        payload = {
+            "format": "audio_timeline_v1",
+            "video": str(video) if video else None,
+            "events": self._audio_events,
+        }
+        if duration is not None:
+            # 场景结束时的总时长：混音时最后一段旁白以此为时间槽终点
+            payload["duration"] = round(float(duration), 6)
+        self._audio_timeline.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._audio_timeline.with_name(self._audio_timeline.name + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self._audio_timeline)
+
+    def tear_down(self) -> None:
+        super().tear_down()
+        self._write_audio_timeline(duration=self.renderer.time)
+
     def update_subtitle(
         self,
         text: str,
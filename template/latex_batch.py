@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, List, Optional, Set
+
+from manim import MathTex, config
+
+from plan.schema import ProblemPlan, QuestionPlan
+
+from layout.text_fit import _contains_cjk, _normalize_latex, _split_inline_math, is_latex
+
+# LaTeX 预编译：渲染开始前收集 plan 中所有会交给 MathTex 的公式片段，
+# 用进程池并行跑 latex + dvisvgm，结果落在 Manim 自己的 tex_dir（按表达式哈希命名的 SVG）。
+# 场景构建时 MathTex 直接命中这些 SVG，只剩解析开销；已编译过的片段在进程内记下，不会重复检查。
+
+_VISUAL_TEXT_KEYS = {"label", "text", "title"}
+
+_compiled: Set[str] = set()
+
+
+def _text_fragments(text: str) -> List[str]:
+    # 与 text_fit._build_text_mobject / make_mixed_text_mobject 的分支保持一致
+    if not text:
+        return []
+    if "$" in text:
+        return [
+            _normalize_latex(seg)
+            for line in text.splitlines()
+            for seg, is_math in _split_inline_math(line)
+            if is_math and seg and not _contains_cjk(seg)
+        ]
+    if is_latex(text):
+        return [_normalize_latex(text)]
+    return []
+
+
+def _visual_texts(spec: Any) -> Iterable[str]:
+    if isinstance(spec, dict):
+        for key, value in spec.items():
+            if key in _VISUAL_TEXT_KEYS and isinstance(value, str):
+                yield value
+            else:
+                yield from _visual_texts(value)
+    elif isinstance(spec, list):
+        for item in spec:
+            yield from _visual_texts(item)
+
+
+def _question_texts(q: QuestionPlan) -> Iterable[str]:
+    yield q.question_text
+    yield from q.analysis.formulas
+    yield from q.analysis.conditions
+    yield from q.analysis.strategy
+    for step in q.steps:
+        yield step.line
+        yield step.subtitle
+    yield from _visual_texts(q.visual)
+
+
+def _unique_fragments(texts: Iterable[str]) -> List[str]:
+    seen: Set[str] = set()
+    fragments: List[str] = []
+    for text in texts:
+        for expr in _text_fragments(text):
+            if expr and expr not in seen:
+                seen.add(expr)
+                fragments.append(expr)
+    return fragments
+
+
+def collect_math_fragments(plan: ProblemPlan) -> List[str]:
+    """
+    收集 plan 中所有公式片段（题干、子题、分析要点、解题行、副标题、图形标签），按首次出现顺序去重
+    :return: 已规范化（去掉 $）的 LaTeX 表达式列表
+    """
+    texts: List[str] = [plan.problem_full_text, plan.stem]
+    for q in plan.questions:
+        texts.extend(_question_texts(q))
+    return _unique_fragments(texts)
+
+
+def question_math_fragments(q: QuestionPlan) -> List[str]:
+    """
+    单道子题的公式片段（流式渲染逐题预编译用）
+    """
+    return _unique_fragments(_question_texts(q))
+
+
+def _svg_exists(expr: str) -> bool:
+    # 与 MathTex 相同的 tex 文件命名规则（align* 环境 + 当前模板），SVG 已存在即无需编译
+    try:
+        from manim.utils.tex_file_writing import generate_tex_file
+
+        return generate_tex_file(expr.strip(), "align*", config.tex_template).with_suffix(".svg").exists()
+    except Exception:
+        return False
+
+
+def _pool_context() -> Any:
+    # 父进程此时已打开文本几何缓存的 SQLite 连接（连同线程锁），fork 出的子进程继承同一连接读写
+    # 会损坏数据库文件或卡死在复制来的锁上；进程池统一用 spawn，子进程各自打开连接
+    return multiprocessing.get_context("spawn")
+
+
+def _init_worker(tex_dir: str) -> None:
+    # spawn 启动的子进程不会继承命令行设置的 media 目录，显式对齐 tex_dir
+    config.tex_dir = tex_dir
+
+
+def _compile_fragment(expr: str) -> bool:
+    try:
+        MathTex(expr)
+    except Exception:
+        # 编译失败的片段在场景里会退化为 Text，这里不需要处理
+        return False
+    return True
+
+
+def _latex_workers() -> int:
+    raw = os.environ.get("LATEX_WORKERS", "").strip()
+    try:
+        value = int(raw) if raw else 0
+    except ValueError:
+        value = 0
+    return value if value > 0 else max(1, os.cpu_count() or 1)
+
+
+def _prepass_enabled() -> bool:
+    return os.environ.get("LATEX_PREPASS", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def precompile_math(fragments: Iterable[str], workers: Optional[int] = None) -> int:
+    """
+    并行编译尚无 SVG 的公式片段，返回本次实际编译的数量
+    :param workers: 进程数；None 时读环境变量 LATEX_WORKERS，默认 CPU 核数
+    """
+    if not _prepass_enabled():
+        return 0
+    unique = [expr for expr in dict.fromkeys(fragments) if expr not in _compiled]
+    pending = [expr for expr in unique if not _svg_exists(expr)]
+    _compiled.update(unique)
+    if not pending:
+        return 0
+    size = min(len(pending), workers or _latex_workers())
+    if size <= 1:
+        return sum(_compile_fragment(expr) for expr in pending)
+    tex_dir = str(config.get_dir("tex_dir"))
+    with ProcessPoolExecutor(
+        max_workers=size, mp_context=_pool_context(), initializer=_init_worker, initargs=(tex_dir,)
+    ) as pool:
+        return sum(pool.map(_compile_fragment, pending, chunksize=max(1, len(pending) // (size * 4))))
+
+
+def precompile_plan_math(plan: ProblemPlan) -> int:
+    return precompile_math(collect_math_fragments(plan))
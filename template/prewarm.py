@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set
+
+from manim import config
+
+from layout import apply_overrides
+from layout.text_cache import decode_geometry, encode_geometry
+from layout.text_fit import (
+    _cached_text_mobject,
+    _measure_text_width,
+    _tokenize_mixed_line,
+    _tokenize_plain_segment,
+    is_latex,
+    layout_text,
+    seed_text_cache,
+    wrap_text_to_char_limit,
+    wrap_text_to_width,
+)
+from plan.schema import ProblemPlan, QuestionPlan
+
+from .flow import LayoutConfig, _compose_questions, _step_theme
+from .latex_batch import _init_worker, _pool_context
+
+# 文本预热：渲染开始前按场景的布局规则（Theme / apply_overrides / decide_layout / LayoutConfig）
+# 推算出各组件将要请求的 (文本, 字体, 字号, 换行宽度)，在进程池中并行完成换行测量与对象构建，
+# 结果编码为点数组送回渲染进程并注入 text_fit 的缓存；场景里的 PinnedHeader / AnalysisPanel /
+# SolutionLine / Subtitle 构建时直接命中，不再在渲染线程上排队调用 Pango / LaTeX。
+
+
+@dataclass(frozen=True)
+class TextRequest:
+    text: str
+    font: Optional[str]
+    font_size: float
+    # 0 表示不按宽度换行（文本已换好行）
+    max_width: float = 0.0
+    # 设置时按 layout_text 同时确定断行与最终字号（SolutionLine / Subtitle）
+    min_font_size: Optional[float] = None
+
+
+_done: Set[TextRequest] = set()
+
+
+def predict_question_requests(q: QuestionPlan, stem: str, layout: LayoutConfig, frame_w: float) -> List[TextRequest]:
+    """
+    单道子题的文本请求：固定题头、分析要点、解题行与副标题
+    """
+    theme, constraints = apply_overrides(layout.theme, layout.constraints, q.layout_overrides)
+    requests: List[TextRequest] = []
+    # 与 components 中的字号计算方式保持一致：基础字号 × theme.font_size_scale
+    header_w = frame_w * min(layout.header_width_ratio, constraints.max_width_ratio)
+    header_size = 28 * theme.font_size_scale
+    requests.append(TextRequest(stem, theme.font, header_size, header_w))
+    requests.append(TextRequest(q.question_text, theme.font, header_size, header_w))
+    analysis_w = frame_w * min(layout.analysis_width_ratio, constraints.max_width_ratio)
+    for item in [*q.analysis.formulas, *q.analysis.conditions, *q.analysis.strategy]:
+        requests.append(TextRequest(item, theme.font, 28 * theme.font_size_scale, analysis_w))
+    steps_w = frame_w * min(layout.steps_width_ratio, constraints.max_width_ratio)
+    step_theme, _ = _step_theme(q, theme, constraints, steps_w, config.frame_height * layout.solution_height_ratio)
+    subtitle_w = frame_w * min(layout.subtitle_width_ratio, constraints.max_width_ratio)
+    min_size = constraints.min_font_size
+    for step in q.steps:
+        requests.append(TextRequest(step.line, step_theme.font, 34 * step_theme.font_size_scale, steps_w, min_size))
+        requests.append(TextRequest(step.subtitle, step_theme.font, 28 * step_theme.font_size_scale, subtitle_w, min_size))
+    return requests
+
+
+def predict_text_requests(plan: ProblemPlan, layout: LayoutConfig, frame_w: float) -> List[TextRequest]:
+    """
+    推算场景将要构建的文本请求（整题展示 + 全部子题），去重并保持顺序；
+    整题展示只覆盖默认的双栏布局
+    """
+    requests: List[TextRequest] = []
+    if layout.full_problem_layout == "columns" and plan.stem and plan.questions:
+        font = layout.theme.font
+        size = layout.full_problem_font_size
+        left = wrap_text_to_char_limit(plan.stem.strip(), max_chars=layout.full_problem_max_chars_left)
+        right = wrap_text_to_char_limit("\n".join(_compose_questions(plan)), max_chars=layout.full_problem_max_chars_right)
+        requests.extend([TextRequest(left, font, size), TextRequest(right, font, size)])
+    for q in plan.questions:
+        requests.extend(predict_question_requests(q, plan.stem, layout, frame_w))
+    return [req for req in dict.fromkeys(requests) if req.text]
+
+
+def _measured_tokens(text: str) -> List[str]:
+    # wrap_text_to_width 会测量的全部 _measure_text_width 参数（行内公式以 $...$ 形式测量）
+    keys: List[str] = []
+    for raw_line in text.split("\n"):
+        if not raw_line:
+            continue
+        if "$" in raw_line:
+            tokens = _tokenize_mixed_line(raw_line)
+        elif is_latex(raw_line):
+            continue
+        else:
+            tokens = _tokenize_plain_segment(raw_line)
+        keys.extend(f"${t.text}$" if t.is_math else t.text for t in tokens if t.text)
+    return list(dict.fromkeys(keys))
+
+
+def _build_request(req: TextRequest) -> tuple[TextRequest, str, float, bytes, List[tuple[str, float]]]:
+    widths: List[tuple[str, float]] = []
+    text, font_size = req.text, req.font_size
+    if req.max_width > 0:
+        widths = [(key, _measure_text_width(key, req.font, req.font_size)) for key in _measured_tokens(req.text)]
+        if req.min_font_size is not None:
+            laid = layout_text(req.text, req.max_width, req.font, req.font_size, min_font_size=req.min_font_size)
+            text, font_size = laid.text, laid.font_size
+        else:
+            text = wrap_text_to_width(req.text, req.max_width, font=req.font, font_size=req.font_size)
+    blob = encode_geometry(_cached_text_mobject(text, req.font, font_size))
+    return req, text, font_size, blob, widths
+
+
+def _prewarm_workers() -> int:
+    raw = os.environ.get("TEXT_PREWARM_WORKERS", "").strip()
+    try:
+        value = int(raw) if raw else 0
+    except ValueError:
+        value = 0
+    return value if value > 0 else max(1, os.cpu_count() or 1)
+
+
+def _prewarm_enabled() -> bool:
+    return os.environ.get("TEXT_PREWARM", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def prewarm_text(requests: Iterable[TextRequest], workers: Optional[int] = None) -> int:
+    """
+    在进程池中构建文本请求并注入当前进程的文本缓存，返回本次预热的请求数
+    :param workers: 进程数；None 时读环境变量 TEXT_PREWARM_WORKERS，默认 CPU 核数
+    """
+    if not _prewarm_enabled():
+        return 0
+    pending = [req for req in dict.fromkeys(requests) if req.text and req not in _done]
+    _done.update(pending)
+    size = min(len(pending), workers or _prewarm_workers())
+    if size <= 1:
+        # 单项没有并行收益，交给场景按需构建
+        return 0
+    tex_dir = str(config.get_dir("tex_dir"))
+    count = 0
+    with ProcessPoolExecutor(
+        max_workers=size, mp_context=_pool_context(), initializer=_init_worker, initargs=(tex_dir,)
+    ) as pool:
+        futures = [pool.submit(_build_request, req) for req in pending]
+        for future in as_completed(futures):
+            try:
+                req, text, font_size, blob, widths = future.result()
+            except Exception:
+                # 个别文本构建失败时由场景照常重建并抛出原始错误
+                continue
+            seed_text_cache(
+                mobjects=[(text, req.font, font_size, decode_geometry(blob))],
+                widths=[(key, req.font, req.font_size, width) for key, width in widths],
+            )
+            count += 1
+    return count
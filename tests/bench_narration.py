@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from plan import narration
+
+
+def _corpus() -> list[str]:
+    texts: list[str] = []
+    for path in sorted((ROOT / "examples").glob("*.json")) + [ROOT / "plan.json"]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8-sig"))
+        except Exception:
+            continue
+        for q in data.get("questions", []):
+            texts.append(str(q.get("question_text", "")))
+            for step in q.get("steps", []):
+                texts.append(str(step.get("line", "")))
+                texts.append(str(step.get("subtitle", "")))
+    return [t for t in texts if t]
+
+
+def _nested_frac(depth: int) -> str:
+    text = "x"
+    for i in range(depth):
+        text = f"\\frac{{{text}}}{{{i + 2}}}"
+    return f"${text}$"
+
+
+def _run(engine: str, texts: list[str], repeat: int) -> float:
+    os.environ["NARRATION_ENGINE"] = engine
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            narration._normalize_math_for_speech(text)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    texts = _corpus()
+    print(f"corpus: {len(texts)} fragments")
+    for engine in ("regex", "ast"):
+        elapsed = _run(engine, texts, repeat=20)
+        print(f"{engine:>5}: {len(texts) * 20 / elapsed:,.0f} fragments/s")
+    print("nested \\frac depth scaling (ms per fragment):")
+    for depth in (8, 32, 128):
+        sample = [_nested_frac(depth)]
+        row = [f"{engine}={_run(engine, sample, repeat=5) / 5 * 1000:.2f}" for engine in ("regex", "ast")]
+        print(f"  depth {depth:>3}: " + "  ".join(row))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from manim import DOWN, LEFT, Mobject
+
+from layout.text_cache import share_geometry
+from layout.text_fit import _cached_text_mobject
+
+
+def _step_lines() -> list[str]:
+    lines: list[str] = []
+    for path in sorted((ROOT / "examples").glob("*.json")) + [ROOT / "plan.json"]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8-sig"))
+        except Exception:
+            continue
+        for q in data.get("questions", []):
+            for step in q.get("steps", []):
+                lines.append(str(step.get("line", "")))
+                lines.append(str(step.get("subtitle", "")))
+    return [t for t in lines if t]
+
+
+def _render_step(copy: Callable[[Mobject], Mobject], source: Mobject) -> Mobject:
+    # 与 write_steps 中一行的处理一致：取一份拷贝后缩放进框、再排版定位
+    mob = copy(source)
+    mob.scale(0.9)
+    mob.to_edge(LEFT).shift(DOWN * 0.5)
+    return mob
+
+
+def _run(copy: Callable[[Mobject], Mobject], sources: list[Mobject], rounds: int) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = []
+    for _ in range(rounds):
+        kept = [_render_step(copy, src) for src in sources]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return elapsed, current, peak
+
+
+def _copy_only(copy: Callable[[Mobject], Mobject], sources: list[Mobject]) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = [copy(src) for src in sources]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return elapsed, current
+
+
+def main() -> int:
+    lines = _step_lines()
+    if not lines:
+        print("no step lines found")
+        return 1
+    sources = [_cached_text_mobject(text, None, 34) for text in lines]
+    rounds = 5
+    print(f"corpus: {len(lines)} lines, {rounds} rounds")
+    for name, copy in (("deepcopy", lambda m: m.copy()), ("copy-on-write", share_geometry)):
+        copy_time, copy_bytes = _copy_only(copy, sources)
+        elapsed, current, peak = _run(copy, sources, rounds)
+        steps = len(sources) * rounds
+        print(
+            f"{name:>14}: copy {copy_time * 1000 / len(sources):.3f} ms/line, {copy_bytes / len(sources) / 1024:.1f} KiB/line kept; "
+            f"step {elapsed * 1000 / steps:.3f} ms, peak {peak / 1024 / 1024:.1f} MiB, live {current / 1024 / 1024:.1f} MiB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from plan.exporter import load_plan
+from plan.schema import ProblemPlan
+from tts import TTSConfig, make_backend, synthesize_plan
+
+
+def _plans() -> list[ProblemPlan]:
+    plans: list[ProblemPlan] = []
+    for path in sorted((ROOT / "examples").glob("*.json")) + [ROOT / "plan.json"]:
+        try:
+            plans.append(load_plan(path))
+        except Exception:
+            continue
+    return plans
+
+
+def _configs() -> list[TTSConfig]:
+    configs = [TTSConfig(backend="fake")]
+    if os.environ.get("PIPER_MODEL"):
+        configs.append(
+            TTSConfig(
+                model_path=os.environ["PIPER_MODEL"],
+                bin_path=os.environ.get("PIPER_BIN", "piper"),
+                extra_args=os.environ.get("PIPER_ARGS", ""),
+            )
+        )
+    return configs
+
+
+def _run(config: TTSConfig, plans: list[ProblemPlan]) -> tuple[float, float, int]:
+    # 每个后端用独立的临时音频库，保证测的是冷启动合成而不是缓存命中
+    with tempfile.TemporaryDirectory(prefix="bench_tts_") as tmp:
+        os.environ["TTS_STORE"] = str(Path(tmp) / "store")
+        backend = make_backend(config)
+        audio_seconds = 0.0
+        steps = 0
+        start = time.perf_counter()
+        for i, plan in enumerate(plans):
+            manifest = synthesize_plan(plan, Path(tmp) / f"plan{i}", config, backend=backend, materialize=False)
+            entries = json.loads(manifest.read_text(encoding="utf-8"))["entries"]
+            audio_seconds += sum(float(e["duration"]) for e in entries)
+            steps += len(entries)
+        return time.perf_counter() - start, audio_seconds, steps
+
+
+def main() -> int:
+    plans = _plans()
+    print(f"corpus: {len(plans)} plans")
+    for config in _configs():
+        elapsed, audio_seconds, steps = _run(replace(config, overwrite=True), plans)
+        rtf = elapsed / audio_seconds if audio_seconds else 0.0
+        print(
+            f"{config.backend:>6}: {steps} steps in {elapsed:.2f}s  "
+            f"{steps / elapsed:,.1f} steps/s  audio {audio_seconds:.1f}s  RTF {rtf:.3f}"
+        )
+    if not os.environ.get("PIPER_MODEL"):
+        print("(set PIPER_MODEL to include the Piper backend)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
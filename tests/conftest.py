@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_disk_caches(tmp_path_factory, monkeypatch) -> None:
+    # 各类磁盘缓存默认写在仓库 .cache/ 下；测试一律指向临时目录，单个用例可再覆盖
+    base = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("NARRATION_CACHE", str(base / "narration.sqlite3"))
+    monkeypatch.setenv("TEXT_CACHE", str(base / "text_geometry.sqlite3"))
+    monkeypatch.setenv("TTS_STORE", str(base / "tts_store"))
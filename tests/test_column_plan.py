@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from layout import Constraints, LayoutDecision, Theme, plan_solution_column
+
+
+def test_column_drops_oldest_line_and_right_aligns() -> None:
+    constraints = Constraints(min_margin=0.5, safe_top=0.0)
+    decision = LayoutDecision(strategy="standard", font_scale=1.0, max_lines=2)
+    plan = plan_solution_column([(2.0, 1.0), (4.0, 0.5), (1.0, 0.5)], 10.0, Theme(line_spacing=2.0), constraints, decision)
+    # 右缘 x = 4.5，行距 buff = 0.5，整组竖直中心 y = -0.2
+    first, second, third = plan.steps
+    assert first.dropped is None
+    assert first.center_of(0) == pytest.approx((3.5, -0.2))
+    assert second.center_of(0) == pytest.approx((1.5, 0.3))
+    assert second.center_of(1) == pytest.approx((2.5, -0.95))
+    assert third.dropped == 0
+    assert third.center_of(0) is None
+    assert third.center_of(1) == pytest.approx((2.5, 0.3))
+    assert third.center_of(2) == pytest.approx((1.0, -0.7))
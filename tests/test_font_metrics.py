@@ -0,0 +1,51 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("manim")
+
+from layout.font_metrics import parse_font
+
+
+def _table_bytes(chars: str, advances: list[int], kern: dict[tuple[int, int], int]) -> dict[bytes, bytes]:
+    # 字形 0 为 .notdef，chars[i] 对应字形 i + 1；码位需连续以便用一个 format 4 段表示
+    head = bytearray(54)
+    struct.pack_into(">H", head, 18, 1000)
+    hhea = bytearray(36)
+    struct.pack_into(">hhh", hhea, 4, 800, -200, 100)
+    struct.pack_into(">H", hhea, 34, len(advances) + 1)
+    hmtx = b"".join(struct.pack(">Hh", adv, 0) for adv in [500, *advances])
+    start, end = ord(chars[0]), ord(chars[-1])
+    seg_x2 = 4
+    sub = struct.pack(">HHHHHHH", 4, 0, 0, seg_x2, 4, 1, 0)
+    sub += struct.pack(">HH", end, 0xFFFF) + b"\0\0" + struct.pack(">HH", start, 0xFFFF)
+    sub += struct.pack(">hh", 1 - start, 1) + struct.pack(">HH", 0, 0)
+    cmap = struct.pack(">HHHHI", 0, 1, 3, 1, 12) + sub
+    pairs = b"".join(struct.pack(">HHh", a, b, v) for (a, b), v in sorted(kern.items()))
+    kern_sub = struct.pack(">HHHHHHH", 0, 14 + len(pairs), 0x0001, len(kern), 0, 0, 0) + pairs
+    kern_table = struct.pack(">HH", 0, 1) + kern_sub
+    return {b"head": bytes(head), b"hhea": bytes(hhea), b"hmtx": hmtx, b"cmap": cmap, b"kern": kern_table}
+
+
+def _write_font(path: Path, tables: dict[bytes, bytes]) -> None:
+    offset = 12 + 16 * len(tables)
+    directory = b""
+    body = b""
+    for tag, data in sorted(tables.items()):
+        directory += struct.pack(">4sIII", tag, 0, offset + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+    path.write_bytes(struct.pack(">IHHHH", 0x00010000, len(tables), 0, 0, 0) + directory + body)
+
+
+def test_parse_font_reads_advances_and_kerning(tmp_path: Path) -> None:
+    font = tmp_path / "mini.ttf"
+    # 'A' -> 字形 1，'B' -> 字形 2，'C' -> 字形 3
+    _write_font(font, _table_bytes("ABC", [600, 700, 800], {(1, 2): -50}))
+    metrics = parse_font(str(font))
+    assert metrics.units_per_em == 1000
+    assert metrics.advances[ord("A")] == pytest.approx(0.6)
+    assert metrics.line_height == pytest.approx(1.1)
+    assert metrics.advance("AB") == pytest.approx(0.6 + 0.7 - 0.05)
+    assert metrics.advance("BA") == pytest.approx(1.3)
+    assert metrics.advance("AZ") is None
@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from plan.schema import AnalysisPoints, ProblemPlan, QuestionPlan, Step
+from template.latex_batch import collect_math_fragments, question_math_fragments
+
+
+def test_collects_unique_fragments_from_all_text_sources() -> None:
+    q = QuestionPlan(
+        question_text="(1) 求 $a$",
+        analysis=AnalysisPoints(formulas=["$F=ma$", "v^2=2ax"], conditions=["光滑水平面"]),
+        steps=[Step(line="$F=ma$，得 $a=2$", subtitle="由牛顿第二定律")],
+        visual={"objects": [{"type": "force", "label": "$F_N$"}]},
+    )
+    plan = ProblemPlan(problem_full_text="质量为 $m$ 的物块", stem="质量为 $m$ 的物块", questions=[q])
+    assert collect_math_fragments(plan) == ["m", "a", "F=ma", "v^2=2ax", "a=2", "F_N"]
+    assert question_math_fragments(q) == ["a", "F=ma", "v^2=2ax", "a=2", "F_N"]
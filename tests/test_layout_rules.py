@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from layout.layout_rules import _fitting_lines, overflow_report, record_overflow
+from layout.text_fit import _math_extent
+
+
+def test_fitting_lines_uses_tallest_window() -> None:
+    # 连续两行最高 1.0 + 1.2 + 0.5 = 2.7，三行 0.5 + 1.0 + 1.2 + 2 × 0.5 = 3.7
+    heights = [0.5, 1.0, 1.2, 0.4]
+    assert _fitting_lines(heights, 0.5, 3.0, 6) == 2
+    assert _fitting_lines(heights, 0.5, 3.7, 6) == 3
+    assert _fitting_lines(heights, 0.5, 10.0, 3) == 3
+    assert _fitting_lines([5.0], 0.5, 1.0, 6) == 1
+
+
+def test_overflow_report_counts_mismatches() -> None:
+    overflow_report(reset=True)
+    record_overflow(False, False)
+    record_overflow(False, True)
+    record_overflow(True, False)
+    report = overflow_report(reset=True)
+    assert (report.lines, report.predicted, report.actual, report.missed, report.false_alarms) == (3, 1, 1, 1, 1)
+
+
+def test_math_extent_estimates_without_latex() -> None:
+    # 分式取较宽的分子 + 0.2，上标按 0.7 缩小
+    width, depth = _math_extent(r"\frac{ab}{c}^2", lambda ch: 0.5)
+    assert width == pytest.approx(1.2 + 0.35)
+    assert depth == 1
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from layout.line_break import break_lines
+
+
+def _lines(texts, ranges):
+    return ["".join(texts[a:b]) for a, b in ranges]
+
+
+def test_balances_lines_instead_of_greedy_fill() -> None:
+    # 贪心：[5 1] [4] [6 2] [4]，第二行很空；最优解把 1 挪到第二行，两行都较满
+    words = [5, 1, 4, 6, 2, 4]
+    texts, widths = [], []
+    for i, w in enumerate(words):
+        if i:
+            texts.append(" ")
+            widths.append(1)
+        texts.append("x" * w)
+        widths.append(w)
+    ranges = break_lines(texts, widths, [t == " " for t in texts], 10)
+    assert _lines(texts, ranges) == ["xxxxx", "x xxxx", "xxxxxx xx", "xxxx"]
+
+
+def test_cjk_punctuation_never_starts_a_line() -> None:
+    texts = list("由题意得，物块加速度为二。")
+    ranges = break_lines(texts, [1.0] * len(texts), [False] * len(texts), 4)
+    for a, _ in ranges[1:]:
+        assert texts[a] not in "，。"
+
+
+def test_overlong_token_gets_its_own_line() -> None:
+    texts = ["短", "$\\frac{a}{b}+c+d$", "长"]
+    ranges = break_lines(texts, [1, 9, 1], [False] * 3, 4)
+    assert (1, 2) in ranges
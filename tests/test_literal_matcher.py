@@ -0,0 +1,18 @@
+from plan.literal_matcher import LiteralMatcher
+
+
+def test_leftmost_longest() -> None:
+    matcher = LiteralMatcher({"ab": "1", "abc": "2", "bcd": "3", "d": "4"})
+    assert matcher.replace("abcd") == "24"
+    assert matcher.replace("xbcdab") == "x31"
+
+
+def test_empty_table_is_identity() -> None:
+    matcher = LiteralMatcher({})
+    assert not matcher
+    assert matcher.replace("∵ a≥b") == "∵ a≥b"
+
+
+def test_symbols() -> None:
+    matcher = LiteralMatcher({"≥": "大于等于", "∵": "因为"})
+    assert matcher.replace("∵ a≥b") == "因为 a大于等于b"
@@ -37,3 +37,127 @@ def test_derivative_fraction() -> None:
     step = Step(line="$\\frac{d}{dx}x^2$", subtitle="对 $x^2$ 求导")
     speech = _norm(build_narration(step))
     assert "对 x 求导" in speech
+
+
+def test_nested_fraction_and_greek() -> None:
+    step = Step(line="$\\frac{\\frac{a}{b}}{c}$", subtitle="化简 $\\frac{\\frac{a}{b}}{c}+\\alpha\\cdots$")
+    speech = _norm(build_narration(step))
+    assert "a 分之 b 分之 c" in speech
+    assert "阿尔法" in speech
+    assert "省略号" in speech
+
+
+def test_braced_superscript_with_subscript() -> None:
+    step = Step(line="$x^{a_1}$", subtitle="得 $x^{a_1}$")
+    speech = _norm(build_narration(step))
+    assert "x 的 a 下标 1 次方" in speech
+
+
+def test_latex_tree_handles_nested_braces() -> None:
+    from plan.latex_speech import latex_to_speech
+
+    speech = _norm(latex_to_speech("\\frac{1-r^{n+1}}{(1-r)^2}", {}))
+    assert speech == "1-r 的 n+1 次方 分之 (1-r) 的 2 次方"
+
+
+def test_degree_and_unknown_limits() -> None:
+    step = Step(line="$\\sin37^\\circ=0.6$", subtitle="已知 $\\sin37^\\circ=0.6$")
+    speech = _norm(build_narration(step))
+    assert "正弦37 度 等于 0.6" in speech
+
+
+def test_narration_cache_follows_dictionary_changes(tmp_path, monkeypatch) -> None:
+    import json as _json
+    import os as _os
+
+    from plan import narration
+
+    dict_path = tmp_path / "custom.json"
+    dict_path.write_text(_json.dumps({"speech": {"literal": {"动能": "动能甲"}}}), encoding="utf-8")
+    monkeypatch.setenv("NARRATION_CACHE", str(tmp_path / "narration.sqlite3"))
+    monkeypatch.setenv("TTS_DICTS", "")
+    monkeypatch.setenv("TTS_DICT_PATHS", str(dict_path))
+    monkeypatch.setattr(narration, "_DICT_CHECK_INTERVAL", 0.0)
+
+    assert narration.narrate_text("求动能") == "求动能甲"
+    dict_path.write_text(_json.dumps({"speech": {"literal": {"动能": "动能乙"}}}), encoding="utf-8")
+    stat = dict_path.stat()
+    _os.utime(dict_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert narration.narrate_text("求动能") == "求动能乙"
+
+
+def test_narration_cache_does_not_change_output(tmp_path, monkeypatch) -> None:
+    from plan import narration
+
+    # 分解形式的字符与首尾空白原样交给转换，缓存开关不影响结果
+    text = " Cafe\u0301 $x^2$ "
+    monkeypatch.setenv("NARRATION_CACHE", "0")
+    plain = narration.narrate_text(text)
+    assert plain == narration._normalize_math_for_speech(text)
+    monkeypatch.setenv("NARRATION_CACHE", str(tmp_path / "narration.sqlite3"))
+    assert narration.narrate_text(text) == plain
+    assert narration.narrate_text(text) == plain
+
+
+def test_narration_cache_evicts_least_recently_used(tmp_path) -> None:
+    import time as _time
+
+    from plan.narration_cache import NarrationCache
+
+    path = tmp_path / "narration.sqlite3"
+    cache = NarrationCache(path, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+        _time.sleep(0.01)
+    assert cache.get("a") == "A"
+    cache.close()
+    again = NarrationCache(path, max_entries=2)
+    assert again.get("a") == "A"
+    assert again.get("b") is None
+    assert again.get("c") == "C"
+    again.close()
+
+
+def test_dictionary_edit_only_invalidates_affected_entries(tmp_path, monkeypatch) -> None:
+    import json as _json
+    import os as _os
+
+    from plan import narration
+
+    dict_path = tmp_path / "custom.json"
+
+    def _write(table: dict) -> None:
+        dict_path.write_text(_json.dumps({"speech": {"literal": table}}), encoding="utf-8")
+        stat = dict_path.stat()
+        _os.utime(dict_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    monkeypatch.setenv("NARRATION_CACHE", str(tmp_path / "narration.sqlite3"))
+    monkeypatch.setenv("TTS_DICTS", "")
+    monkeypatch.setenv("TTS_DICT_PATHS", str(dict_path))
+    monkeypatch.setattr(narration, "_DICT_CHECK_INTERVAL", 0.0)
+    converted: list[str] = []
+    convert = narration._normalize_math_for_speech
+
+    def _counting(text: str) -> str:
+        converted.append(text)
+        return convert(text)
+
+    monkeypatch.setattr(narration, "_normalize_math_for_speech", _counting)
+    _write({"动能": "动能甲", "势能": "势能甲"})
+    for text in ("求动能", "求势能", "求速度"):
+        narration.narrate_text(text)
+    converted.clear()
+
+    # 只改“动能”：依赖它的条目重算，其余条目仍命中
+    _write({"动能": "动能乙", "势能": "势能甲"})
+    assert narration.narrate_text("求动能") == "求动能乙"
+    assert narration.narrate_text("求势能") == "求势能甲"
+    assert narration.narrate_text("求速度") == "求速度"
+    assert converted == ["求动能"]
+
+    # 新增能命中已缓存文本的规则：只有该条目重算
+    converted.clear()
+    _write({"动能": "动能乙", "势能": "势能甲", "速度": "速率"})
+    assert narration.narrate_text("求速度") == "求速率"
+    assert narration.narrate_text("求势能") == "求势能甲"
+    assert converted == ["求速度"]
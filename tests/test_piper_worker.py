@@ -0,0 +1,124 @@
+import json
+import sys
+import textwrap
+import wave
+from dataclasses import replace
+from pathlib import Path
+
+from plan.schema import problem_from_dict
+from tts.piper import TTSConfig, synthesize_plan
+from tts.worker import PiperWorker
+
+
+_FAKE_PIPER = textwrap.dedent(
+    """
+    import json, sys, wave
+    from pathlib import Path
+    marker = Path(sys.argv[0]).with_suffix(".crashed")
+    for line in sys.stdin:
+        req = json.loads(line)
+        if req["text"] == "crash" and not marker.exists():
+            marker.touch()
+            sys.exit(3)
+        with wave.open(req["output_file"], "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(b"\\x00\\x00" * 1600 * len(req["text"]))
+        print(req["output_file"], flush=True)
+    """
+)
+
+
+def _fake_config(tmp_path: Path) -> TTSConfig:
+    script = tmp_path / "fake_piper.py"
+    script.write_text(_FAKE_PIPER, encoding="utf-8")
+    launcher = tmp_path / "piper"
+    launcher.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n", encoding="utf-8")
+    launcher.chmod(0o755)
+    return TTSConfig(model_path="fake.onnx", bin_path=str(launcher), timeout_s=10.0)
+
+
+def test_worker_reuses_process_and_restarts_after_crash(tmp_path: Path) -> None:
+    with PiperWorker(_fake_config(tmp_path)) as worker:
+        first = worker.synthesize_to("ab", tmp_path / "a.wav")
+        pid = worker._proc.pid
+        worker.synthesize_to("abc", tmp_path / "b.wav")
+        assert worker._proc.pid == pid
+
+        worker.synthesize_to("crash", tmp_path / "c.wav")
+        assert worker._proc.pid != pid
+
+    with wave.open(str(first), "rb") as wf:
+        assert wf.getnframes() == 3200
+    assert (tmp_path / "c.wav").exists()
+
+
+def test_pool_keeps_manifest_order(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("TTS_STORE", str(tmp_path / "store"))
+    plan = problem_from_dict(
+        {
+            "problem_full_text": "题目",
+            "stem": "题干",
+            "questions": [
+                {"question_text": "q", "steps": [{"line": "x", "subtitle": "步" * (i + 1)} for i in range(6)]},
+            ],
+        }
+    )
+    config = replace(_fake_config(tmp_path), workers=3)
+    manifest = json.loads(synthesize_plan(plan, tmp_path / "audio", config).read_text(encoding="utf-8"))
+    assert [entry["s"] for entry in manifest["entries"]] == [1, 2, 3, 4, 5, 6]
+    assert [round(entry["duration"], 1) for entry in manifest["entries"]] == [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+
+
+def test_pcm_goes_straight_to_store_without_step_wavs(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("TTS_STORE", str(tmp_path / "store"))
+    plan = problem_from_dict(
+        {
+            "problem_full_text": "题目",
+            "stem": "题干",
+            "questions": [{"question_text": "q", "steps": [{"line": "x", "subtitle": "一二"}]}],
+        }
+    )
+    out_dir = tmp_path / "audio"
+    manifest = json.loads(
+        synthesize_plan(plan, out_dir, _fake_config(tmp_path), materialize=False).read_text(encoding="utf-8")
+    )
+    entry = manifest["entries"][0]
+    assert round(entry["duration"], 2) == 0.2
+    assert not list(out_dir.glob("*.wav"))
+    assert list((tmp_path / "store").rglob(entry["audio"] + ".ttsz"))
+
+
+def test_shared_phrases_are_synthesized_once(tmp_path: Path, monkeypatch) -> None:
+    import tts.piper as piper
+
+    monkeypatch.setenv("TTS_STORE", str(tmp_path / "store"))
+    requested: list[str] = []
+    original = piper._synthesize_pending
+
+    def _spy(pending, config, sink):
+        requested.extend(pending.values())
+        original(pending, config, sink)
+
+    monkeypatch.setattr(piper, "_synthesize_pending", _spy)
+    plan = problem_from_dict(
+        {
+            "problem_full_text": "题目",
+            "stem": "题干",
+            "questions": [
+                {
+                    "question_text": "q",
+                    "steps": [
+                        {"line": "x", "subtitle": "由题意得，甲乙。"},
+                        {"line": "y", "subtitle": "由题意得，丙丁。"},
+                    ],
+                }
+            ],
+        }
+    )
+    manifest = json.loads(synthesize_plan(plan, tmp_path / "audio", _fake_config(tmp_path)).read_text(encoding="utf-8"))
+    assert sorted(requested) == sorted(["由题意得，", "甲乙。", "丙丁。"])
+    chunks = manifest["entries"][1]["chunks"]
+    assert [c["text"] for c in chunks] == ["由题意得，", "丙丁。"]
+    assert chunks[1]["start"] > chunks[0]["duration"]
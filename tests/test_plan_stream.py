@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from plan.exporter import PlanStreamWriter, iter_plan_stream, load_plan
+from plan.schema import problem_from_dict
+
+
+def _plan():
+    return problem_from_dict(
+        {
+            "problem_full_text": "题目",
+            "stem": "题干",
+            "questions": [
+                {"question_text": "(1) 求 a", "steps": [{"line": "$a=1$", "subtitle": "得 $a=1$"}]},
+                {"question_text": "(2) 求 b", "steps": [{"line": "$b=2$", "subtitle": "得 $b=2$"}]},
+            ],
+        }
+    )
+
+
+def test_stream_roundtrip(tmp_path: Path) -> None:
+    plan = _plan()
+    path = tmp_path / "plan.ndjson"
+    with PlanStreamWriter(path, plan) as writer:
+        for q in plan.questions:
+            writer.write_question(q)
+    loaded = load_plan(path)
+    assert loaded.stem == "题干"
+    assert [q.question_text for q in loaded.questions] == ["(1) 求 a", "(2) 求 b"]
+    assert loaded.questions[1].steps[0].line == "$b=2$"
+
+
+def test_stream_partial_without_end(tmp_path: Path) -> None:
+    plan = _plan()
+    path = tmp_path / "plan.ndjson"
+    writer = PlanStreamWriter(path, plan)
+    writer.write_question(plan.questions[0])
+    types = [r["type"] for r in iter_plan_stream(path)]
+    assert types == ["header", "question"]
+    writer.close()
+    types = [r["type"] for r in iter_plan_stream(path)]
+    assert types == ["header", "question", "end"]
+
+
+def test_streaming_plans_visuals_once_and_numbers_emitted_questions(tmp_path: Path, monkeypatch, capsys) -> None:
+    import argparse
+    import sys
+
+    import pipeline
+
+    calls: list[int] = []
+
+    def _fake_visuals(solver, plan_dict, *, solution_text):
+        calls.append(len(plan_dict["questions"]))
+        return plan_dict
+
+    monkeypatch.setattr(pipeline, "_attach_visuals", _fake_visuals)
+    monkeypatch.setattr(pipeline, "_render_command", lambda *a, **k: ([sys.executable, "-c", "pass"], {}))
+    step = {"line": "$a=1$", "subtitle": "得 $a=1$"}
+    plan_dict = {
+        "problem_full_text": "题目",
+        "stem": "题干",
+        "questions": [{"question_text": "(1)", "steps": [step]}, "junk", {"question_text": "(2)", "steps": [step]}],
+    }
+    args = argparse.Namespace(tts=False, no_visual=False, quality="-ql", renderer="cairo", out=None)
+    code = pipeline._run_streaming(None, plan_dict, solution_text="", plan_path=tmp_path / "plan.json", args=args)
+    assert code == 0
+    assert calls == [3]
+    out = capsys.readouterr().out
+    assert "Q1 streamed" in out and "Q2 streamed" in out and "Q3" not in out
+    assert [q.question_text for q in load_plan(tmp_path / "plan.json").questions] == ["(1)", "(2)"]
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from layout.sized_cache import SizedCache, cache_scope, sized_cache
+
+
+def test_evicts_by_bytes_and_counts() -> None:
+    cache = SizedCache("t", max_bytes=3 * (100 + 128), sizeof=len)
+    for key in "abcd":
+        cache.put(key, "x" * 100)
+    stats = cache.stats()
+    assert stats.entries == 3 and stats.evictions == 1
+    assert cache.get("a") is None and cache.get("d") == "x" * 100
+    assert cache.stats().hits == 1 and cache.stats().misses == 1
+
+
+def test_scope_eviction_keeps_shared_entries() -> None:
+    cache = SizedCache("t", max_bytes=1 << 20, sizeof=lambda _: 0)
+    calls = []
+
+    @sized_cache(cache)
+    def build(text: str) -> str:
+        calls.append(text)
+        return text.upper()
+
+    with cache_scope(1):
+        build("stem")
+        build("q1")
+    with cache_scope(2):
+        build("stem")
+        build("q2")
+    assert calls == ["stem", "q1", "q2"]
+    assert cache.stats().scopes[1]["entries"] == 2
+    assert cache.evict_scope(1) == 1
+    assert len(cache) == 2
+    build("q1")
+    assert calls[-1] == "q1"
+    build.cache_clear()
+    assert len(cache) == 0
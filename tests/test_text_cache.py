@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+manim = pytest.importorskip("manim")
+
+import layout.text_cache as text_cache
+from layout.text_cache import TextGeometryCache, decode_geometry, encode_geometry, share_geometry, shared_copy
+
+
+def _sample() -> "manim.VGroup":
+    group = manim.VGroup(manim.Square(side_length=1.0), manim.Circle(radius=0.4).shift(manim.RIGHT * 2))
+    group[0].set_fill(manim.RED, opacity=0.5)
+    group[1].set_stroke(manim.BLUE, width=3)
+    return group
+
+
+def test_geometry_round_trip_keeps_points_and_style() -> None:
+    original = _sample()
+    rebuilt = decode_geometry(encode_geometry(original))
+    src = original.family_members_with_points()
+    dst = rebuilt.family_members_with_points()
+    assert len(src) == len(dst)
+    for a, b in zip(src, dst):
+        assert np.allclose(a.points, b.points)
+        assert np.allclose(a.fill_rgbas, b.fill_rgbas)
+        assert np.allclose(a.stroke_rgbas, b.stroke_rgbas)
+        assert a.stroke_width == b.stroke_width
+    assert rebuilt.width == pytest.approx(original.width)
+
+
+def test_disk_cache_serves_rebuilt_mobject(tmp_path: Path) -> None:
+    cache = TextGeometryCache(tmp_path / "text.sqlite3")
+    assert cache.load("F=ma", "Sans", 36) is None
+    cache.store("F=ma", "Sans", 36, _sample())
+    again = TextGeometryCache(tmp_path / "text.sqlite3").load("F=ma", "Sans", 36)
+    assert again is not None
+    assert again.width == pytest.approx(_sample().width)
+    assert cache.load("F=ma", "Sans", 30) is None
+
+
+def test_shared_copy_transforms_without_touching_source() -> None:
+    original = _sample()
+    before = [m.points.copy() for m in original.family_members_with_points()]
+    shared = share_geometry(original)
+    assert np.shares_memory(shared[0].points, original[0].points)
+    group = manim.VGroup(shared)
+    group.scale(2).shift(manim.UP)
+    assert shared.width == pytest.approx(original.width * 2)
+    group.rotate(0.3)
+    shared.set_fill(manim.GREEN, opacity=1.0)
+    for mob, points in zip(original.family_members_with_points(), before):
+        assert np.array_equal(mob.points, points)
+    assert np.allclose(original[0].fill_rgbas[0, :3], manim.color_to_rgb(manim.RED))
+
+
+def test_shared_copy_deep_copies_off_cairo(monkeypatch: pytest.MonkeyPatch) -> None:
+    original = _sample()
+    monkeypatch.setattr(text_cache, "renderer_name", lambda: "opengl")
+    copied = shared_copy(original)
+    assert not np.shares_memory(copied[0].points, original[0].points)
+    monkeypatch.setattr(text_cache, "renderer_name", lambda: "cairo")
+    assert np.shares_memory(shared_copy(original)[0].points, original[0].points)
+
+
+def test_in_place_writes_copy_shared_points_on_first_write(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(text_cache, "renderer_name", lambda: "cairo")
+    original = manim.Text("F=ma", font_size=36)
+    before = [m.points.copy() for m in original.family_members_with_points()]
+    shared = shared_copy(original)
+    shared.shift(manim.RIGHT).scale(1.5).stretch(2.0, 0)
+    shared.apply_function(lambda p: p + np.array([0.0, 0.1, 0.0]))
+    first, second = shared.family_members_with_points()[:2]
+    first.points[:, 1] *= -1
+    np.multiply(second.points, 0.5, out=second.points)
+    np.copyto(shared.family_members_with_points()[-1].points, 0.0)
+    manim.Camera().capture_mobject(shared)
+    for mob, points in zip(original.family_members_with_points(), before):
+        assert np.array_equal(mob.points, points)
+    assert shared.width != pytest.approx(original.width)
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from plan.schema import AnalysisPoints, ProblemPlan, QuestionPlan, Step
+from template.flow import LayoutConfig
+from template.prewarm import TextRequest, predict_text_requests
+
+
+def test_predicted_requests_follow_component_sizes() -> None:
+    layout = LayoutConfig()
+    q = QuestionPlan(
+        question_text="(1) 求加速度",
+        analysis=AnalysisPoints(formulas=["$F=ma$"]),
+        steps=[Step(line="$a=F/m=2$", subtitle="代入数据")],
+        layout_overrides={"font_size_scale": 1.2},
+    )
+    plan = ProblemPlan(problem_full_text="质量为 $m$ 的物块", stem="质量为 $m$ 的物块", questions=[q])
+    requests = predict_text_requests(plan, layout, frame_w=14.0)
+    font = layout.theme.font
+    header_w = 14.0 * min(layout.header_width_ratio, layout.constraints.max_width_ratio)
+    assert TextRequest("(1) 求加速度", font, 28 * 1.2, header_w) in requests
+    assert TextRequest("$F=ma$", font, 28 * 1.2, 14.0 * layout.analysis_width_ratio) in requests
+    # 解题行字号还要乘上布局决策的缩放（单行很短、放大后仍放得下时为 relaxed，1.05）
+    line = next(r for r in requests if r.text == "$a=F/m=2$")
+    assert line.font_size == pytest.approx(34 * 1.2 * 1.05)
+    assert len(requests) == len(set(requests))
+
+
+def test_prewarm_with_disk_cache_enabled(tmp_path, monkeypatch) -> None:
+    import sqlite3
+
+    from layout.text_cache import get_text_geometry_cache
+    from template.prewarm import prewarm_text
+
+    db = tmp_path / "text.sqlite3"
+    monkeypatch.setenv("TEXT_CACHE", str(db))
+    monkeypatch.setenv("TEXT_PREWARM", "1")
+    cache = get_text_geometry_cache()
+    # 父进程先打开连接，子进程不能沿用它
+    assert cache is not None and cache.load("prewarm probe", "Sans", 20) is None
+    requests = [TextRequest("prewarm alpha", "Sans", 24), TextRequest("prewarm beta", "Sans", 24)]
+    assert prewarm_text(requests, workers=2) == 2
+    with sqlite3.connect(str(db)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM geometry").fetchone()[0] >= 2
+    assert cache.load("prewarm alpha", "Sans", 24) is not None
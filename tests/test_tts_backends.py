@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+
+from plan.schema import problem_from_dict
+from tts import FakeBackend, config_from_env, synthesize_plan
+
+
+def test_fake_backend_is_deterministic_and_scales_with_text() -> None:
+    backend = FakeBackend(sample_rate=8000, chars_per_second=4.0, edge_silence=0.0)
+    results = dict(backend.synthesize_batch(["一二三四", "一二三四五六七八"]))
+    assert results[0].duration == 1.0
+    assert results[1].duration == 2.0
+    assert backend.render("一二三四").frames == results[0].frames
+
+
+def test_fake_backend_runs_without_model(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("PIPER_MODEL", raising=False)
+    monkeypatch.setenv("TTS_BACKEND", "fake")
+    monkeypatch.setenv("TTS_STORE", str(tmp_path / "store"))
+    config = config_from_env()
+    plan = problem_from_dict(
+        {
+            "problem_full_text": "题目",
+            "stem": "题干",
+            "questions": [{"question_text": "q", "steps": [{"line": "x", "subtitle": "由题意得，甲乙丙丁。"}]}],
+        }
+    )
+    manifest = json.loads(synthesize_plan(plan, tmp_path / "audio", config).read_text(encoding="utf-8"))
+    entry = manifest["entries"][0]
+    assert len(entry["chunks"]) == 2
+    assert entry["duration"] < entry["raw_duration"]
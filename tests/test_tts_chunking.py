@@ -0,0 +1,22 @@
+from tts.chunking import chunk_timings, concat_units, split_units, unit_pause
+from tts.pcm import PcmAudio
+
+
+def test_split_units_keeps_punctuation_and_merges_fragments() -> None:
+    assert split_units("由题意得，a 等于 1。代入数据，得 b 等于 2！") == [
+        "由题意得，",
+        "a 等于 1。",
+        "代入数据，",
+        "得 b 等于 2！",
+    ]
+    assert split_units("A，B。") == ["A，B。"]
+    assert split_units("   ") == []
+
+
+def test_concat_inserts_pauses_and_reports_timing() -> None:
+    a = PcmAudio(frames=b"\x01\x00" * 100, sample_rate=1000)
+    b = PcmAudio(frames=b"\x02\x00" * 50, sample_rate=1000)
+    pauses = [unit_pause("由题意得，", 0.25, 0.1)]
+    joined = concat_units([a, b], pauses)
+    assert joined.nframes == 100 + 100 + 50
+    assert chunk_timings([a.duration, b.duration], pauses) == [(0.0, 0.1), (0.2, 0.05)]
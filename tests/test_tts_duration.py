@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from plan.schema import problem_from_dict
+from tts import FakeBackend, TTSConfig, synthesize_plan
+from tts.duration import calibrate, fit_duration_model, prediction_error, write_predicted_manifest
+from tts.mix import time_stretch
+
+
+def test_fit_recovers_per_character_rate() -> None:
+    samples = [("字" * n + "，", 0.1 + 0.25 * n) for n in range(1, 30)]
+    model = fit_duration_model(samples)
+    assert abs(model.predict("字" * 40 + "，") - 10.1) < 0.05
+
+
+def test_calibrated_prediction_tracks_fake_backend(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("TTS_STORE", str(tmp_path / "store"))
+    config = TTSConfig(backend="fake", trim_silence=False, loudness_dbfs=None)
+    backend = FakeBackend(sample_rate=8000, chars_per_second=5.0, edge_silence=0.0)
+    steps = [{"line": "x", "subtitle": "甲" * (3 + i) + "，" + "乙" * (2 + 2 * i) + "。"} for i in range(10)]
+    plan = problem_from_dict(
+        {"problem_full_text": "题目", "stem": "题干", "questions": [{"question_text": "q", "steps": steps}]}
+    )
+    manifest = synthesize_plan(plan, tmp_path / "audio" / "p1", config, backend=backend)
+    model = calibrate(tmp_path / "audio")
+    predicted = write_predicted_manifest(
+        plan, tmp_path / "predicted.json", model, sentence_pause=config.sentence_pause_s, clause_pause=config.clause_pause_s
+    )
+    assert json.loads(predicted.read_text(encoding="utf-8"))["entries"][0]["predicted"] is True
+    assert prediction_error(predicted, manifest) < 0.05
+
+
+def test_time_stretch_shortens_by_ratio() -> None:
+    samples = np.sin(np.arange(22050) / 12.0).astype(np.float32)
+    stretched = time_stretch(samples, 1.2)
+    assert abs(stretched.size - samples.size / 1.2) < 1024
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from plan.schema import problem_from_dict
+from tts import FakeBackend, TTSConfig, synthesize_plan
+from tts.manifest import ManifestJournal
+
+
+class _CrashingBackend(FakeBackend):
+    def __init__(self, crash_after: int) -> None:
+        super().__init__(sample_rate=8000)
+        self.crash_after = crash_after
+        self.calls: list[str] = []
+
+    def synthesize_batch(self, texts):
+        for index, text in enumerate(texts):
+            if len(self.calls) == self.crash_after:
+                raise RuntimeError("worker died")
+            self.calls.append(text)
+            yield index, self.render(text)
+
+
+def _plan():
+    steps = [{"line": "x", "subtitle": f"第{i}步结论成立。"} for i in range(6)]
+    return problem_from_dict(
+        {"problem_full_text": "题目", "stem": "题干", "questions": [{"question_text": "q", "steps": steps}]}
+    )
+
+
+def test_rerun_resumes_after_crash_without_store(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("TTS_STORE", "off")
+    config = TTSConfig(backend="fake")
+    out_dir = tmp_path / "audio"
+
+    first = _CrashingBackend(crash_after=4)
+    with pytest.raises(RuntimeError):
+        synthesize_plan(_plan(), out_dir, config, backend=first)
+    _, units = ManifestJournal(out_dir / "manifest.json").load()
+    assert len(units) == 4
+
+    second = _CrashingBackend(crash_after=100)
+    manifest = json.loads(synthesize_plan(_plan(), out_dir, config, backend=second).read_text(encoding="utf-8"))
+    assert len(second.calls) == 2
+    assert [e["s"] for e in manifest["entries"]] == [1, 2, 3, 4, 5, 6]
+    assert not (out_dir / "manifest.log").exists()
+
+
+def test_journal_skips_torn_last_line(tmp_path: Path) -> None:
+    journal = ManifestJournal(tmp_path / "manifest.json", compact_every=1000)
+    journal.append_unit("a" * 40, 1.5)
+    with open(journal.log_path, "a", encoding="utf-8") as fh:
+        fh.write('{"type": "unit", "audio": "bbb')
+    _, units = journal.load()
+    assert units == {"a" * 40: 1.5}
+    journal.append_unit("c" * 40, 0.5)
+    _, units = journal.load()
+    assert units == {"a" * 40: 1.5, "c" * 40: 0.5}
@@ -0,0 +1,139 @@
+import json
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tts.mix import build_narration_track
+
+
+def _write_wav(path: Path, value: int, frames: int, rate: int = 1000) -> None:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.full(frames, value, dtype="<i2").tobytes())
+
+
+def test_clips_are_placed_at_recorded_start_times(tmp_path: Path) -> None:
+    _write_wav(tmp_path / "a.wav", 1000, 200)
+    _write_wav(tmp_path / "b.wav", 2000, 100)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "format": "tts_manifest_v1",
+                "base_dir": ".",
+                "entries": [{"q": 1, "s": 1, "path": "a.wav"}, {"q": 1, "s": 2, "path": "b.wav"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    timeline = tmp_path / "timeline.json"
+    timeline.write_text(
+        json.dumps(
+            {
+                "format": "audio_timeline_v1",
+                "video": None,
+                "events": [{"q": 1, "s": 1, "start": 0.5}, {"q": 1, "s": 2, "start": 0.65}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    out = build_narration_track(manifest, timeline, tmp_path / "narration.wav")
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getframerate() == 1000
+        track = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    assert track.size == 750
+    assert not track[:500].any()
+    assert abs(int(track[600]) - 1000) <= 1
+    assert abs(int(track[680]) - 3000) <= 1
+    assert abs(int(track[720]) - 2000) <= 1
+
+
+def test_missing_clip_names_the_step(tmp_path: Path) -> None:
+    _write_wav(tmp_path / "a.wav", 1000, 200)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "format": "tts_manifest_v1",
+                "base_dir": ".",
+                "entries": [{"q": 1, "s": 1, "path": "a.wav"}, {"q": 1, "s": 2, "path": "gone.wav"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    timeline = tmp_path / "timeline.json"
+    timeline.write_text(
+        json.dumps(
+            {
+                "format": "audio_timeline_v1",
+                "video": None,
+                "events": [{"q": 1, "s": 1, "start": 0.0}, {"q": 1, "s": 2, "start": 0.5}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    with pytest.raises(FileNotFoundError, match="Q1S2"):
+        build_narration_track(manifest, timeline, tmp_path / "narration.wav")
+
+
+def test_last_clip_is_kept_within_video_duration(tmp_path: Path) -> None:
+    _write_wav(tmp_path / "a.wav", 1000, 500)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps({"format": "tts_manifest_v1", "base_dir": ".", "entries": [{"q": 1, "s": 1, "path": "a.wav"}]}),
+        encoding="utf-8",
+    )
+    timeline = tmp_path / "timeline.json"
+    timeline.write_text(
+        json.dumps(
+            {
+                "format": "audio_timeline_v1",
+                "video": None,
+                "duration": 0.8,
+                "events": [{"q": 1, "s": 1, "start": 0.4}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    out = build_narration_track(manifest, timeline, tmp_path / "narration.wav", fit_slots=True)
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getnframes() == 800
+
+
+def test_real_duration_mix_keeps_clip_lengths(tmp_path: Path) -> None:
+    # 按真实时长排出的时间轴：前一段比时间槽长时也不变速
+    _write_wav(tmp_path / "a.wav", 1000, 400)
+    _write_wav(tmp_path / "b.wav", 2000, 100)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "format": "tts_manifest_v1",
+                "base_dir": ".",
+                "entries": [{"q": 1, "s": 1, "path": "a.wav"}, {"q": 1, "s": 2, "path": "b.wav"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    timeline = tmp_path / "timeline.json"
+    timeline.write_text(
+        json.dumps(
+            {
+                "format": "audio_timeline_v1",
+                "video": None,
+                "events": [{"q": 1, "s": 1, "start": 0.0}, {"q": 1, "s": 2, "start": 0.35}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    out = build_narration_track(manifest, timeline, tmp_path / "narration.wav")
+    with wave.open(str(out), "rb") as wf:
+        track = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    assert track.size == 450
+    assert abs(int(track[340]) - 1000) <= 1
+    assert abs(int(track[380]) - 3000) <= 1
+    assert abs(int(track[420]) - 2000) <= 1
@@ -0,0 +1,29 @@
+import numpy as np
+
+from tts.pcm import PcmAudio
+from tts.postprocess import normalize_loudness, trim_silence
+
+
+def _pcm(samples: np.ndarray, rate: int = 8000) -> PcmAudio:
+    return PcmAudio(frames=(samples * 32767).astype("<i2").tobytes(), sample_rate=rate)
+
+
+def _tone(seconds: float, amp: float, rate: int = 8000) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return amp * np.sin(2 * np.pi * 200 * t)
+
+
+def test_trim_removes_leading_and_trailing_silence() -> None:
+    samples = np.concatenate((np.zeros(4000), _tone(0.5, 0.5), np.zeros(8000)))
+    (trimmed,) = trim_silence([_pcm(samples)], threshold_db=-40.0, pad_ms=20.0)
+    assert 0.5 <= trimmed.duration <= 0.56
+
+
+def test_loudness_is_levelled_across_steps() -> None:
+    quiet, loud = normalize_loudness([_pcm(_tone(0.2, 0.05)), _pcm(_tone(0.3, 0.6))], target_dbfs=-20.0)
+    levels = []
+    for audio in (quiet, loud):
+        x = np.frombuffer(audio.frames, dtype="<i2").astype(np.float32) / 32768.0
+        levels.append(20 * np.log10(np.sqrt(np.mean(x * x))))
+    assert abs(levels[0] + 20.0) < 0.2
+    assert abs(levels[1] + 20.0) < 0.2
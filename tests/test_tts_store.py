@@ -0,0 +1,56 @@
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from tts.store import AudioStore, decode_pcm, encode_pcm
+
+
+def _write_wav(path: Path, seconds: float, rate: int = 16000) -> None:
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 6000).astype("<i2")
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+
+
+def test_encoding_is_lossless_and_smaller() -> None:
+    frames = (np.random.default_rng(0).normal(0, 3000, 8000)).astype("<i2").tobytes()
+    blob = encode_pcm(frames, 22050)
+    assert decode_pcm(blob) == (frames, 22050, 1, 2)
+    tone = (np.sin(np.arange(16000) / 7) * 9000).astype("<i2").tobytes()
+    assert len(encode_pcm(tone, 16000)) < len(tone) // 2
+
+
+def test_store_roundtrip_and_lru_eviction(tmp_path: Path) -> None:
+    src = tmp_path / "src.wav"
+    _write_wav(src, 0.5)
+    store = AudioStore(tmp_path / "store", max_bytes=0)
+    entry = store.put_wav("a" * 40, src)
+    assert abs(entry.duration - 0.5) < 1e-6
+    out = store.materialize("a" * 40, tmp_path / "out.wav")
+    assert out.read_bytes()[44:] == src.read_bytes()[44:]
+
+    store.max_bytes = entry.size * 2 + entry.size // 2
+    store.put_wav("b" * 40, src)
+    store.get("a" * 40)
+    store.put_wav("c" * 40, src)
+    assert store.get("b" * 40) is None
+    assert store.get("a" * 40) is not None
+    assert store.get("c" * 40) is not None
+
+
+def test_lookups_batch_lru_touches_until_flush(tmp_path: Path) -> None:
+    src = tmp_path / "src.wav"
+    _write_wav(src, 0.1)
+    store = AudioStore(tmp_path / "store", max_bytes=0)
+    store.put_wav("a" * 40, src)
+    conn = store._connect()
+    before = conn.total_changes
+    for _ in range(5):
+        assert store.get("a" * 40) is not None
+    assert conn.total_changes == before
+    store.flush()
+    assert conn.total_changes == before + 1
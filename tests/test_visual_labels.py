@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from visuals.library.labels import _label_cache, make_label, tick_label
+
+
+def test_labels_share_cached_geometry() -> None:
+    first = tick_label(2.0, font="Sans", font_size=20, color="#ffffff")
+    hits = _label_cache.stats().hits
+    second = make_label("2", font="Sans", font_size=20, color="#ffffff")
+    assert _label_cache.stats().hits == hits + 1
+    a = first.family_members_with_points()[0]
+    b = second.family_members_with_points()[0]
+    assert np.shares_memory(a.points, b.points)
+    first.shift(np.array([1.0, 0.0, 0.0]))
+    assert second.get_center()[0] == pytest.approx(first.get_center()[0] - 1.0)
+
+
+def test_moving_or_recoloring_a_label_leaves_its_twin_alone() -> None:
+    import manim
+
+    first = make_label("v_0", font="Sans", font_size=24, color="#ffffff")
+    second = make_label("v_0", font="Sans", font_size=24, color="#ffffff")
+    center = second.get_center().copy()
+    points = [m.points.copy() for m in second.family_members_with_points()]
+    fill = [m.get_fill_color() for m in second.family_members_with_points()]
+    first.move_to(np.array([3.0, -2.0, 0.0])).scale(1.4)
+    first.set_color(manim.RED)
+    assert np.allclose(second.get_center(), center)
+    for mob, before, color in zip(second.family_members_with_points(), points, fill):
+        assert np.array_equal(mob.points, before)
+        assert mob.get_fill_color() == color
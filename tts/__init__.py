@@ -1,3 +1,13 @@
-from .piper import AudioEntry, TTSConfig, config_from_env, synthesize_plan
+from .backends import FakeBackend, TTSBackend, make_backend
+from .piper import AudioEntry, PiperBackend, TTSConfig, config_from_env, synthesize_plan
 
-__all__ = ["AudioEntry", "TTSConfig", "config_from_env", "synthesize_plan"]
+__all__ = [
+    "AudioEntry",
+    "FakeBackend",
+    "PiperBackend",
+    "TTSBackend",
+    "TTSConfig",
+    "config_from_env",
+    "make_backend",
+    "synthesize_plan",
+]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import TYPE_CHECKING, Iterator, Protocol, Sequence
+
+import numpy as np
+
+from .pcm import PcmAudio
+
+if TYPE_CHECKING:
+    from .piper import TTSConfig
+
+# TTS 后端协议：一批文本 → 按完成顺序产出 (下标, PCM)。
+# synthesize_plan 只依赖这个协议，缓存、分句、后处理、manifest 逻辑对所有后端共用。
+
+
+class TTSBackend(Protocol):
+    name: str
+
+    def signature(self) -> str:
+        """
+        参与音频缓存 key 的后端指纹（模型、参数等），指纹不同的音频互不复用
+        """
+        ...
+
+    def synthesize_batch(self, texts: Sequence[str]) -> Iterator[tuple[int, PcmAudio]]:
+        """
+        合成一批文本，按完成顺序逐个产出 (texts 中的下标, PCM)
+        """
+        ...
+
+
+class FakeBackend:
+    """
+    确定性的本地假引擎：不需要模型文件，时长按字数估算，内容为与文本哈希绑定的正弦音或静音。
+    用于 CI、基准测试与渲染时序调试；相同输入永远得到相同输出。
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 22050,
+        chars_per_second: float = 4.5,
+        mode: str = "tone",
+        min_duration: float = 0.3,
+        edge_silence: float = 0.08,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.chars_per_second = max(0.1, chars_per_second)
+        self.mode = mode if mode in {"tone", "silence"} else "tone"
+        self.min_duration = min_duration
+        self.edge_silence = edge_silence
+
+    def signature(self) -> str:
+        return f"fake:{self.mode}:{self.sample_rate}:{self.chars_per_second:.3f}:{self.min_duration:.3f}:{self.edge_silence:.3f}"
+
+    def duration_for(self, text: str) -> float:
+        chars = sum(1 for ch in text if not ch.isspace())
+        return max(self.min_duration, chars / self.chars_per_second)
+
+    def render(self, text: str) -> PcmAudio:
+        voiced = int(round(self.duration_for(text) * self.sample_rate))
+        edge = int(round(self.edge_silence * self.sample_rate))
+        samples = np.zeros(voiced + 2 * edge, dtype=np.float32)
+        if self.mode == "tone" and voiced:
+            # 频率由文本哈希决定（180~420 Hz），首尾加 10 ms 淡入淡出避免爆音
+            seed = int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+            freq = 180.0 + (seed % 240)
+            t = np.arange(voiced, dtype=np.float32) / self.sample_rate
+            tone = 0.3 * np.sin(2.0 * math.pi * freq * t)
+            ramp = min(voiced // 2, int(0.01 * self.sample_rate))
+            if ramp:
+                fade = np.linspace(0.0, 1.0, ramp, dtype=np.float32)
+                tone[:ramp] *= fade
+                tone[-ramp:] *= fade[::-1]
+            samples[edge:edge + voiced] = tone
+        pcm = (samples * 32767.0).astype("<i2")
+        return PcmAudio(frames=pcm.tobytes(), sample_rate=self.sample_rate)
+
+    def synthesize_batch(self, texts: Sequence[str]) -> Iterator[tuple[int, PcmAudio]]:
+        for index, text in enumerate(texts):
+            yield index, self.render(text)
+
+
+def make_backend(config: TTSConfig) -> TTSBackend:
+    """
+    按 TTSConfig.backend 创建后端：piper（默认）或 fake
+    """
+    if config.backend == "fake":
+        return FakeBackend(
+            sample_rate=config.fake_sample_rate,
+            chars_per_second=config.fake_chars_per_second,
+            mode=config.fake_mode,
+        )
+    if config.backend != "piper":
+        raise ValueError(f"unknown TTS backend: {config.backend}")
+    from .piper import PiperBackend
+
+    return PiperBackend(config)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import re
+from typing import List, Sequence
+
+from .pcm import PcmAudio
+
+# 旁白分句：按句末 / 分句标点切成朗读单元，相同单元（“由题意得”“代入数据”等套话）在整个 plan 内只合成一次，
+# 再按标点类型插入停顿拼回每一步的音频。
+
+_UNIT_RE = re.compile(r"[^。！？!?；;，,：:\n]+[。！？!?；;，,：:\n]*")
+_SENTENCE_END = set("。！？!?\n")
+_MIN_UNIT_CHARS = 2
+
+
+def split_units(text: str) -> List[str]:
+    """
+    将旁白切分为句子 / 分句单元，标点保留在单元末尾以维持语调；过短的碎片并入前一个单元
+    :param text: 一步的旁白文本
+    :return: 非空单元列表（无可切分内容时返回 [text.strip()]）
+    """
+    units: List[str] = []
+    for match in _UNIT_RE.finditer(text):
+        unit = match.group(0).strip()
+        if not unit:
+            continue
+        body = unit.rstrip("。！？!?；;，,：:")
+        if units and len(body.strip()) < _MIN_UNIT_CHARS:
+            units[-1] = units[-1] + unit
+            continue
+        units.append(unit)
+    stripped = text.strip()
+    return units or ([stripped] if stripped else [])
+
+
+def unit_pause(unit: str, sentence_pause: float, clause_pause: float) -> float:
+    """
+    单元之后的停顿：句末标点用 sentence_pause，其余（逗号、分号、冒号）用 clause_pause
+    """
+    tail = unit.rstrip()[-1:] if unit.strip() else ""
+    return sentence_pause if tail in _SENTENCE_END else clause_pause
+
+
+def chunk_timings(durations: Sequence[float], pauses: Sequence[float]) -> List[tuple[float, float]]:
+    """
+    由各单元时长与其后的停顿计算每个单元在整步音频中的 (start, duration)；最后一个单元之后不加停顿
+    """
+    timings: List[tuple[float, float]] = []
+    cursor = 0.0
+    for i, duration in enumerate(durations):
+        timings.append((cursor, duration))
+        cursor += duration
+        if i < len(durations) - 1:
+            cursor += pauses[i]
+    return timings
+
+
+def concat_units(units: Sequence[PcmAudio], pauses: Sequence[float]) -> PcmAudio:
+    """
+    按顺序拼接单元 PCM，单元之间插入静音；所有单元需为同一采样格式（同一模型输出）
+    """
+    if not units:
+        raise ValueError("no audio units to concatenate")
+    first = units[0]
+    frame_bytes = first.sampwidth * first.channels
+    parts: List[bytes] = []
+    for i, unit in enumerate(units):
+        if (unit.sample_rate, unit.channels, unit.sampwidth) != (first.sample_rate, first.channels, first.sampwidth):
+            raise ValueError("audio units have mismatched sample formats")
+        parts.append(unit.frames)
+        if i < len(units) - 1 and pauses[i] > 0:
+            parts.append(b"\x00" * (int(round(pauses[i] * first.sample_rate)) * frame_bytes))
+    return PcmAudio(
+        frames=b"".join(parts),
+        sample_rate=first.sample_rate,
+        channels=first.channels,
+        sampwidth=first.sampwidth,
+    )
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from plan.narration import attach_narration, build_narration
+from plan.schema import ProblemPlan
+
+from .chunking import split_units, unit_pause
+from .manifest import MANIFEST_FORMAT
+
+# 旁白时长预测：用已有 manifest 中每个分句单元的 (朗读文本, 实际时长) 拟合一个线性模型，
+# 特征为汉字数、拉丁字母数、数字数、分句 / 句末标点数与常数项。
+# 渲染可以先用预测时长排时间轴，与 TTS 并行；真实音频出来后由 tts.mix 在混音时对齐。
+
+_CJK_RE = re.compile(r"[㐀-鿿豈-﫿]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+_DIGIT_RE = re.compile(r"[0-9]")
+_CLAUSE_RE = re.compile(r"[，,；;：:、]")
+_SENTENCE_RE = re.compile(r"[。！？!?]")
+_FEATURES = ("bias", "cjk", "latin", "digit", "clause", "sentence")
+# 无标定数据时的默认值（普通话约 4.5 字/秒）
+_DEFAULT_COEF = (0.12, 0.22, 0.09, 0.16, 0.05, 0.0)
+_MIN_SAMPLES = 12
+
+
+def text_features(text: str) -> np.ndarray:
+    return np.array(
+        [
+            1.0,
+            len(_CJK_RE.findall(text)),
+            len(_LATIN_RE.findall(text)),
+            len(_DIGIT_RE.findall(text)),
+            len(_CLAUSE_RE.findall(text)),
+            len(_SENTENCE_RE.findall(text)),
+        ],
+        dtype=np.float64,
+    )
+
+
+@dataclass(frozen=True)
+class DurationModel:
+    coef: tuple[float, ...] = _DEFAULT_COEF
+    samples: int = 0
+    mae: float = 0.0
+
+    def predict(self, text: str) -> float:
+        """
+        预测一个朗读单元的时长（秒，已裁剪首尾静音）
+        """
+        if not text.strip():
+            return 0.0
+        return max(0.1, float(text_features(text) @ np.asarray(self.coef)))
+
+    def predict_step(self, text: str, sentence_pause: float, clause_pause: float, chunking: bool = True) -> float:
+        """
+        预测一步旁白的时长：各单元预测之和加上单元之间的停顿，与 synthesize_plan 的拼接方式一致
+        """
+        units = split_units(text) if chunking else [text.strip()]
+        if not units:
+            return 0.0
+        pauses = sum(unit_pause(u, sentence_pause, clause_pause) for u in units[:-1])
+        return sum(self.predict(u) for u in units) + pauses
+
+    def to_dict(self) -> dict:
+        return {"features": list(_FEATURES), "coef": list(self.coef), "samples": self.samples, "mae": self.mae}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DurationModel":
+        coef = tuple(float(c) for c in data.get("coef", _DEFAULT_COEF))
+        if len(coef) != len(_FEATURES):
+            return cls()
+        return cls(coef=coef, samples=int(data.get("samples", 0)), mae=float(data.get("mae", 0.0)))
+
+
+def fit_duration_model(samples: Sequence[tuple[str, float]]) -> DurationModel:
+    """
+    最小二乘拟合（系数截断为非负）；样本过少时返回默认模型
+    :param samples: (朗读单元文本, 实际时长) 列表
+    """
+    rows = [(text, duration) for text, duration in samples if text.strip() and duration > 0]
+    if len(rows) < _MIN_SAMPLES:
+        return DurationModel()
+    x = np.stack([text_features(text) for text, _ in rows])
+    y = np.array([duration for _, duration in rows], dtype=np.float64)
+    coef, *_ = np.linalg.lstsq(x, y, rcond=None)
+    coef = np.clip(coef, 0.0, None)
+    mae = float(np.mean(np.abs(x @ coef - y)))
+    return DurationModel(coef=tuple(float(c) for c in coef), samples=len(rows), mae=round(mae, 4))
+
+
+def manifest_samples(manifest_paths: Iterable[Path]) -> List[tuple[str, float]]:
+    """
+    从 manifest 中收集训练样本：有分句记录时按单元取样，否则按整步取样
+    """
+    samples: List[tuple[str, float]] = []
+    for path in manifest_paths:
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for entry in data.get("entries", []) if isinstance(data, dict) else []:
+            if not isinstance(entry, dict) or entry.get("predicted"):
+                continue
+            chunks = entry.get("chunks")
+            if isinstance(chunks, list) and chunks:
+                samples.extend((str(c.get("text", "")), float(c.get("duration", 0.0))) for c in chunks)
+            elif entry.get("text") and entry.get("duration"):
+                samples.append((str(entry["text"]), float(entry["duration"])))
+    return samples
+
+
+def calibrate(audio_root: Path, model_path: Optional[Path] = None) -> DurationModel:
+    """
+    用 audio_root 下所有 plan 的 manifest 重新标定模型；给出 model_path 时同时保存
+    """
+    model = fit_duration_model(manifest_samples(sorted(Path(audio_root).glob("*/manifest.json"))))
+    if model_path is not None:
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        model_path.write_text(json.dumps(model.to_dict(), indent=2), encoding="utf-8")
+    return model
+
+
+def load_duration_model(audio_root: Path) -> DurationModel:
+    """
+    读取 audio_root/duration_model.json；不存在或比任一 manifest 旧时重新标定
+    """
+    model_path = Path(audio_root) / "duration_model.json"
+    manifests = list(Path(audio_root).glob("*/manifest.json"))
+    try:
+        mtime = model_path.stat().st_mtime
+        if all(p.stat().st_mtime <= mtime for p in manifests):
+            return DurationModel.from_dict(json.loads(model_path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        pass
+    return calibrate(audio_root, model_path)
+
+
+def write_predicted_manifest(
+    plan: ProblemPlan,
+    out_path: Path,
+    model: DurationModel,
+    *,
+    sentence_pause: float,
+    clause_pause: float,
+    chunking: bool = True,
+) -> Path:
+    """
+    写出只含预测时长的 manifest（entries 标记 predicted，不引用任何音频），供渲染提前开始
+    """
+    attach_narration(plan)
+    entries = []
+    for qi, q in enumerate(plan.questions, start=1):
+        for si, step in enumerate(q.steps, start=1):
+            text = step.narration or build_narration(step)
+            duration = model.predict_step(text, sentence_pause, clause_pause, chunking)
+            entries.append({"q": qi, "s": si, "path": "", "duration": round(duration, 4), "text": text, "predicted": True})
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"format": MANIFEST_FORMAT, "base_dir": ".", "entries": entries}
+    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return out_path
+
+
+def prediction_error(predicted_manifest: Path, manifest: Path) -> float:
+    """
+    预测 manifest 与真实 manifest 按 (q, s) 对齐后的平均绝对误差（秒）
+    """
+    def _durations(path: Path) -> dict[tuple[int, int], float]:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return {(int(e["q"]), int(e["s"])): float(e.get("duration", 0.0)) for e in data.get("entries", [])}
+
+    predicted = _durations(predicted_manifest)
+    actual = _durations(manifest)
+    common = [key for key in predicted if key in actual]
+    if not common:
+        return 0.0
+    return float(np.mean([abs(predicted[k] - actual[k]) for k in common]))
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 下退化为仅进程内加锁
+    fcntl = None
+
+# 增量 manifest：manifest.json 为最近一次压实的快照，manifest.log 为其后追加的 NDJSON 记录。
+# 每合成完一个单元 / 拼好一步就追加一行（flock 互斥，多进程可同时写），每 N 行压实一次：
+# 合并快照与日志 → 写临时文件 → os.replace 原子替换 → 清空日志。
+# 进程中途崩溃时已完成的结果都在快照或日志里，重跑会从断点继续。
+
+MANIFEST_FORMAT = "tts_manifest_v1"
+_DEFAULT_COMPACT_EVERY = 50
+
+
+@contextmanager
+def _flock(fh) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _compact_every() -> int:
+    try:
+        return max(1, int(os.environ.get("TTS_MANIFEST_COMPACT_EVERY", str(_DEFAULT_COMPACT_EVERY))))
+    except ValueError:
+        return _DEFAULT_COMPACT_EVERY
+
+
+class ManifestJournal:
+    """
+    manifest.json + manifest.log 的读写；units / steps 按音频内容哈希记录，entries 为最终按 (q, s) 排好的列表
+    """
+
+    def __init__(self, manifest_path: Path, *, compact_every: Optional[int] = None) -> None:
+        self.path = Path(manifest_path)
+        self.log_path = self.path.with_suffix(".log")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.compact_every = compact_every or _compact_every()
+        self._pending = 0
+        self._mutex = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._mutex, open(self.lock_path, "a+b") as fh, _flock(fh):
+            yield
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _read_log(self) -> List[Dict[str, Any]]:
+        try:
+            raw = self.log_path.read_text(encoding="utf-8")
+        except OSError:
+            return []
+        records: List[Dict[str, Any]] = []
+        for line in raw.split("\n"):
+            # 崩溃时最后一行可能只写了一半，解析失败直接跳过
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+
+    def _merged(self) -> Dict[str, Any]:
+        snapshot = self._read_snapshot()
+        units: Dict[str, float] = dict(snapshot.get("units") or {})
+        steps: Dict[str, Dict[str, Any]] = dict(snapshot.get("steps") or {})
+        if not steps:
+            # 兼容只有 entries 的旧 manifest：按音频哈希恢复每步记录
+            for entry in snapshot.get("entries", []):
+                if isinstance(entry, dict) and entry.get("audio") and isinstance(entry.get("chunks"), list):
+                    steps[str(entry["audio"])] = entry
+        for record in self._read_log():
+            kind = record.get("type")
+            if kind == "unit" and record.get("audio"):
+                units[str(record["audio"])] = float(record.get("duration", 0.0))
+            elif kind == "step" and record.get("audio"):
+                steps[str(record["audio"])] = {k: v for k, v in record.items() if k != "type"}
+        return {
+            "format": MANIFEST_FORMAT,
+            "base_dir": snapshot.get("base_dir", "."),
+            "entries": list(snapshot.get("entries", [])),
+            "steps": steps,
+            "units": units,
+        }
+
+    def load(self) -> tuple[Dict[str, Dict[str, Any]], Dict[str, float]]:
+        """
+        读取快照与日志，返回 (音频哈希 → 步骤记录, 单元哈希 → 时长)
+        """
+        with self._locked():
+            merged = self._merged()
+        return merged["steps"], merged["units"]
+
+    def _write_atomic(self, payload: Dict[str, Any]) -> None:
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.path)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._locked():
+            with open(self.log_path, "a+b") as fh:
+                # 上次崩溃留下的半行不能与新记录粘在一起，先补一个换行把它隔开
+                fh.seek(0, os.SEEK_END)
+                if fh.tell():
+                    fh.seek(-1, os.SEEK_END)
+                    if fh.read(1) != b"\n":
+                        line = b"\n" + line
+                fh.write(line)
+                fh.flush()
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact_locked(None)
+
+    def append_unit(self, audio: str, duration: float) -> None:
+        self.append({"type": "unit", "audio": audio, "duration": round(duration, 6)})
+
+    def append_step(self, record: Dict[str, Any]) -> None:
+        self.append({"type": "step", **record})
+
+    def _compact_locked(self, entries: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        merged = self._merged()
+        if entries is not None:
+            merged["entries"] = entries
+            # 最终压实只保留当前 plan 引用的记录，避免快照无限增长
+            used_steps = {str(e.get("audio")) for e in entries}
+            used_units = {str(c.get("audio")) for e in entries for c in e.get("chunks", [])}
+            merged["steps"] = {k: v for k, v in merged["steps"].items() if k in used_steps}
+            merged["units"] = {k: v for k, v in merged["units"].items() if k in used_units}
+        self._write_atomic(merged)
+        self.log_path.unlink(missing_ok=True)
+        self._pending = 0
+        return merged
+
+    def compact(self, entries: Optional[List[Dict[str, Any]]] = None) -> Path:
+        """
+        合并快照与日志并原子替换 manifest.json；传入 entries 时作为最终结果写入
+        """
+        with self._locked():
+            self._compact_locked(entries)
+        return self.path
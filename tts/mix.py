@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .pcm import PcmAudio, read_wav, write_wav
+from .store import get_audio_store
+
+# 渲染后混音：场景只在时间轴（AUDIO_TIMELINE）上记录每步旁白的起点，
+# 这里按 manifest 把所有片段一次性放进同一条 PCM 轨道，再用 ffmpeg 以 -c:v copy 封装到无声视频上。
+# 代价与旁白总时长成正比，不再随步数 × 视频长度增长。
+
+
+def _to_mono(audio: PcmAudio, sample_rate: int) -> np.ndarray:
+    if audio.sampwidth != 2:
+        raise ValueError(f"unsupported sample width {audio.sampwidth}")
+    samples = np.frombuffer(audio.frames, dtype="<i2").astype(np.float32) / 32768.0
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels).mean(axis=1)
+    if audio.sample_rate != sample_rate and samples.size:
+        # 采样率不一致时线性插值重采样（同一模型输出的片段通常不会走到这里）
+        target = int(round(samples.size * sample_rate / audio.sample_rate))
+        samples = np.interp(np.linspace(0, samples.size - 1, target), np.arange(samples.size), samples).astype(np.float32)
+    return samples
+
+
+def time_stretch(samples: np.ndarray, ratio: float, window: int = 1024) -> np.ndarray:
+    """
+    重叠相加（OLA）变速不变调：ratio > 1 加快（输出变短），ratio < 1 放慢
+    帧的切分与加窗一次向量化完成，仅用于在混音时把略超出时间槽的旁白压回槽内。
+    """
+    if samples.size <= window or abs(ratio - 1.0) < 1e-3:
+        return samples
+    synth_hop = window // 2
+    analysis_hop = synth_hop * ratio
+    count = int((samples.size - window) / analysis_hop) + 1
+    starts = (np.arange(count) * analysis_hop).astype(np.int64)
+    win = np.hanning(window).astype(np.float32)
+    frames = samples[starts[:, None] + np.arange(window)] * win
+    out_len = (count - 1) * synth_hop + window
+    out = np.zeros(out_len, dtype=np.float32)
+    norm = np.zeros(out_len, dtype=np.float32)
+    index = (np.arange(count) * synth_hop)[:, None] + np.arange(window)
+    np.add.at(out, index, frames)
+    np.add.at(norm, index, np.broadcast_to(win, frames.shape))
+    return out / np.maximum(norm, 1e-3)
+
+
+def _max_stretch() -> float:
+    try:
+        return max(1.0, float(os.environ.get("AUDIO_MAX_STRETCH", "1.25")))
+    except ValueError:
+        return 1.25
+
+
+def _fit_to_slots(
+    clips: List[tuple[int, np.ndarray]], sample_rate: int, end: Optional[int] = None
+) -> List[tuple[int, np.ndarray]]:
+    # 对齐：用预测时长渲染时，真实旁白可能比时间槽（到下一段旁白起点）更长，
+    # 在 AUDIO_MAX_STRETCH 倍以内变速压回槽内，更长的部分只能与下一段轻微重叠；
+    # 最后一段的时间槽到视频结束（end，采样数）为止
+    limit = _max_stretch()
+    gap = int(0.05 * sample_rate)
+    fitted: List[tuple[int, np.ndarray]] = []
+    ordered = sorted(clips, key=lambda item: item[0])
+    for i, (offset, clip) in enumerate(ordered):
+        slot = 0
+        if i + 1 < len(ordered):
+            slot = ordered[i + 1][0] - offset - gap
+        elif end is not None:
+            slot = end - offset
+        if limit > 1.0 and slot > 0 and clip.size > slot:
+            clip = time_stretch(clip, min(limit, clip.size / slot))
+        fitted.append((offset, clip))
+    return fitted
+
+
+def _load_clip(path: Optional[Path], key: str) -> Optional[PcmAudio]:
+    # 优先读 plan 目录下的 WAV；未落地逐步 WAV 时按内容哈希直接从音频库解码
+    if path is not None and path.exists():
+        return read_wav(path)
+    store = get_audio_store() if key else None
+    if store is not None and store.get(key) is not None:
+        return store.load_pcm(key)
+    return None
+
+
+def load_timeline(timeline_path: Path) -> tuple[List[Dict[str, object]], Optional[str]]:
+    events, video, _ = _read_timeline(timeline_path)
+    return events, video
+
+
+def _read_timeline(timeline_path: Path) -> tuple[List[Dict[str, object]], Optional[str], Optional[float]]:
+    # 第三项为场景结束时记录的视频时长（秒），旧时间轴没有时为 None
+    data = json.loads(Path(timeline_path).read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or data.get("format") != "audio_timeline_v1":
+        raise ValueError(f"not an audio timeline: {timeline_path}")
+    try:
+        duration = float(data["duration"]) if data.get("duration") is not None else None
+    except (TypeError, ValueError):
+        duration = None
+    return list(data.get("events", [])), data.get("video"), duration
+
+
+def _manifest_sources(manifest_path: Path) -> Dict[tuple[int, int], tuple[Optional[Path], str]]:
+    data = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+    base_dir = Path(manifest_path).parent / str(data.get("base_dir") or ".")
+    sources: Dict[tuple[int, int], tuple[Optional[Path], str]] = {}
+    for entry in data.get("entries", []):
+        try:
+            key = (int(entry["q"]), int(entry["s"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        rel = str(entry.get("path") or "")
+        path = None
+        if rel:
+            path = Path(rel) if Path(rel).is_absolute() else (base_dir / rel).resolve()
+        sources[key] = (path, str(entry.get("audio") or ""))
+    return sources
+
+
+def build_narration_track(
+    manifest_path: Path,
+    timeline_path: Path,
+    out_path: Path,
+    *,
+    sample_rate: Optional[int] = None,
+    fit_slots: bool = False,
+) -> Path:
+    """
+    按时间轴把 manifest 中的各步音频放到同一条单声道轨道上并写出 WAV
+    :param manifest_path: TTS manifest.json
+    :param timeline_path: 渲染时记录的 timeline.json（每步 q / s / start）
+    :param out_path: 输出 WAV 路径
+    :param sample_rate: 输出采样率，默认取第一段音频的采样率
+    :param fit_slots: 时间轴按预测时长排布时为 True，超出时间槽的片段变速压回槽内；
+        按真实时长渲染的时间轴保持原速
+    :return: out_path
+    """
+    events, _, duration = _read_timeline(timeline_path)
+    sources = _manifest_sources(manifest_path)
+    placed: list[tuple[float, PcmAudio]] = []
+    missing: list[tuple[int, int]] = []
+    for event in events:
+        try:
+            key = (int(event["q"]), int(event["s"]))
+            start = float(event["start"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        path, audio_hash = sources.get(key, (None, ""))
+        if path is None and event.get("path"):
+            path = Path(str(event["path"]))
+        audio = _load_clip(path, audio_hash)
+        if audio is None:
+            missing.append(key)
+            continue
+        placed.append((max(0.0, start), audio))
+    if missing:
+        # 常见原因：合成到混音之间音频库按容量淘汰了这些片段；宁可失败也不输出带静音空洞的视频
+        steps = ", ".join(f"Q{q}S{s}" for q, s in missing)
+        raise FileNotFoundError(f"narration audio missing for {steps} (evicted from TTS_STORE? re-run synthesis)")
+
+    if sample_rate is None:
+        sample_rate = placed[0][1].sample_rate if placed else 22050
+    clips = [(int(round(start * sample_rate)), _to_mono(audio, sample_rate)) for start, audio in placed]
+    end = int(round(duration * sample_rate)) if duration else None
+    if fit_slots:
+        clips = _fit_to_slots(clips, sample_rate, end)
+    length = max((offset + clip.size for offset, clip in clips), default=0)
+    if end is not None:
+        # 旁白轨不超过视频末帧：最后一段压缩后仍超出的部分截掉
+        length = min(length, end)
+    track = np.zeros(length, dtype=np.float32)
+    for offset, clip in clips:
+        if offset < length:
+            track[offset:offset + clip.size] += clip[: length - offset]
+
+    pcm = (np.clip(track, -1.0, 1.0) * 32767.0).astype("<i2")
+    return write_wav(Path(out_path), PcmAudio(frames=pcm.tobytes(), sample_rate=sample_rate))
+
+
+def mux_audio(video_path: Path, audio_path: Path, out_path: Optional[Path] = None) -> Path:
+    """
+    将旁白轨封装进视频：视频流直接复制（-c:v copy），只编码音频；out_path 缺省时原地替换
+    """
+    video_path = Path(video_path)
+    target = Path(out_path) if out_path else video_path
+    tmp = target.with_name(f"{target.stem}.muxing{target.suffix}")
+    codec = ["-c:a", "libopus"] if target.suffix.lower() == ".webm" else ["-c:a", "aac", "-b:a", "160k"]
+    cmd = [
+        os.environ.get("FFMPEG_BIN", "ffmpeg"),
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(video_path),
+        "-i",
+        str(audio_path),
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c:v",
+        "copy",
+        *codec,
+        "-shortest",
+        str(tmp),
+    ]
+    subprocess.run(cmd, check=True)
+    os.replace(tmp, target)
+    return target
+
+
+def mix_and_mux(
+    manifest_path: Path,
+    timeline_path: Path,
+    video_path: Optional[Path] = None,
+    *,
+    fit_slots: bool = False,
+) -> Optional[Path]:
+    """
+    渲染完成后的混音阶段：生成 narration.wav 并封装到场景记录的输出视频上；没有旁白事件时返回 None
+    :param fit_slots: 见 build_narration_track，仅在按预测时长渲染时打开
+    """
+    events, recorded_video = load_timeline(timeline_path)
+    video = Path(video_path) if video_path else (Path(recorded_video) if recorded_video else None)
+    if not events or video is None or not video.exists():
+        return None
+    track = build_narration_track(
+        manifest_path, timeline_path, Path(timeline_path).with_name("narration.wav"), fit_slots=fit_slots
+    )
+    return mux_audio(video, track)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import wave
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+# 内存中的 PCM 片段：合成结果在各阶段之间以原始采样传递，时长直接由采样数计算，
+# 只在最终容器（音频库 / 混音轨 / 需要时的 WAV）落盘一次。
+# 例外：常驻 Piper 进程的每句输出仍先写到 tmpfs 上的临时 WAV 再读回（原因见 tts.worker）。
+
+_DEFAULT_SAMPLE_RATE = 22050
+
+
+@dataclass(frozen=True)
+class PcmAudio:
+    frames: bytes
+    sample_rate: int
+    channels: int = 1
+    sampwidth: int = 2
+
+    @property
+    def nframes(self) -> int:
+        width = self.sampwidth * self.channels
+        return len(self.frames) // width if width else 0
+
+    @property
+    def duration(self) -> float:
+        return self.nframes / float(self.sample_rate) if self.sample_rate else 0.0
+
+
+def read_wav(path: Path) -> PcmAudio:
+    with wave.open(str(path), "rb") as wf:
+        return PcmAudio(
+            frames=wf.readframes(wf.getnframes()),
+            sample_rate=wf.getframerate(),
+            channels=wf.getnchannels(),
+            sampwidth=wf.getsampwidth(),
+        )
+
+
+def write_wav(path: Path, audio: PcmAudio) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(audio.channels)
+        wf.setsampwidth(audio.sampwidth)
+        wf.setframerate(audio.sample_rate)
+        wf.writeframes(audio.frames)
+    return path
+
+
+@lru_cache(maxsize=16)
+def model_sample_rate(model_path: str) -> int:
+    """
+    从 Piper 模型配置（<model>.onnx.json 的 audio.sample_rate）读取输出采样率，读不到时取 22050
+    """
+    for candidate in (Path(model_path + ".json"), Path(model_path).with_suffix(".json")):
+        try:
+            data = json.loads(candidate.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        try:
+            return int(data["audio"]["sample_rate"])
+        except (KeyError, TypeError, ValueError):
+            break
+    return _DEFAULT_SAMPLE_RATE
@@ -1,25 +1,52 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import os
+import queue
+import re
 import shlex
 import subprocess
 import wave
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 
 from plan.narration import attach_narration, build_narration
 from plan.schema import ProblemPlan
 
+from .backends import TTSBackend, make_backend
+from .chunking import chunk_timings, concat_units, split_units, unit_pause
+from .manifest import ManifestJournal
+from .pcm import PcmAudio, model_sample_rate, read_wav, write_wav
+from .postprocess import normalize_loudness, trim_silence
+from .store import audio_key, get_audio_store
+
+_AUDIO_NAME_LEN = 20
+_AUDIO_NAME_RE = re.compile(rf"[0-9a-f]{{{_AUDIO_NAME_LEN}}}\.wav")
+_LEGACY_NAME_RE = re.compile(r"q\d+_s\d+\.wav")
+
 
 @dataclass(frozen=True)
 class TTSConfig:
-    model_path: str
+    model_path: str = ""
+    backend: str = "piper"
     bin_path: str = "piper"
     extra_args: str = ""
     overwrite: bool = False
+    timeout_s: float = 60.0
+    persistent: bool = True
+    workers: int = 0
+    threads_per_worker: int = 2
+    chunking: bool = True
+    sentence_pause_s: float = 0.25
+    clause_pause_s: float = 0.12
+    trim_silence: bool = True
+    silence_db: float = -45.0
+    loudness_dbfs: Optional[float] = -20.0
+    fake_mode: str = "tone"
+    fake_chars_per_second: float = 4.5
+    fake_sample_rate: int = 22050
 
 
 @dataclass(frozen=True)
@@ -30,6 +57,9 @@ class AudioEntry:
     duration: float
     text: str
     text_hash: str
+    audio: str = ""
+    chunks: List[Dict[str, Any]] = field(default_factory=list)
+    raw_duration: float = 0.0
 
 
 def _hash_text(text: str) -> str:
@@ -43,77 +73,386 @@ def _wav_duration(path: Path) -> float:
         return frames / float(rate) if rate else 0.0
 
 
-def _run_piper(text: str, out_path: Path, config: TTSConfig) -> None:
-    args = [config.bin_path, "--model", config.model_path, "--output_file", str(out_path)]
+def _piper_env(config: TTSConfig) -> Dict[str, str]:
+    # 限制每个 Piper 进程内 onnxruntime / OpenMP 的线程数，避免多进程并行时超订 CPU
+    env = dict(os.environ)
+    env.setdefault("OMP_NUM_THREADS", str(max(1, config.threads_per_worker)))
+    return env
+
+
+def _run_piper(text: str, config: TTSConfig) -> PcmAudio:
+    # 单次调用模式：--output_raw 把 16 位单声道 PCM 写到 stdout，直接收进内存
+    args = [config.bin_path, "--model", config.model_path, "--output_raw"]
     if config.extra_args:
         args.extend(shlex.split(config.extra_args))
-    subprocess.run(args, input=text, text=True, check=True)
+    proc = subprocess.run(args, input=text.encode("utf-8"), stdout=subprocess.PIPE, check=True, env=_piper_env(config))
+    return PcmAudio(frames=proc.stdout, sample_rate=model_sample_rate(config.model_path))
 
 
-def synthesize_plan(plan: ProblemPlan, out_dir: Path, config: TTSConfig) -> Path:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    attach_narration(plan)
+def _physical_cores() -> int:
+    # Linux 下按 (physical id, core id) 去重统计物理核；其他平台退回逻辑核数
+    try:
+        cores = set()
+        physical = core = ""
+        with open("/proc/cpuinfo", encoding="utf-8") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical = value.strip()
+                elif key == "core id":
+                    core = value.strip()
+                elif not key and core:
+                    cores.add((physical, core))
+                    physical = core = ""
+        if core:
+            cores.add((physical, core))
+        if cores:
+            return len(cores)
+    except OSError:
+        pass
+    return os.cpu_count() or 1
+
+
+def _pool_size(config: TTSConfig, jobs: int) -> int:
+    workers = config.workers
+    if workers <= 0:
+        workers = _physical_cores() // max(1, config.threads_per_worker)
+    return max(1, min(workers, jobs))
 
-    manifest_path = out_dir / "manifest.json"
-    existing: Dict[str, Any] = {}
-    if manifest_path.exists():
-        try:
-            existing = json.loads(manifest_path.read_text(encoding="utf-8"))
-        except Exception:
-            existing = {}
 
-    existing_map: Dict[tuple[int, int], Dict[str, Any]] = {}
-    for entry in existing.get("entries", []) if isinstance(existing, dict) else []:
+def _model_config_digest(model_path: str) -> str:
+    # Piper 的模型配置位于 <model>.onnx.json；内容变化（采样率、说话人、音素表）即视为不同音色
+    digest = hashlib.sha1()
+    for candidate in (Path(model_path + ".json"), Path(model_path).with_suffix(".json")):
         try:
-            existing_map[(int(entry.get("q")), int(entry.get("s")))] = entry
-        except Exception:
+            digest.update(candidate.read_bytes())
+            break
+        except OSError:
             continue
+    return digest.hexdigest()
 
-    entries: List[AudioEntry] = []
+
+class PiperBackend:
+    """
+    Piper 后端：常驻进程池（或 PIPER_PERSISTENT=0 时每句一个进程），按完成顺序产出结果
+    """
+
+    name = "piper"
+
+    def __init__(self, config: TTSConfig) -> None:
+        if not config.model_path:
+            raise RuntimeError("PIPER_MODEL is not set")
+        self.config = config
+
+    def signature(self) -> str:
+        return "\0".join(
+            (
+                os.path.abspath(self.config.model_path),
+                _model_config_digest(self.config.model_path),
+                self.config.extra_args.strip(),
+            )
+        )
+
+    def synthesize_batch(self, texts: Sequence[str]) -> Iterator[tuple[int, PcmAudio]]:
+        if not texts:
+            return
+        config = self.config
+        size = _pool_size(config, len(texts))
+        if not config.persistent:
+            with ThreadPoolExecutor(max_workers=size) as pool:
+                futures = {pool.submit(_run_piper, text, config): i for i, text in enumerate(texts)}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            return
+        # 常驻进程池：每个 Piper 只加载一次模型，未命中缓存的句子分发给空闲进程，按完成顺序收集
+        from .worker import PiperWorker
+
+        workers = [PiperWorker(config) for _ in range(size)]
+        idle: "queue.Queue[PiperWorker]" = queue.Queue()
+        for worker in workers:
+            idle.put(worker)
+
+        def _run(text: str) -> PcmAudio:
+            worker = idle.get()
+            try:
+                return worker.synthesize_pcm(text)
+            finally:
+                idle.put(worker)
+
+        try:
+            with ThreadPoolExecutor(max_workers=size, thread_name_prefix="piper") as pool:
+                futures = {pool.submit(_run, text): i for i, text in enumerate(texts)}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            for worker in workers:
+                worker.close()
+
+
+def _synthesize_pending(
+    pending: Dict[str, str],
+    backend: TTSBackend,
+    sink: Callable[[str, PcmAudio], None],
+) -> None:
+    """
+    合成 pending（key → 文本）中的全部句子，每完成一句立即以内存 PCM 交给 sink，不在内存中堆积整批音频
+    """
+    if not pending:
+        return
+    keys = list(pending)
+    for index, audio in backend.synthesize_batch([pending[k] for k in keys]):
+        sink(keys[index], audio)
+
+
+def _prune_stale_audio(out_dir: Path, keep: set[str]) -> None:
+    # 只清理本模块生成的文件名（内容哈希或旧版 qNN_sNN），不碰目录里的其他文件
+    for path in out_dir.glob("*.wav"):
+        if path.name not in keep and (_AUDIO_NAME_RE.fullmatch(path.name) or _LEGACY_NAME_RE.fullmatch(path.name)):
+            path.unlink(missing_ok=True)
+
+
+def _postprocess_signature(config: TTSConfig) -> str:
+    parts = []
+    if config.trim_silence:
+        parts.append(f"trim:{config.silence_db:.1f}")
+    if config.loudness_dbfs is not None:
+        parts.append(f"loud:{config.loudness_dbfs:.1f}")
+    return ";".join(parts)
+
+
+def _step_key(units: List[str], pauses: List[float], config: TTSConfig, backend_signature: str) -> str:
+    # 无后处理的单个单元：整步音频即单元音频，共用同一个 key；否则 key 同时包含切分、停顿与后处理参数
+    post = _postprocess_signature(config)
+    if len(units) == 1 and not post:
+        return audio_key(units[0], backend_signature)
+    signature = "\x1e".join(units) + "\x1f" + ",".join(f"{p:.3f}" for p in pauses) + "\x1f" + post
+    return audio_key(signature, backend_signature)
+
+
+def synthesize_plan(
+    plan: ProblemPlan,
+    out_dir: Path,
+    config: TTSConfig,
+    *,
+    materialize: bool = True,
+    backend: Optional[TTSBackend] = None,
+) -> Path:
+    """
+    为 plan 的每个步骤合成旁白音频并写出 manifest.json
+    旁白先切成句子 / 分句单元（见 tts.chunking），整个 plan 内去重后并行合成，再插入停顿拼成每步音频；
+    manifest 的 chunks 字段记录每个单元在该步音频中的起点与时长。
+    音频按内容哈希命名与复用（见 tts.store），步骤移动、插入或跨 plan 重复的句子都不会重新合成。
+    合成结果以内存 PCM 传递，时长由采样数直接得出；启用音频库时 materialize=False 可完全不写逐步 WAV，
+    由渲染后的混音阶段（tts.mix）按 manifest 中的哈希直接从音频库取数据。
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    attach_narration(plan)
+    backend = backend or make_backend(config)
+    backend_signature = backend.signature()
+    store = get_audio_store()
+    materialize = materialize or store is None
+    manifest_path = out_dir / "manifest.json"
+    journal = ManifestJournal(manifest_path)
+    previous_steps, previous_units = journal.load() if not config.overwrite else ({}, {})
+    previous_chunks = {
+        key: (record["chunks"], float(record.get("raw_duration") or record.get("duration") or 0.0))
+        for key, record in previous_steps.items()
+        if isinstance(record.get("chunks"), list)
+    }
+    # 未启用音频库时，单元音频落在 .units/ 下，供中断后重跑续用
+    units_dir = out_dir / ".units"
+
+    planned: List[tuple[int, int, str, str, str]] = []
+    steps: Dict[str, tuple[List[str], List[str], List[float]]] = {}
     for qi, q in enumerate(plan.questions, start=1):
         for si, step in enumerate(q.steps, start=1):
             text = step.narration or build_narration(step)
-            text_hash = _hash_text(text)
-            filename = f"q{qi:02d}_s{si:02d}.wav"
-            out_path = out_dir / filename
-
-            cached = existing_map.get((qi, si))
-            if (
-                out_path.exists()
-                and cached
-                and cached.get("text_hash") == text_hash
-                and not config.overwrite
-            ):
-                duration = float(cached.get("duration", 0.0)) if cached.get("duration") else _wav_duration(out_path)
+            units = split_units(text) if config.chunking else [text.strip()]
+            units = units or [text]
+            pauses = [unit_pause(u, config.sentence_pause_s, config.clause_pause_s) for u in units[:-1]]
+            key = _step_key(units, pauses, config, backend_signature)
+            planned.append((qi, si, text, key, f"{key[:_AUDIO_NAME_LEN]}.wav"))
+            steps.setdefault(key, (units, [audio_key(u, backend_signature) for u in units], pauses))
+
+    durations: Dict[str, float] = {}
+    raw_durations: Dict[str, float] = {}
+    chunks: Dict[str, List[Dict[str, Any]]] = {}
+    compose: Dict[str, tuple[List[str], List[str], List[float]]] = {}
+    postprocess = bool(_postprocess_signature(config))
+    for key, (units, unit_keys, pauses) in steps.items():
+        out_path = out_dir / f"{key[:_AUDIO_NAME_LEN]}.wav"
+        if not config.overwrite:
+            stored = store.get(key) if store else None
+            known = previous_chunks.get(key)
+            if known is None and store is not None and not postprocess:
+                unit_hits = [store.get(k) for k in unit_keys]
+                if all(hit is not None for hit in unit_hits):
+                    unit_durations = [hit.duration for hit in unit_hits]
+                    known = (
+                        _chunk_records(units, unit_keys, unit_durations, pauses),
+                        sum(unit_durations) + sum(pauses),
+                    )
+            if stored is not None and known is not None:
+                if materialize:
+                    store.materialize(key, out_path)
+                durations[key] = stored.duration
+                chunks[key], raw_durations[key] = known
+                continue
+            if store is None and out_path.exists() and known is not None:
+                durations[key] = _wav_duration(out_path)
+                chunks[key], raw_durations[key] = known
+                continue
+        compose[key] = (units, unit_keys, pauses)
+
+    # 需要拼接的步骤所涉及的单元：音频库已有的直接读取，其余去重后交给合成池
+    unit_audio: Dict[str, PcmAudio] = {}
+    pending: Dict[str, str] = {}
+    for units, unit_keys, _ in compose.values():
+        for unit, unit_key in zip(units, unit_keys):
+            if unit_key in pending or unit_key in unit_audio:
+                continue
+            unit_path = units_dir / f"{unit_key}.wav"
+            if not config.overwrite and store is not None and store.get(unit_key) is not None:
+                unit_audio[unit_key] = store.load_pcm(unit_key)
+            elif not config.overwrite and store is None and unit_key in previous_units and unit_path.exists():
+                unit_audio[unit_key] = read_wav(unit_path)
             else:
-                _run_piper(text, out_path, config)
-                duration = _wav_duration(out_path)
-
-            entries.append(
-                AudioEntry(
-                    q=qi,
-                    s=si,
-                    path=filename,
-                    duration=duration,
-                    text=text,
-                    text_hash=text_hash,
-                )
+                pending[unit_key] = unit
+
+    def _accept(unit_key: str, audio: PcmAudio) -> None:
+        unit_audio[unit_key] = audio
+        if store is not None:
+            store.put_pcm(unit_key, audio)
+        else:
+            write_wav(units_dir / f"{unit_key}.wav", audio)
+        journal.append_unit(unit_key, audio.duration)
+
+    _synthesize_pending(pending, backend, _accept)
+
+    # 后处理：先批量裁掉各单元首尾静音再拼接，拼好的各步统一响度；音频库中始终保存未处理的单元原始输出
+    needed = list(dict.fromkeys(k for _, unit_keys, _ in compose.values() for k in unit_keys))
+    raw_units = [unit_audio[k] for k in needed]
+    ready_units = trim_silence(raw_units, config.silence_db) if config.trim_silence else raw_units
+    ready = dict(zip(needed, ready_units))
+    raw_length = {k: audio.duration for k, audio in zip(needed, raw_units)}
+
+    composed: List[tuple[str, PcmAudio]] = []
+    for key, (units, unit_keys, pauses) in compose.items():
+        parts = [ready[k] for k in unit_keys]
+        composed.append((key, parts[0] if len(parts) == 1 else concat_units(parts, pauses)))
+        chunks[key] = _chunk_records(units, unit_keys, [p.duration for p in parts], pauses)
+        raw_durations[key] = sum(raw_length[k] for k in unit_keys) + sum(pauses)
+    if config.loudness_dbfs is not None and composed:
+        leveled = normalize_loudness([audio for _, audio in composed], config.loudness_dbfs)
+        composed = [(key, audio) for (key, _), audio in zip(composed, leveled)]
+    for key, audio in composed:
+        if store is not None and key not in unit_audio:
+            store.put_pcm(key, audio)
+        if materialize:
+            write_wav(out_dir / f"{key[:_AUDIO_NAME_LEN]}.wav", audio)
+        durations[key] = audio.duration
+        journal.append_step(
+            {
+                "audio": key,
+                "duration": audio.duration,
+                "raw_duration": round(raw_durations[key], 4),
+                "chunks": chunks[key],
+            }
+        )
+
+    entries: List[AudioEntry] = []
+    for qi, si, text, key, filename in planned:
+        entries.append(
+            AudioEntry(
+                q=qi,
+                s=si,
+                path=filename,
+                duration=durations[key],
+                text=text,
+                text_hash=_hash_text(text),
+                audio=key,
+                chunks=chunks[key],
+                raw_duration=round(raw_durations[key], 4),
             )
+        )
+    _prune_stale_audio(out_dir, {filename for *_, filename in planned} if materialize else set())
+    if units_dir.exists():
+        used_units = {c["audio"] for entry in entries for c in entry.chunks}
+        for path in units_dir.glob("*.wav"):
+            if path.stem not in used_units:
+                path.unlink(missing_ok=True)
+
+    if store is not None:
+        store.flush()
+    return journal.compact([entry.__dict__ for entry in entries])
 
-    payload = {
-        "format": "tts_manifest_v1",
-        "base_dir": ".",
-        "entries": [entry.__dict__ for entry in entries],
-    }
-    manifest_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return manifest_path
+
+def _chunk_records(
+    units: List[str], unit_keys: List[str], unit_durations: List[float], pauses: List[float]
+) -> List[Dict[str, Any]]:
+    return [
+        {"text": unit, "start": round(start, 4), "duration": round(duration, 4), "audio": unit_key}
+        for unit, unit_key, (start, duration) in zip(units, unit_keys, chunk_timings(unit_durations, pauses))
+    ]
 
 
 def config_from_env() -> TTSConfig:
-    model_path = os.environ.get("PIPER_MODEL")
-    if not model_path:
-        raise RuntimeError("PIPER_MODEL is not set")
+    backend = os.environ.get("TTS_BACKEND", "piper").strip().lower() or "piper"
+    model_path = os.environ.get("PIPER_MODEL", "")
+    if backend == "piper" and not model_path:
+        raise RuntimeError("PIPER_MODEL is not set (or set TTS_BACKEND=fake)")
     bin_path = os.environ.get("PIPER_BIN", "piper")
     extra_args = os.environ.get("PIPER_ARGS", "")
     overwrite = os.environ.get("PIPER_OVERWRITE", "").lower() in {"1", "true", "yes"}
-    return TTSConfig(model_path=model_path, bin_path=bin_path, extra_args=extra_args, overwrite=overwrite)
+    try:
+        timeout_s = float(os.environ.get("PIPER_TIMEOUT", "60"))
+    except ValueError:
+        timeout_s = 60.0
+    persistent = os.environ.get("PIPER_PERSISTENT", "1").lower() not in {"0", "false", "no", "off"}
+    try:
+        workers = int(os.environ.get("PIPER_WORKERS", "0"))
+    except ValueError:
+        workers = 0
+    try:
+        threads_per_worker = int(os.environ.get("PIPER_THREADS", "2"))
+    except ValueError:
+        threads_per_worker = 2
+    chunking = os.environ.get("TTS_CHUNKING", "1").lower() not in {"0", "false", "no", "off"}
+    sentence_pause_s = _env_float("TTS_SENTENCE_PAUSE", 0.25)
+    clause_pause_s = _env_float("TTS_CLAUSE_PAUSE", 0.12)
+    trim = os.environ.get("TTS_TRIM", "1").lower() not in {"0", "false", "no", "off"}
+    silence_db = _env_float("TTS_SILENCE_DB", -45.0)
+    loudness_raw = os.environ.get("TTS_LOUDNESS", "-20").strip().lower()
+    loudness_dbfs = None if loudness_raw in {"", "0", "off", "false", "no"} else _env_float("TTS_LOUDNESS", -20.0)
+    try:
+        fake_sample_rate = int(os.environ.get("TTS_FAKE_RATE", "22050"))
+    except ValueError:
+        fake_sample_rate = 22050
+    return TTSConfig(
+        model_path=model_path,
+        backend=backend,
+        bin_path=bin_path,
+        extra_args=extra_args,
+        overwrite=overwrite,
+        timeout_s=timeout_s,
+        persistent=persistent,
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+        chunking=chunking,
+        sentence_pause_s=sentence_pause_s,
+        clause_pause_s=clause_pause_s,
+        trim_silence=trim,
+        silence_db=silence_db,
+        loudness_dbfs=loudness_dbfs,
+        fake_mode=os.environ.get("TTS_FAKE_MODE", "tone").strip().lower(),
+        fake_chars_per_second=_env_float("TTS_FAKE_CPS", 4.5),
+        fake_sample_rate=fake_sample_rate,
+    )
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+
+from .pcm import PcmAudio
+
+# 合成后的批量后处理（全部在 NumPy 数组上完成）：
+# 1. 按短时能量阈值裁掉首尾静音，只保留少量余量；
+# 2. 各步统一到相同的响度（RMS dBFS），并限制峰值避免削波。
+
+_FRAME_MS = 10.0
+_PEAK_LIMIT = 0.98
+
+
+def _to_float(audio: PcmAudio) -> np.ndarray:
+    return np.frombuffer(audio.frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _from_float(samples: np.ndarray, like: PcmAudio) -> PcmAudio:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    return PcmAudio(frames=pcm.tobytes(), sample_rate=like.sample_rate, channels=like.channels, sampwidth=like.sampwidth)
+
+
+def _supported(audio: PcmAudio) -> bool:
+    return audio.sampwidth == 2 and audio.channels == 1
+
+
+def trim_bounds(samples: np.ndarray, sample_rate: int, threshold_db: float, pad_ms: float) -> tuple[int, int]:
+    """
+    计算首尾静音裁剪后的采样区间 [start, end)
+    :param samples: 单声道浮点采样（-1..1）
+    :param threshold_db: 帧 RMS 低于该 dBFS 视为静音
+    :param pad_ms: 在首尾有声帧之外保留的余量
+    :return: (start, end)；整段静音时原样返回全区间
+    """
+    frame = max(1, int(sample_rate * _FRAME_MS / 1000.0))
+    count = samples.size // frame
+    if count == 0:
+        return 0, samples.size
+    frames = samples[: count * frame].reshape(count, frame)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    voiced = np.flatnonzero(energy > 10.0 ** (threshold_db / 20.0))
+    if voiced.size == 0:
+        return 0, samples.size
+    pad = int(sample_rate * pad_ms / 1000.0)
+    start = max(0, int(voiced[0]) * frame - pad)
+    end = min(samples.size, (int(voiced[-1]) + 1) * frame + pad)
+    return start, end
+
+
+def trim_silence(audios: Sequence[PcmAudio], threshold_db: float = -45.0, pad_ms: float = 30.0) -> List[PcmAudio]:
+    """
+    批量裁掉首尾静音；非 16 位单声道的片段原样返回
+    """
+    trimmed: List[PcmAudio] = []
+    for audio in audios:
+        if not _supported(audio):
+            trimmed.append(audio)
+            continue
+        samples = _to_float(audio)
+        start, end = trim_bounds(samples, audio.sample_rate, threshold_db, pad_ms)
+        if start == 0 and end == samples.size:
+            trimmed.append(audio)
+            continue
+        trimmed.append(
+            PcmAudio(
+                frames=audio.frames[start * 2:end * 2],
+                sample_rate=audio.sample_rate,
+                channels=audio.channels,
+                sampwidth=audio.sampwidth,
+            )
+        )
+    return trimmed
+
+
+def normalize_loudness(audios: Sequence[PcmAudio], target_dbfs: float = -20.0) -> List[PcmAudio]:
+    """
+    将各段音频统一到相同的 RMS 响度；所有片段拼成一个数组后用 reduceat 一次算出各段 RMS 与峰值，
+    增益受峰值限制（不超过 0.98 满幅），空片段与非 16 位单声道片段不做处理
+    """
+    indices = [i for i, audio in enumerate(audios) if _supported(audio) and audio.nframes]
+    result = list(audios)
+    if not indices:
+        return result
+    arrays = [_to_float(audios[i]) for i in indices]
+    lengths = np.array([a.size for a in arrays])
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    joined = np.concatenate(arrays)
+    rms = np.sqrt(np.add.reduceat(joined * joined, offsets) / lengths)
+    peaks = np.maximum.reduceat(np.abs(joined), offsets)
+    target = 10.0 ** (target_dbfs / 20.0)
+    with np.errstate(divide="ignore"):
+        gains = np.where(rms > 0, target / rms, 1.0)
+        gains = np.minimum(gains, np.where(peaks > 0, _PEAK_LIMIT / peaks, 1.0))
+    scaled = joined * np.repeat(gains.astype(np.float32), lengths)
+    for idx, chunk in zip(indices, np.split(scaled, np.cumsum(lengths)[:-1])):
+        result[idx] = _from_float(chunk, audios[idx])
+    return result
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .pcm import PcmAudio, read_wav, write_wav
+
+# 全局内容寻址音频库：
+# key = hash(朗读文本, 后端指纹)，Piper 的指纹为 (模型路径, 模型配置内容, PIPER_ARGS)，与题目、步骤位置无关，
+# 不同 plan 中的相同句子、步骤调整顺序后的句子都直接复用。
+# 音频以“差分 + 高低字节分离 + zlib”的无损格式存放，索引放在同目录 SQLite 中，按最近使用做 LRU 淘汰。
+
+_DEFAULT_ROOT = Path(__file__).resolve().parents[1] / ".cache" / "tts_store"
+_DEFAULT_MAX_MB = 2048.0
+_MAGIC = b"TTSZ1"
+_HEADER = struct.Struct("<5sIHHI")
+_EVICT_TARGET = 0.9
+
+
+@dataclass(frozen=True)
+class StoredAudio:
+    key: str
+    path: Path
+    duration: float
+    sample_rate: int
+    size: int
+
+
+def audio_key(text: str, backend_signature: str) -> str:
+    """
+    计算一句朗读音频的内容地址
+    :param text: 朗读文本
+    :param backend_signature: 后端指纹（Piper 为模型路径、模型配置内容与 PIPER_ARGS）
+    :return: 40 位十六进制哈希
+    """
+    payload = text + "\0" + backend_signature
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def encode_pcm(frames: bytes, sample_rate: int, channels: int = 1, sampwidth: int = 2) -> bytes:
+    """
+    16 位 PCM 先做相邻样本差分，再拆成低/高字节两个平面后 zlib 压缩；语音数据通常可压到原来的一半左右
+    """
+    header = _HEADER.pack(_MAGIC, sample_rate, channels, sampwidth, len(frames))
+    if sampwidth != 2 or len(frames) % 2:
+        return header + zlib.compress(frames, 6)
+    samples = np.frombuffer(frames, dtype="<i2").astype(np.int32)
+    delta = np.diff(samples, prepend=0).astype(np.uint16)
+    planes = np.concatenate(((delta & 0xFF).astype(np.uint8), (delta >> 8).astype(np.uint8)))
+    return header + zlib.compress(planes.tobytes(), 6)
+
+
+def decode_pcm(blob: bytes) -> tuple[bytes, int, int, int]:
+    """
+    encode_pcm 的逆过程，返回 (PCM 帧, 采样率, 声道数, 采样字节数)
+    """
+    magic, sample_rate, channels, sampwidth, length = _HEADER.unpack_from(blob)
+    if magic != _MAGIC:
+        raise ValueError("not a TTS store blob")
+    raw = zlib.decompress(blob[_HEADER.size:])
+    if sampwidth != 2 or length % 2:
+        return raw, sample_rate, channels, sampwidth
+    planes = np.frombuffer(raw, dtype=np.uint8)
+    half = planes.size // 2
+    delta = planes[:half].astype(np.uint16) | (planes[half:].astype(np.uint16) << 8)
+    samples = np.cumsum(delta, dtype=np.uint16)
+    return samples.astype("<u2").tobytes(), sample_rate, channels, sampwidth
+
+
+class AudioStore:
+    """
+    内容寻址的音频库（目录 + SQLite 索引），多进程共享同一目录时依赖 SQLite 锁与原子改名
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # 命中时的最近使用时间先记在内存里，flush() / 淘汰前一次性写回，查询本身不提交事务
+        self._touched: dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.root / "index.sqlite3"), timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audio ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, duration REAL NOT NULL, "
+                "sample_rate INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _blob_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.ttsz"
+
+    def get(self, key: str) -> Optional[StoredAudio]:
+        path = self._blob_path(key)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT size, duration, sample_rate FROM audio WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not path.exists():
+                conn.execute("DELETE FROM audio WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            self._touched[key] = time.time()
+        return StoredAudio(key=key, path=path, duration=float(row[1]), sample_rate=int(row[2]), size=int(row[0]))
+
+    def put_wav(self, key: str, wav_path: Path) -> StoredAudio:
+        return self.put_pcm(key, read_wav(wav_path))
+
+    def put_pcm(self, key: str, audio: PcmAudio) -> StoredAudio:
+        """
+        将一段 PCM 编码后存入库中（同 key 已存在时覆盖），随后按容量上限淘汰最久未用的条目
+        """
+        blob = encode_pcm(audio.frames, audio.sample_rate, audio.channels, audio.sampwidth)
+        path = self._blob_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO audio (key, size, duration, sample_rate, used) VALUES (?, ?, ?, ?, ?)",
+                (key, len(blob), audio.duration, audio.sample_rate, time.time()),
+            )
+            conn.commit()
+        self.evict(keep={key})
+        return StoredAudio(key=key, path=path, duration=audio.duration, sample_rate=audio.sample_rate, size=len(blob))
+
+    def load_pcm(self, key: str) -> PcmAudio:
+        frames, sample_rate, channels, sampwidth = decode_pcm(self._blob_path(key).read_bytes())
+        return PcmAudio(frames=frames, sample_rate=sample_rate, channels=channels, sampwidth=sampwidth)
+
+    def materialize(self, key: str, out_path: Path) -> Path:
+        """
+        将库中的条目解码为普通 WAV（渲染端 add_sound 需要），目标已存在时直接返回
+        """
+        if out_path.exists():
+            return out_path
+        tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        write_wav(tmp, self.load_pcm(key))
+        os.replace(tmp, out_path)
+        return out_path
+
+    def flush(self) -> None:
+        """
+        把累积的最近使用时间一次性写回索引（synthesize_plan 结束时调用）
+        """
+        with self._lock:
+            if self._touched:
+                self._flush_touches(self._connect())
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        touched, self._touched = self._touched, {}
+        conn.executemany("UPDATE audio SET used = ? WHERE key = ?", [(t, k) for k, t in touched.items()])
+        conn.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()
+        return int(row[0])
+
+    def evict(self, keep: Optional[set[str]] = None) -> int:
+        """
+        超过容量上限时按 used 从旧到新删除，直到降到上限的 90%；返回删除条数
+        """
+        if not self.max_bytes:
+            return 0
+        keep = keep or set()
+        removed = 0
+        with self._lock:
+            conn = self._connect()
+            total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0])
+            if total <= self.max_bytes:
+                return 0
+            if self._touched:
+                self._flush_touches(conn)
+            target = self.max_bytes * _EVICT_TARGET
+            for key, size in conn.execute("SELECT key, size FROM audio ORDER BY used ASC").fetchall():
+                if total <= target:
+                    break
+                if key in keep:
+                    continue
+                self._blob_path(key).unlink(missing_ok=True)
+                conn.execute("DELETE FROM audio WHERE key = ?", (key,))
+                total -= int(size)
+                removed += 1
+            conn.commit()
+        return removed
+
+
+_store: Optional[AudioStore] = None
+_store_spec: Optional[tuple[str, int]] = None
+
+
+def get_audio_store() -> Optional[AudioStore]:
+    """
+    按环境变量 TTS_STORE 返回共享音频库：未设置用默认路径，0/off/false 关闭；
+    TTS_STORE_MAX_MB 控制容量上限（默认 2048，0 表示不限）
+    """
+    global _store, _store_spec
+    raw = os.environ.get("TTS_STORE", "").strip()
+    if raw.lower() in {"0", "off", "false", "no"}:
+        return None
+    try:
+        max_mb = float(os.environ.get("TTS_STORE_MAX_MB", str(_DEFAULT_MAX_MB)))
+    except ValueError:
+        max_mb = _DEFAULT_MAX_MB
+    spec = (raw or str(_DEFAULT_ROOT), int(max_mb * 1024 * 1024))
+    if _store is None or _store_spec != spec:
+        _store = AudioStore(Path(spec[0]), spec[1])
+        _store_spec = spec
+    return _store
+
+
+def _flush_store() -> None:
+    # 异常退出时 synthesize_plan 来不及 flush，退出前补写最近使用时间
+    if _store is not None:
+        try:
+            _store.flush()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(_flush_store)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import shlex
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Optional
+
+from .pcm import PcmAudio, read_wav
+
+if TYPE_CHECKING:
+    from .piper import TTSConfig
+
+
+class PiperWorkerError(RuntimeError):
+    pass
+
+
+def _pump_lines(stream: IO[str], sink: "queue.Queue[Optional[str]]") -> None:
+    # 后台线程读取 stdout，主线程用带超时的 queue.get 等待结果
+    for line in stream:
+        sink.put(line.rstrip("\r\n"))
+    sink.put(None)
+
+
+def _scratch_root() -> Optional[str]:
+    # 中间 WAV 放在内存文件系统（/dev/shm）上，读入内存后立即删除，不触碰网络盘
+    raw = os.environ.get("PIPER_SCRATCH", "").strip()
+    if raw:
+        return raw
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
+class PiperWorker:
+    """
+    常驻 Piper 进程：只加载一次 ONNX 模型，通过 stdin 的 JSON 行逐句合成
+    每条请求写入 {"text": ..., "output_file": ...}，Piper 完成后在 stdout 打印输出路径。
+    进程崩溃或超时会自动重启并重试一次。
+    """
+
+    def __init__(self, config: TTSConfig, *, timeout_s: Optional[float] = None, retries: int = 1) -> None:
+        self.config = config
+        self.timeout_s = timeout_s if timeout_s is not None else config.timeout_s
+        self.retries = max(0, retries)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._scratch = tempfile.TemporaryDirectory(prefix="piper_worker_", dir=_scratch_root())
+        self._serial = 0
+
+    def _args(self) -> list[str]:
+        args = [
+            self.config.bin_path,
+            "--model",
+            self.config.model_path,
+            "--json-input",
+            "--output_dir",
+            self._scratch.name,
+        ]
+        if self.config.extra_args:
+            args.extend(shlex.split(self.config.extra_args))
+        return args
+
+    def start(self) -> None:
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        from .piper import _piper_env
+
+        self._lines = queue.Queue()
+        self._proc = subprocess.Popen(
+            self._args(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            env=_piper_env(self.config),
+        )
+        reader = threading.Thread(target=_pump_lines, args=(self._proc.stdout, self._lines), daemon=True)
+        reader.start()
+
+    def stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+            proc.wait()
+
+    def close(self) -> None:
+        self.stop()
+        self._scratch.cleanup()
+
+    def _request(self, text: str, out_path: Path) -> None:
+        self.start()
+        proc = self._proc
+        assert proc is not None and proc.stdin is not None
+        out_path.unlink(missing_ok=True)
+        line = json.dumps({"text": text, "output_file": str(out_path)}, ensure_ascii=False)
+        try:
+            proc.stdin.write(line + "\n")
+            proc.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            raise PiperWorkerError(f"piper exited (code {proc.poll()})") from exc
+        try:
+            reply = self._lines.get(timeout=self.timeout_s)
+        except queue.Empty as exc:
+            raise PiperWorkerError(f"piper timed out after {self.timeout_s:.0f}s") from exc
+        if reply is None:
+            raise PiperWorkerError(f"piper exited (code {proc.poll()})")
+        if not out_path.exists():
+            raise PiperWorkerError(f"piper did not write {out_path}: {reply}")
+
+    def synthesize_to(self, text: str, out_path: Path) -> Path:
+        """
+        合成一句到指定 WAV 文件；失败时重启进程重试，重试用尽抛出 PiperWorkerError
+        """
+        out_path = Path(out_path).resolve()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        last_error: Optional[Exception] = None
+        for _ in range(self.retries + 1):
+            try:
+                self._request(text, out_path)
+                return out_path
+            except PiperWorkerError as exc:
+                last_error = exc
+                self._kill()
+        raise PiperWorkerError(str(last_error))
+
+    def synthesize_pcm(self, text: str) -> PcmAudio:
+        """
+        合成一句并以内存 PCM 返回。
+        常驻模式下每句仍要经 scratch 目录里的 WAV 中转一次（读取后即删除）：Piper 的 --json-input
+        配合 --output_raw 时各句 PCM 在 stdout 上首尾相接、没有分界，无法按句切回；
+        只有单次调用模式（PIPER_PERSISTENT=0，见 piper._run_piper）直接从 stdout 收 PCM
+        """
+        self._serial += 1
+        scratch = Path(self._scratch.name) / f"{self._serial:08d}.wav"
+        try:
+            self.synthesize_to(text, scratch)
+            return read_wav(scratch)
+        finally:
+            scratch.unlink(missing_ok=True)
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.kill()
+        proc.wait()
+
+    def __enter__(self) -> "PiperWorker":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
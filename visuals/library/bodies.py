@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, Iterable, Tuple
 
 import numpy as np
-from manim import Circle, Dot, Line, Rectangle, RoundedRectangle, Text, VGroup
+from manim import Circle, Dot, Line, Mobject, Rectangle, RoundedRectangle, VGroup
 
+from .labels import make_label
 from .registry import register
 from .types import BuildResult, World2DContext
 
@@ -50,8 +51,8 @@ def _stroke_only(mobj) -> None:
     setattr(mobj, "_stroke_only", True)
 
 
-def _label(text: str, *, font: str, font_size: float, color: str) -> Text:
-    return Text(text, font=font, font_size=font_size, color=color)
+def _label(text: str, *, font: str, font_size: float, color: str) -> Mobject:
+    return make_label(text, font=font, font_size=font_size, color=color)
 
 
 @register("particle")
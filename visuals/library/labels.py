@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from manim import Mobject, Text
+
+from layout.sized_cache import SizedCache, sized_cache
+from layout.text_cache import shared_copy
+from layout.text_fit import _env_megabytes, _mobject_nbytes
+
+# Shared label factory for library components: every label string is rasterized by Pango once
+# per (text, font, size, color); callers get copy-on-write instances of the cached geometry under Cairo
+# and plain copies under OpenGL.
+_label_cache = SizedCache("visual_label", _env_megabytes("LABEL_CACHE_MB", 32), _mobject_nbytes)
+
+
+@sized_cache(_label_cache)
+def _cached_label(text: str, font: Optional[str], font_size: float, color: str) -> Mobject:
+    # 字体原样传给 Text，与各组件原先直接构建 Text 时完全一致
+    return Text(text, font=font, font_size=font_size, color=color)
+
+
+def make_label(text: str, *, font: Optional[str], font_size: float, color: str) -> Mobject:
+    return shared_copy(_cached_label(str(text), font, float(font_size), str(color)))
+
+
+def format_tick(value: float) -> str:
+    if abs(value) < 1e-8:
+        return "0"
+    if abs(value - round(value)) < 1e-6:
+        return str(int(round(value)))
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def tick_label(value: float, *, font: Optional[str], font_size: float, color: str) -> Mobject:
+    # Axis ticks repeat the same few strings across axes and questions, so they are always cache hits
+    # after the first axis is built.
+    return make_label(format_tick(value), font=font, font_size=font_size, color=color)
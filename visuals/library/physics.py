@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, Iterable, List, Tuple
 
 import numpy as np
-from manim import Arc, Arrow, Line, Polygon, Text, VGroup
+from manim import Arc, Arrow, Line, Mobject, Polygon, VGroup
 
+from .labels import make_label
 from .registry import register
 from .types import BuildResult, World2DContext
 
@@ -46,8 +47,8 @@ def _stroke_only(mobj) -> None:
     setattr(mobj, "_stroke_only", True)
 
 
-def _label(text: str, *, font: str, font_size: float, color: str) -> Text:
-    return Text(text, font=font, font_size=font_size, color=color)
+def _label(text: str, *, font: str, font_size: float, color: str) -> Mobject:
+    return make_label(text, font=font, font_size=font_size, color=color)
 
 
 def _dashed_segments(
@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, Iterable, List, Optional
 
 import numpy as np
-from manim import Arc, Circle, Dot, Line, Polygon, Rectangle, Text, VGroup, VMobject
+from manim import Arc, Circle, Dot, Line, Mobject, Polygon, Rectangle, VGroup, VMobject
 
+from .labels import make_label
 from .registry import register
 from .types import BuildResult, World2DContext
 
@@ -34,8 +35,8 @@ def _world_points(ctx: World2DContext, values: Iterable[Any]) -> List[np.ndarray
     return points
 
 
-def _label_text(label: str, *, font: str, font_size: float, color: str) -> Text:
-    return Text(label, font=font, font_size=font_size, color=color)
+def _label_text(label: str, *, font: str, font_size: float, color: str) -> Mobject:
+    return make_label(label, font=font, font_size=font_size, color=color)
 
 
 def _register_id(spec: Dict[str, Any], mobj) -> Dict[str, Any]:
@@ -221,7 +222,7 @@ def text(*, spec: Dict[str, Any], ctx: World2DContext, theme, **_) -> BuildResul
     content = str(spec.get("text", ""))
     color = str(spec.get("color", DEFAULT_COLOR))
     font_size = float(spec.get("font_size", 28))
-    text_m = Text(content, font=theme.font, font_size=font_size, color=color)
+    text_m = make_label(content, font=theme.font, font_size=font_size, color=color)
     text_m.move_to(pos)
     group = VGroup(text_m)
     _apply_visibility(spec, group)
@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, Iterable, List
 
 import numpy as np
-from manim import Arrow, Dot, Line, Polygon, Text, VGroup, VMobject
+from manim import Arrow, Dot, Line, Polygon, VGroup, VMobject
 
+from .labels import make_label
 from .registry import register
 from .types import BuildResult, World3DContext
 
@@ -67,7 +68,7 @@ def point3d(*, spec: Dict[str, Any], ctx: World3DContext, theme, **_) -> BuildRe
     _stroke_only(dot)
     group = VGroup(dot)
     if label:
-        text = Text(label, font=theme.font, font_size=font_size, color=color)
+        text = make_label(label, font=theme.font, font_size=font_size, color=color)
         text.next_to(dot, direction=np.array([1, 0, 0]), buff=0.08)
         group.add(text)
     _apply_visibility(spec, group)
@@ -142,7 +143,7 @@ def text3d(*, spec: Dict[str, Any], ctx: World3DContext, theme, **_) -> BuildRes
     content = str(spec.get("text", ""))
     color = str(spec.get("color", DEFAULT_COLOR))
     font_size = float(spec.get("font_size", 24))
-    text = Text(content, font=theme.font, font_size=font_size, color=color)
+    text = make_label(content, font=theme.font, font_size=font_size, color=color)
     text.move_to(pos)
     group = VGroup(text)
     _apply_visibility(spec, group)
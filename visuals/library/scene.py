@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Any, Dict, Iterable, Tuple
 
 import numpy as np
-from manim import Arrow, Line, Text, VGroup
+from manim import Arrow, Line, Mobject, VGroup
 
+from .labels import make_label, tick_label
 from .registry import register
 from .types import BuildResult, World2DContext, World3DContext
 
@@ -42,16 +43,8 @@ def _frange(start: float, end: float, step: float) -> Iterable[float]:
     return values
 
 
-def _format_tick(value: float) -> str:
-    if abs(value) < 1e-8:
-        return "0"
-    if abs(value - round(value)) < 1e-6:
-        return str(int(round(value)))
-    return f"{value:.2f}".rstrip("0").rstrip(".")
-
-
-def _text(label: str, *, font: str, font_size: float, color: str) -> Text:
-    return Text(label, font=font, font_size=font_size, color=color)
+def _text(label: str, *, font: str, font_size: float, color: str) -> Mobject:
+    return make_label(label, font=font, font_size=font_size, color=color)
 
 
 @register("grid")
@@ -134,7 +127,7 @@ def axes2d(*, spec: Dict[str, Any], ctx: World2DContext, theme, **_) -> BuildRes
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_numbers:
-            label = _text(_format_tick(x), font=theme.font, font_size=font_size, color=label_color)
+            label = tick_label(x, font=theme.font, font_size=font_size, color=label_color)
             label.next_to(tick, direction=np.array([0, -1, 0]), buff=0.12)
             group.add(label)
 
@@ -148,7 +141,7 @@ def axes2d(*, spec: Dict[str, Any], ctx: World2DContext, theme, **_) -> BuildRes
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_numbers:
-            label = _text(_format_tick(y), font=theme.font, font_size=font_size, color=label_color)
+            label = tick_label(y, font=theme.font, font_size=font_size, color=label_color)
             label.next_to(tick, direction=np.array([-1, 0, 0]), buff=0.12)
             group.add(label)
 
@@ -191,7 +184,7 @@ def number_line(*, spec: Dict[str, Any], ctx: World2DContext, theme, **_) -> Bui
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_numbers:
-            num = _text(_format_tick(x), font=theme.font, font_size=font_size, color=label_color)
+            num = tick_label(x, font=theme.font, font_size=font_size, color=label_color)
             num.next_to(tick, direction=np.array([0, -1, 0]), buff=0.12)
             group.add(num)
 
@@ -410,7 +403,7 @@ def axes3d(*, spec: Dict[str, Any], ctx: World3DContext, theme, **_) -> BuildRes
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_x:
-            label = _text(_format_tick(x), font=theme.font, font_size=font_size, color=label_color)
+            label = tick_label(x, font=theme.font, font_size=font_size, color=label_color)
             label.next_to(tick, direction=perp_x * offset_x, buff=0.08)
             group.add(label)
 
@@ -423,7 +416,7 @@ def axes3d(*, spec: Dict[str, Any], ctx: World3DContext, theme, **_) -> BuildRes
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_y:
-            label = _text(_format_tick(y), font=theme.font, font_size=font_size, color=label_color)
+            label = tick_label(y, font=theme.font, font_size=font_size, color=label_color)
             label.next_to(tick, direction=perp_y * offset_y, buff=0.08)
             group.add(label)
 
@@ -436,7 +429,7 @@ def axes3d(*, spec: Dict[str, Any], ctx: World3DContext, theme, **_) -> BuildRes
         setattr(tick, "_stroke_only", True)
         group.add(tick)
         if show_z:
-            label = _text(_format_tick(z), font=theme.font, font_size=font_size, color=label_color)
+            label = tick_label(z, font=theme.font, font_size=font_size, color=label_color)
             label.next_to(tick, direction=perp_z * offset_z, buff=0.08)
             group.add(label)
 